@@ -0,0 +1,260 @@
+"""
+Études en lot, sans notebook ni client web.
+
+Pour chaque couple source/puits : ψ (moteur au choix), puis, si demandé, le
+criblage des coupures de lignes. Les résultats sont écrits au fil de l'eau
+dans un magasin de résultats (store.py), une étude par couple ; une ligne JSON
+par étude terminée est écrite sur la sortie standard.
+
+Seul le noyau numérique est chargé (ni matplotlib, ni Flask) ; pypsa l'est
+pour lire le fichier réseau.
+
+Usage :
+    python batch.py networks/elec_s_512.nc --pair "DE1 0" "ES1 21" --outages all
+    python batch.py networks/elec_s_512.nc --pairs-file pairs.csv --engine recycled \\
+        --workers 8 --store /data/results --name nightly
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from solver import iterations_to_tolerance
+from store import ResultStore
+from utils import EuropeanGrid
+
+ENGINES = ('lanczos', 'recycled', 'components')
+
+# Grille du processus courant (construite une fois par processus)
+_grid = None
+
+
+def load_network(network):
+    """pypsa.Network depuis un fichier (.nc, .h5 ou dossier CSV) ; un objet réseau est renvoyé tel quel."""
+    if not isinstance(network, str):
+        return network
+    import pypsa
+    return pypsa.Network(network)
+
+
+def build_grid(network, q_N=None, real_data=True, use_real_power=False):
+    network = load_network(network)
+    grid = EuropeanGrid(network, q_N=q_N or 2 * len(network.buses), real_data=real_data,
+                        use_real_power=use_real_power)
+    return grid.build_from_pypsa()
+
+
+def _init_worker(network, q_N, real_data, use_real_power):
+    global _grid
+    _grid = build_grid(network, q_N, real_data, use_real_power)
+
+
+def _solve(source, sink, engine, tol):
+    """ψ (rangé selon grid.nodes) et bilan du moteur pour un couple source/puits."""
+    grid = _grid
+    grid.set_endpoints(ix=source, ex=sink)
+    start = time.perf_counter()
+    report = {'engine': engine}
+    betas = kappas = None
+    if engine == 'recycled':
+        psi = grid.solve_recycled(tol=tol, max_iter=grid.q_N // 2)
+        report.update(iterations=grid.recycle_report['iterations'],
+                      residual=grid.recycle_report['residual'],
+                      R_eff=grid.recycle_report['R_eff'],
+                      converged=grid.recycle_report['converged'])
+    elif engine == 'components' or len(grid.check_islanding()) > 1:
+        psi = grid.solve_components(tol=tol)
+        report['islands'] = grid.island_report
+    else:
+        grid.iterate_qs()
+        psi = grid.calculate_psi_approx()
+        betas, kappas = np.array(grid.betas), np.array(grid.kappas)
+        report.update(R_eff=float(np.sum(kappas**2)),
+                      iterations_to_tol=iterations_to_tolerance(kappas, tol))
+        report['converged'] = report['iterations_to_tol'] is not None
+    report['seconds'] = time.perf_counter() - start
+    values = np.array([psi.get(node, 0.0) for node in grid.nodes])
+    return source, sink, values, betas, kappas, report
+
+
+def _outages(values, lines):
+    """Δψ des coupures de `lines` pour ψ = values ; None pour les ponts."""
+    grid = _grid
+    psi = dict(zip(grid.nodes, values))
+    results = []
+    for line, outage in grid.screen_line_outages(psi, lines).items():
+        results.append((line, None if outage['islanding'] else outage['delta']))
+    return results
+
+
+class _InProcess:
+    """Exécuteur séquentiel de même interface que ProcessPoolExecutor (workers=1)."""
+
+    def submit(self, fn, *args):
+        from concurrent.futures import Future
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def run(network, pairs, lines=None, engine='lanczos', tol=1e-10, q_N=None, workers=1,
+        chunk_lines=64, store='results', name=None, real_data=True, use_real_power=False,
+        compress=True, log=None):
+    """
+    Lance les études et les écrit dans `store` au fur et à mesure.
+
+    Une étude dont le moteur n'a pas atteint `tol` (q_N trop petit) est
+    écrite quand même, avec converged=False dans l'index du magasin.
+
+    Args:
+        network: chemin du réseau PyPSA (ou objet réseau déjà chargé)
+        pairs: liste de (source, puits), identifiants de bus PyPSA (les
+               doublons ne sont calculés qu'une fois)
+        lines: lignes à couper (identifiants PyPSA), 'all', ou None (pas de criblage)
+        engine: 'lanczos', 'recycled' (gradient conjugué déflaté) ou 'components'
+        tol: tolérance du moteur. Pour 'recycled' et 'components', seuil sur
+             le résidu relatif qui arrête le gradient conjugué. Pour 'lanczos',
+             la résolution fait toujours ses q_N itérations : tol ne fixe que
+             'converged' et 'iterations_to_tol' (itérations après lesquelles
+             Σκ² ne varie plus que de tol), sans arrêter le calcul
+        workers: nombre de processus (1 : dans le processus courant)
+        chunk_lines: lignes par tâche de criblage
+
+    Returns:
+        liste des identifiants d'études écrites
+    """
+    global _grid
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r} (expected one of {ENGINES})")
+    results = ResultStore(store) if isinstance(store, str) else store
+    pairs = list(dict.fromkeys(tuple(pair) for pair in pairs))
+    network = load_network(network)
+    _grid = grid = build_grid(network, q_N, real_data, use_real_power)
+    if lines == 'all':
+        lines = list(grid._lines)
+    elif lines is not None:
+        lines = [grid._line_node(line) for line in lines]
+    chunks = [] if not lines else [lines[k:k + chunk_lines]
+                                   for k in range(0, len(lines), chunk_lines)]
+
+    executor = _InProcess() if workers <= 1 else ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker,
+        initargs=(network, grid.q_N, real_data, use_real_power))
+    written = []
+    with executor:
+        pending = {executor.submit(_solve, source, sink, engine, tol): None
+                   for source, sink in pairs}
+        writers, remaining = {}, {}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = pending.pop(future)
+                if key is None:
+                    source, sink, values, betas, kappas, report = future.result()
+                    grid.set_endpoints(ix=source, ex=sink)
+                    writer = results.create(grid, name=name or f"{source}-{sink}",
+                                            compress=compress, engine=engine, tol=tol,
+                                            converged=report.get('converged'), report=report)
+                    writer.write_array('psi', values)
+                    if betas is not None:
+                        writer.write_array('betas', betas)
+                        writer.write_array('kappas', kappas)
+                    key = (source, sink)
+                    writers[key], remaining[key] = (writer, []), len(chunks)
+                    for chunk in chunks:
+                        pending[executor.submit(_outages, values, chunk)] = key
+                else:
+                    writer, islanding = writers[key]
+                    for line, delta in future.result():
+                        if delta is None:
+                            islanding.append(line)
+                        else:
+                            writer.append_delta(line, delta)
+                    remaining[key] -= 1
+                if remaining[key] == 0:
+                    writer, islanding = writers.pop(key)
+                    if lines:
+                        writer.write_table('islanding', {'line': np.array(islanding, dtype=str)})
+                    writer.close()
+                    written.append(writer.study_id)
+                    if log is not None:
+                        print(json.dumps({'study': writer.study_id, 'source': key[0],
+                                          'sink': key[1], 'outages': writer.meta['deltas']['rows'],
+                                          'islanding': len(islanding),
+                                          **{k: v for k, v in writer.meta['report'].items()
+                                             if k != 'islands'}}),
+                              file=log, flush=True)
+    return written
+
+
+def read_pairs(path):
+    """Couples source/puits d'un fichier CSV ou TSV (deux premières colonnes, '#' en commentaire)."""
+    with open(path, newline='') as f:
+        dialect = csv.excel_tab if '\t' in f.read(1024) else csv.excel
+        f.seek(0)
+        return [(row[0].strip(), row[1].strip()) for row in csv.reader(f, dialect)
+                if row and not row[0].startswith('#') and len(row) >= 2]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('network', help='fichier réseau PyPSA')
+    parser.add_argument('--pair', nargs=2, action='append', default=[],
+                        metavar=('SOURCE', 'SINK'), help='couple de bus (répétable)')
+    parser.add_argument('--pairs-file', help='CSV/TSV de couples source, puits')
+    parser.add_argument('--outages', nargs='+', metavar='LINE',
+                        help="lignes à couper, ou 'all'")
+    parser.add_argument('--outages-file', help='une ligne à couper par ligne de fichier')
+    parser.add_argument('--engine', choices=ENGINES, default='lanczos')
+    parser.add_argument('--tol', type=float, default=1e-10,
+                        help="résidu relatif qui arrête 'recycled' / 'components' ; pour "
+                             "'lanczos' (toujours q_N itérations), seuil de convergence sur "
+                             "Σκ² reporté dans l'index sans arrêter le calcul")
+    parser.add_argument('--q-n', type=int, default=None, help='défaut : 2 × nombre de bus')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--chunk-lines', type=int, default=64)
+    parser.add_argument('--store', default='results', help='répertoire du magasin de résultats')
+    parser.add_argument('--name', default=None)
+    parser.add_argument('--no-real-data', action='store_true',
+                        help='couplages unitaires au lieu de √(1/longueur)')
+    parser.add_argument('--real-power', action='store_true',
+                        help='injections réelles des générateurs et charges (une seule étude)')
+    parser.add_argument('--no-compress', action='store_true',
+                        help='Δψ bruts, projetables en mémoire')
+    args = parser.parse_args(argv)
+
+    pairs = [tuple(pair) for pair in args.pair]
+    if args.pairs_file:
+        pairs += read_pairs(args.pairs_file)
+    if args.real_power:
+        pairs = pairs[:1] or [(None, None)]
+    if not pairs:
+        parser.error('no source/sink pair (--pair or --pairs-file)')
+
+    lines = args.outages
+    if lines == ['all']:
+        lines = 'all'
+    if args.outages_file and lines != 'all':
+        with open(args.outages_file) as f:
+            lines = (lines or []) + [line.strip() for line in f
+                                     if line.strip() and not line.startswith('#')]
+
+    run(args.network, pairs, lines, engine=args.engine, tol=args.tol, q_N=args.q_n,
+        workers=args.workers, chunk_lines=args.chunk_lines, store=args.store, name=args.name,
+        real_data=not args.no_real_data, use_real_power=args.real_power,
+        compress=not args.no_compress, log=sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Temps d'import des modules du projet, chacun mesuré dans un interpréteur neuf.
+
+Le noyau numérique (utils, solver, topology) et le lanceur batch ne doivent charger ni matplotlib,
+ni pyvis, ni pypsa ; la couche d'affichage (plotting) et le client web sont
+mesurés à part. Pour chaque cible : meilleur temps sur --repeat processus et
+liste des modules lourds effectivement chargés.
+
+Usage :
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 10 --output import_time.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    'solver': 'import solver',
+    'topology': 'import topology',
+    'utils': 'import utils',
+    'utils+plotting': 'import utils, plotting',
+    'batch': 'import batch',
+    'web_client.app': 'sys.path.insert(0, "web_client"); import app',
+}
+HEAVY = ('matplotlib', 'pyvis', 'IPython', 'pypsa', 'scipy', 'pandas', 'flask')
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+heavy = sorted({{m.split('.')[0] for m in sys.modules}} & set({heavy!r}))
+print(repr((elapsed, heavy)))
+"""
+
+
+def time_import(statement, repeat=5):
+    """(meilleur temps en s, modules lourds chargés) ou (None, message d'erreur)."""
+    code = PROBE.format(statement=statement, heavy=HEAVY)
+    best, heavy = None, []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, '-c', code], cwd=ROOT,
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            return None, proc.stderr.strip().splitlines()[-1]
+        elapsed, heavy = eval(proc.stdout.strip().splitlines()[-1])
+        best = elapsed if best is None else min(best, elapsed)
+    return best, heavy
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help="fichier JSON des résultats")
+    args = parser.parse_args(argv)
+
+    results = []
+    for name, statement in TARGETS.items():
+        seconds, heavy = time_import(statement, args.repeat)
+        if seconds is None:
+            print(f"  {name:<16} skipped ({heavy})")
+            results.append({'target': name, 'wall_time': None, 'error': heavy})
+            continue
+        print(f"  {name:<16} {seconds * 1e3:8.1f} ms  {', '.join(heavy) or '-'}")
+        results.append({'target': name, 'wall_time': seconds, 'heavy_modules': heavy})
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'repeat': args.repeat, 'results': results}, f, indent=1)
+        print(f"\nRésultats écrits dans {args.output}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
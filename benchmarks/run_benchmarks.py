@@ -0,0 +1,427 @@
+"""
+Benchmarks reproductibles du noyau de Lanczos, des constructeurs et du client web.
+
+Cas mesurés :
+  - grilles carrées `HamiltonianGrid.create_network` de plusieurs tailles
+  - réseaux elec_s_128/512/1024 (PyPSA), ou des substituts synthétiques de même
+    taille quand pypsa ou les fichiers LFS ne sont pas disponibles
+  - réseaux synthétiques de 10k à 1M bus (--synthetic-sizes, synthetic.py) :
+    génération, construction, Lanczos à q_N fixé et décomposition de domaine
+
+Pour chaque étape : temps (meilleur de --repeat), pic mémoire (tracemalloc) et
+nombre d'itérations nécessaires pour atteindre la tolérance sur R_eff. Sur les
+réseaux, les R_eff de toutes les lignes estimées par projections aléatoires
+sont comparées aux résolutions exactes (erreur relative maximale).
+
+Usage :
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --quick --compare bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils import HamiltonianGrid, EuropeanGrid  # noqa: E402
+from solver import lanczos, iterations_to_tolerance  # noqa: E402
+from synthetic import SyntheticNetwork  # noqa: E402
+
+NETWORKS = {128: 'elec_s_128.nc', 512: 'elec_s_512.nc', 1024: 'elec_s_1024.nc'}
+
+
+def load_network(size):
+    """Réseau PyPSA embarqué si lisible, sinon substitut synthétique."""
+    path = os.path.join(ROOT, 'networks', NETWORKS[size])
+    try:
+        with open(path, 'rb') as f:
+            is_lfs_pointer = f.read(40).startswith(b'version https://git-lfs')
+        if not is_lfs_pointer:
+            import pypsa
+            return pypsa.Network(path), 'pypsa'
+    except (OSError, ImportError):
+        pass
+    return SyntheticNetwork(size), 'synthetic'
+
+
+def measure(fn, repeat=1):
+    """(résultat, meilleur temps, pic mémoire en octets) ; la mémoire est mesurée à part."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, min(times), peak
+
+
+class Recorder:
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = []
+
+    def run(self, case, benchmark, fn, **extra):
+        out, wall, peak = measure(fn, self.repeat)
+        entry = {'case': case, 'benchmark': benchmark, 'wall_time': wall,
+                 'peak_memory': peak, **extra}
+        self.results.append(entry)
+        print(f"  {benchmark:<28} {wall * 1e3:10.2f} ms  {peak / 2**20:8.2f} MiB")
+        return out, entry
+
+
+def bench_solver(rec, case, grid, tol):
+    """Moteur dict (iterate_qs...), moteur tableau (solver.lanczos) puis KPM."""
+    rec.run(case, 'iterate_qs', grid.iterate_qs)
+    rec.run(case, 'calculate_psi_approx', grid.calculate_psi_approx)
+
+    injections = grid.injection_vector()
+    index, position, H = grid.compiled_hamiltonian()
+    q1 = np.zeros(len(index))
+    for node, p in injections.items():
+        q1[position[node]] = p
+    for precision in ('float64', 'float32'):
+        result, entry = rec.run(
+            case, f'lanczos[{precision}]',
+            lambda: lanczos(H, q1, grid.q_N, total_input=grid._reference_input(),
+                            precision=precision))
+        entry['iterations'] = result['iterations']
+        entry['iterations_to_tol'] = iterations_to_tolerance(result['kappas'], tol)
+        entry['R_eff'] = float(np.sum(result['kappas']**2))
+    r_lanczos = entry['R_eff']
+    result, entry = rec.run(case, 'kpm_effective_resistance',
+                            lambda: grid.kpm_effective_resistance(n_moments=grid.q_N))
+    entry['R_eff'] = result['R_eff']
+    entry['rel_error_vs_lanczos'] = abs(result['R_eff'] / r_lanczos - 1) if r_lanczos else None
+
+
+def bench_line_resistances(rec, case, grid, epsilon):
+    """R_eff de toutes les lignes : estimation par projections, validée contre l'exact."""
+    exact, _ = rec.run(case, 'line_resistances[exact]',
+                       lambda: grid.line_resistances(exact=True))
+    sketch, entry = rec.run(case, f'line_resistances[eps={epsilon}]',
+                            lambda: grid.line_resistances(epsilon=epsilon, seed=0))
+    ref = np.array([exact['R_eff'][line] for line in exact['R_eff']])
+    est = np.array([sketch['R_eff'][line] for line in exact['R_eff']])
+    ok = np.isfinite(ref) & (ref > 0)
+    errors = np.abs(est[ok] / ref[ok] - 1)
+    entry['n_projections'] = sketch['n_projections']
+    entry['exact'] = sketch['exact']
+    entry['max_rel_error'] = float(errors.max()) if len(errors) else 0.0
+    entry['mean_rel_error'] = float(errors.mean()) if len(errors) else 0.0
+    print(f"    k={sketch['n_projections']}  max rel. error {entry['max_rel_error']:.3f}"
+          f" (epsilon {epsilon})")
+
+
+def bench_recycling(rec, case, grid, n_pairs, seed=0):
+    """
+    Suite de paires source/puits aléatoires sur une topologie fixe : itérations
+    de solve_recycled sans déflation puis avec le sous-espace recyclé. La
+    réduction n'est calculée que sur les paires où les deux résolutions ont
+    convergé (hors première paire, qui extrait le sous-espace).
+    """
+    rng = np.random.default_rng(seed)
+    buses = [bus for bus in grid._nodes if bus in grid]
+    ix, ex = grid.ix, grid.ex
+    plain, recycled, converged = [], [], []
+    start = time.perf_counter()
+    for _ in range(n_pairs):
+        source, sink = rng.choice(len(buses), 2, replace=False)
+        grid.set_endpoints(ix=buses[source][2:], ex=buses[sink][2:])
+        grid.solve_recycled(recycle=False)
+        plain.append(grid.recycle_report['iterations'])
+        both = grid.recycle_report['converged']
+        grid.solve_recycled()
+        recycled.append(grid.recycle_report['iterations'])
+        converged.append(both and grid.recycle_report['converged'])
+    grid.set_endpoints(ix=ix, ex=ex)
+    compared = [k for k in range(1, n_pairs) if converged[k]]
+    plain_sum = sum(plain[k] for k in compared)
+    entry = {'case': case, 'benchmark': 'solve_recycled', 'pairs': n_pairs,
+             'wall_time': time.perf_counter() - start, 'peak_memory': None,
+             'iterations_plain': plain, 'iterations_recycled': recycled, 'converged': converged,
+             'iteration_reduction': 1 - sum(recycled[k] for k in compared) / plain_sum if plain_sum else 0.0}
+    rec.results.append(entry)
+    print(f"  {'solve_recycled':<28} {sum(plain)} -> {sum(recycled)} itérations"
+          f" ({entry['iteration_reduction']:.0%} sur {len(compared)} paires convergées"
+          f" hors première)")
+
+
+def bench_decomposition(rec, case, grid, workers, n_parts=8, reference=True):
+    """
+    solve_decomposed par pays puis en partition équilibrée, sur un seul
+    processus puis sur `workers` : accélération et temps par sous-domaine
+    (écart au gradient conjugué si `reference`).
+    """
+    if reference:
+        reference = grid.solve_recycled(tol=1e-12, max_iter=10 * len(grid), recycle=False)
+    for by in ('country', 'balanced'):
+        serial, _ = rec.run(case, f'solve_decomposed[{by}]',
+                            lambda: grid.solve_decomposed(by=by, n_parts=n_parts, parallel=False))
+        _, entry = rec.run(case, f'solve_decomposed[{by},w={workers}]',
+                           lambda: grid.solve_decomposed(by=by, n_parts=n_parts,
+                                                         max_workers=workers))
+        report = grid.decomposition_report
+        serial_time = rec.results[-2]['wall_time']
+        entry['speedup'] = serial_time / entry['wall_time'] if entry['wall_time'] else None
+        entry['workers'] = workers
+        entry['n_subdomains'] = len(report['subdomains'])
+        entry['n_interface'] = report['n_interface']
+        entry['residual'] = report['residual']
+        entry['timings'] = report['timings']
+        entry['subdomain_times'] = {str(sub['label']): sub['factor'] + sub['schur'] + sub['back']
+                                    for sub in report['subdomains']}
+        if reference:
+            entry['max_abs_error_vs_cg'] = max(abs(serial[node] - reference[node])
+                                               for node in reference)
+        print(f"    {entry['n_subdomains']} sous-domaines, interface {entry['n_interface']} bus,"
+              f" accélération x{entry['speedup']:.2f} sur {workers} processus")
+
+
+def synthetic_cables(network, n_cables, min_km=400, seed=0):
+    """Liaisons longues entre bus tirés au hasard (format de submarine_cables.json)."""
+    rng = np.random.default_rng(seed)
+    buses = network.buses
+    lon, lat = np.radians(buses['x'].to_numpy()), np.radians(buses['y'].to_numpy())
+    cables = []
+    while len(cables) < n_cables:
+        i, j = rng.choice(len(buses), 2, replace=False)
+        h = np.sin((lat[j] - lat[i]) / 2)**2 + \
+            np.cos(lat[i]) * np.cos(lat[j]) * np.sin((lon[j] - lon[i]) / 2)**2
+        if 2 * 6371.0 * np.arcsin(np.sqrt(h)) >= min_km:
+            cables.append({'name': f"Cable {len(cables)}", 'from_node': f"N_{buses.index[i]}",
+                           'to_node': f"N_{buses.index[j]}",
+                           'capacity_mw': float(rng.uniform(500, 2000)), 'type': 'HVDC'})
+    return cables
+
+
+def bench_cables(rec, case, network, source, base, tol):
+    """
+    Étape `add_cables` (submarine_cables.json sur les réseaux PyPSA, liaisons
+    longues synthétiques sinon), puis solveur sur le réseau augmenté comparé
+    au réseau de base `base`.
+    """
+    if source == 'pypsa':
+        with open(os.path.join(ROOT, 'submarine_cables.json')) as f:
+            cables = json.load(f)['submarine_cables']
+    else:
+        cables = synthetic_cables(network, max(4, len(network.buses) // 50))
+
+    def build():
+        grid = EuropeanGrid(network, q_N=base.q_N, ix=base.ix, ex=base.ex, real_data=True)
+        return grid.build_from_pypsa(cables=cables)
+    grid, _ = rec.run(case, 'build_from_pypsa+cables', build)
+    print(f"    {len(grid._lines) - len(base._lines)}/{len(cables)} câbles ajoutés")
+
+    timings = {}
+    for label, g in (('base', base), ('cables', grid)):
+        injections = g.injection_vector()
+        index, position, H = g.compiled_hamiltonian()
+        q1 = np.zeros(len(index))
+        for node, p in injections.items():
+            q1[position[node]] = p
+        result, entry = rec.run(case, f'lanczos[{label}]',
+                                lambda: lanczos(H, q1, g.q_N, total_input=g._reference_input()))
+        entry['iterations_to_tol'] = iterations_to_tolerance(result['kappas'], tol)
+        entry['lines'] = len(g._lines)
+        timings[label] = entry
+        _, entry = rec.run(case, f'solve_recycled[{label}]',
+                           lambda: g.solve_recycled(recycle=False))
+        entry['iterations'] = g.recycle_report['iterations']
+    slowdown = timings['cables']['wall_time'] / timings['base']['wall_time']
+    timings['cables']['slowdown_vs_base'] = slowdown
+    print(f"    lanczos x{slowdown:.2f}, itérations jusqu'à tol "
+          f"{timings['base']['iterations_to_tol']} -> {timings['cables']['iterations_to_tol']}")
+
+
+def bench_draw(rec, case, grid):
+    """draw_network complet, rendu compris (backend Agg, PNG en mémoire)."""
+    import io
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    def draw(**kwargs):
+        ax = grid.draw_network(**kwargs)
+        ax.figure.savefig(io.BytesIO(), format='png', dpi=50)
+        plt.close(ax.figure)
+    rec.run(case, 'draw_network', draw)
+    rec.run(case, 'draw_network[max_lines=500]', lambda: draw(max_lines=500))
+
+
+def bench_lattices(rec, sizes, tol):
+    for size in sizes:
+        case = f'lattice_{size}x{size}'
+        print(case)
+
+        def build():
+            grid = HamiltonianGrid(N=size, q_N=2 * size * size, ix=0, iy=0, iw=1,
+                                   ex=size - 1, ey=size - 1, ew=-1)
+            return grid.create_network(size)
+        grid, _ = rec.run(case, 'create_network', build)
+        bench_solver(rec, case, grid, tol)
+
+
+def bench_networks(rec, sizes, tol, epsilon=0.3, n_pairs=10, workers=None):
+    grids = {}
+    for size in sizes:
+        network, source = load_network(size)
+        case = f'elec_s_{size}' if source == 'pypsa' else f'synthetic_{size}'
+        print(case)
+        buses = list(network.buses.index)
+
+        def build():
+            grid = EuropeanGrid(network, q_N=2 * len(buses), ix=buses[0], ex=buses[-1],
+                                real_data=True)
+            return grid.build_from_pypsa()
+        grid, _ = rec.run(case, 'build_from_pypsa', build)
+        bench_solver(rec, case, grid, tol)
+        bench_line_resistances(rec, case, grid, epsilon)
+        bench_recycling(rec, case, grid, n_pairs)
+        bench_decomposition(rec, case, grid, workers or os.cpu_count())
+        bench_cables(rec, case, network, source, grid, tol)
+        bench_draw(rec, case, grid)
+        grids[case] = grid
+    return grids
+
+
+def bench_scale(rec, sizes, workers, q_N=400, n_parts=32):
+    """
+    Réseaux synthétiques au-delà de 1024 bus : génération, construction de
+    EuropeanGrid, H compilée, Lanczos à q_N fixé et décomposition de domaine.
+    """
+    for size in sizes:
+        case = f'synthetic_{size}'
+        print(case)
+        network, entry = rec.run(case, 'generate', lambda: SyntheticNetwork(size))
+        entry.update({key: value for key, value in network.summary().items()
+                      if key in ('buses', 'lines', 'countries')})
+        buses = network.buses.index
+
+        def build():
+            grid = EuropeanGrid(network, q_N=q_N, ix=buses[0], ex=buses[-1], real_data=True)
+            return grid.build_from_pypsa()
+        grid, _ = rec.run(case, 'build_from_pypsa', build)
+
+        def compile_hamiltonian():
+            grid._compiled = None
+            return grid.compiled_hamiltonian()
+        rec.run(case, 'compiled_hamiltonian', compile_hamiltonian)
+        index, position, H = grid.compiled_hamiltonian()
+        q1 = np.zeros(len(index))
+        for node, p in grid.injection_vector().items():
+            q1[position[node]] = p
+        result, entry = rec.run(case, f'lanczos[q_N={q_N}]',
+                                lambda: lanczos(H, q1, q_N, total_input=grid._reference_input(),
+                                                store_snapshots=False))
+        entry['iterations'] = result['iterations']
+        bench_decomposition(rec, case, grid, workers, n_parts=n_parts, reference=False)
+
+
+def bench_web(rec, case, grid):
+    """Handlers Flask via le client de test, sur une grille déjà construite."""
+    try:
+        sys.path.insert(0, os.path.join(ROOT, 'web_client'))
+        import app as web_app
+    except ImportError as e:
+        print(f"  web handlers skipped ({e})")
+        return
+    web_app.grid_state['grid'] = grid
+    web_app.grid_state['bus_in'] = grid.ix
+    web_app.grid_state['bus_out'] = grid.ex
+    client = web_app.app.test_client()
+    print(f"{case} (web)")
+    rec.run(case, 'web:/api/simulate', lambda: client.post('/api/simulate'))
+    rec.run(case, 'web:get_graph_data', web_app.get_graph_data)
+    rec.run(case, 'web:/api/get_lines', lambda: client.get('/api/get_lines'))
+    rec.run(case, 'web:/api/simulation_stats', lambda: client.get('/api/simulation_stats'))
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    old = {(r['case'], r['benchmark']): r for r in baseline['results']}
+    print(f"\nComparaison avec {baseline_path} ({baseline['meta'].get('commit')})")
+    for r in results:
+        ref = old.get((r['case'], r['benchmark']))
+        if ref:
+            ratio = r['wall_time'] / ref['wall_time'] if ref['wall_time'] else float('nan')
+            print(f"  {r['case']:<18} {r['benchmark']:<28} x{ratio:6.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--lattice-sizes', type=int, nargs='*', default=[10, 20, 30])
+    parser.add_argument('--network-sizes', type=int, nargs='*', default=[128, 512, 1024],
+                        choices=sorted(NETWORKS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--tol', type=float, default=1e-6,
+                        help="tolérance relative sur R_eff pour iterations_to_tol")
+    parser.add_argument('--epsilon', type=float, default=0.3,
+                        help="erreur visée pour line_resistances (projections aléatoires)")
+    parser.add_argument('--pairs', type=int, default=10,
+                        help="paires source/puits aléatoires pour solve_recycled")
+    parser.add_argument('--synthetic-sizes', type=int, nargs='*', default=[],
+                        help="réseaux synthétiques de grande taille (ex. 10000 100000 1000000)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="processus pour solve_decomposed")
+    parser.add_argument('--no-web', action='store_true')
+    parser.add_argument('--quick', action='store_true', help="petites tailles, une répétition")
+    parser.add_argument('--output', help="fichier JSON des résultats")
+    parser.add_argument('--compare', help="JSON d'une exécution précédente")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.lattice_sizes, args.network_sizes, args.repeat = [10], [128], 1
+
+    rec = Recorder(args.repeat)
+    bench_lattices(rec, args.lattice_sizes, args.tol)
+    grids = bench_networks(rec, args.network_sizes, args.tol, args.epsilon, args.pairs,
+                           args.workers)
+    bench_scale(rec, args.synthetic_sizes, args.workers)
+    if grids and not args.no_web:
+        case, grid = next(iter(grids.items()))
+        bench_web(rec, case, grid)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'tol': args.tol,
+            'epsilon': args.epsilon,
+        },
+        'results': rec.results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+        print(f"\nRésultats écrits dans {args.output}")
+    if args.compare:
+        compare(rec.results, args.compare)
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Points de reprise des itérations de Lanczos.
+
+Seul l'état minimal de la récurrence est écrit : les deux derniers vecteurs q
+(creux), les β, les κ et l'accumulateur de ψ. Le fichier est un .npz non
+compressé sans pickle, remplacé atomiquement (écriture dans un fichier
+temporaire puis `os.replace`), si bien qu'un arrêt pendant l'écriture laisse
+le point de reprise précédent intact. `CheckpointMixin._iterate` est la boucle
+de `iterate_qs` des grilles qui les écrit et les relit.
+"""
+
+import json
+import os
+
+import numpy as np
+
+import instrumentation
+
+
+def _sparse(vector):
+    return np.array(list(vector), dtype=str), np.fromiter(vector.values(), dtype=float,
+                                                          count=len(vector))
+
+
+def save(path, meta, iteration, betas, kappas, q_prev, q_curr, psi):
+    """
+    Écrit l'état après l'itération `iteration` (q_prev = q_{i-1}, q_curr = q_i,
+    dicts node -> valeur ; psi : accumulateur Σ κ q_2k pour 2k <= i).
+
+    Returns:
+        taille du fichier en octets
+    """
+    arrays = {'meta': np.array(json.dumps(meta, sort_keys=True)),
+              'iteration': np.array(iteration),
+              'betas': np.asarray(betas[:iteration], dtype=float),
+              'kappas': np.asarray(kappas, dtype=float)}
+    for name, vector in (('q_prev', q_prev), ('q_curr', q_curr), ('psi', psi)):
+        arrays[f'{name}_nodes'], arrays[f'{name}_values'] = _sparse(vector)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def load(path):
+    """État écrit par `save` : dict avec 'meta', 'iteration', 'betas', 'kappas', 'q_prev', 'q_curr', 'psi'."""
+    with np.load(path, allow_pickle=False) as data:
+        state = {'meta': json.loads(str(data['meta'])),
+                 'iteration': int(data['iteration']),
+                 'betas': data['betas'].copy(),
+                 'kappas': data['kappas'].copy()}
+        for name in ('q_prev', 'q_curr', 'psi'):
+            state[name] = dict(zip(data[f'{name}_nodes'].tolist(),
+                                   data[f'{name}_values'].tolist()))
+    return state
+
+
+class CheckpointMixin:
+    """Boucle d'itérations des grilles, avec points de reprise optionnels."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._psi_seed = {}  # entier -> ψ
+
+    def _checkpoint_meta(self):
+        injections = sorted([str(node), float(p)] for node, p in self.injection_vector().items())
+        return {'grid': type(self).__name__, 'q_N': self.q_N,
+                'topology': self.topology_signature(), 'injections': injections}
+
+    def _iterate(self, checkpoint_path=None, checkpoint_every=50, resume=True):
+        """
+        Boucle de `iterate_qs`. Avec un fichier de reprise, κ et ψ sont
+        accumulés au fil des itérations et l'état minimal est écrit toutes les
+        `checkpoint_every` itérations (et à la fin). Une reprise ne recharge que
+        les deux derniers q : les snapshots antérieurs restent vides et leur
+        contribution à ψ est portée par `_psi_seed`.
+        """
+        self._psi_seed = {}
+        if checkpoint_path is None:
+            for i in range(1, self.q_N + 1):
+                self.betas[i-1] = self.calculate_q_i(i)
+            return 1
+        if checkpoint_every < 2:
+            raise ValueError("checkpoint_every must be at least 2")
+
+        meta = self._checkpoint_meta()
+        P = self._reference_input()
+        start, kappas, psi = 1, [], {}
+        if resume and os.path.exists(checkpoint_path):
+            state = load(checkpoint_path)
+            if state['meta'] != meta:
+                raise ValueError(f"Checkpoint {checkpoint_path} was written for another "
+                                 "topology, injection or q_N")
+            done = state['iteration']
+            self._id_adjacency()
+            ids = self.node_ids
+            self.betas[:done] = state['betas']
+            for k in range(done - 2):
+                self.q_snapshots[k] = {}
+            self.q_snapshots[done - 2] = ids.interned(state['q_prev'])
+            self.q_snapshots[done - 1] = ids.interned(state['q_curr'])
+            kappas, psi = list(state['kappas']), ids.interned(state['psi'])
+            start = done + 1
+
+        for i in range(start, self.q_N + 1):
+            self.betas[i-1] = self.calculate_q_i(i)
+            if i % 2 == 0:
+                kappa = P / self.betas[1] if i == 2 else -kappas[-1] * self.betas[i-2] / self.betas[i-1]
+                kappas.append(kappa)
+                for node, value in self.q_snapshots[i-1].items():
+                    psi[node] = psi.get(node, 0.0) + kappa * value
+            if i >= 2 and (i % checkpoint_every == 0 or i == self.q_N):
+                with instrumentation.phase('checkpoint'):
+                    named = self.node_ids.named
+                    size = save(checkpoint_path, meta, i, self.betas, kappas,
+                                named(self.q_snapshots[i-2]),
+                                named(self.q_snapshots[i-1]), named(psi))
+                instrumentation.gauge('checkpoint_bytes', size)
+
+        # Contribution à ψ des snapshots vidés par la reprise
+        if start > 1:
+            seed = dict(psi)
+            for j in range(start - 2, self.q_N + 1):
+                if j % 2 == 0:
+                    for node, value in self.q_snapshots[j-1].items():
+                        seed[node] -= kappas[j // 2 - 1] * value
+            self._psi_seed = seed
+        return start
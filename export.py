@@ -0,0 +1,229 @@
+"""
+Export en flux des grilles : topologie écrite une fois, puis un vecteur de
+poids par itération (ψ partiel, q_i...), écrit au fil de l'eau.
+
+Deux formats :
+
+    run.jsonl[.gz]       JSON-lines : une ligne 'topology', puis une ligne
+                         'frame' par itération ({"iteration", "field", "values"})
+    run.json[.gz]        topologie seule, et à côté
+    run.frames[.gz]      enregistrements binaires (itération int32, valeurs
+                         float32/float64 sur l'axe des nœuds), lisibles par
+                         np.memmap quand le fichier n'est pas compressé
+
+La mémoire de l'écrivain ne dépend pas du nombre d'itérations exportées : un
+seul vecteur est formaté à la fois. En JSON-lines, les valeurs non finies
+(NaN, ±inf) sont écrites null et relues NaN. Les poids sont rangés selon l'axe
+`nodes` de la topologie (positions en pixels, comme `save_graph_json`).
+`ExportMixin.export_iterations` en est le point d'entrée côté grille.
+"""
+
+import gzip
+import json
+import math
+import os
+
+import numpy as np
+
+FORMATS = ('jsonl', 'binary')
+
+
+def _open(path, mode, compress):
+    return gzip.open(path, mode, compresslevel=6) if compress else open(path, mode)
+
+
+def _is_gzip(path):
+    with open(path, 'rb') as f:
+        return f.read(2) == b'\x1f\x8b'
+
+
+def endpoint_nodes(grid):
+    """
+    Nœuds source et puits de la grille, résolus par sa table de noms : un id
+    déjà préfixé ('N_DE1 0') reste tel quel (coordonnées r_c pour la grille carrée).
+    """
+    if getattr(grid, 'iy', None) is None:
+        return [grid._bus_node(grid.ix), grid._bus_node(grid.ex)]
+    return [grid._bus_node(f"{grid.ix}_{grid.iy}"), grid._bus_node(f"{grid.ex}_{grid.ey}")]
+
+
+def topology_record(grid):
+    """Topologie compacte : nœuds (id, type, position, bus spécial) et arêtes signées par indices."""
+    nodes = list(grid.nodes)
+    position = {node: k for k, node in enumerate(nodes)}
+    specials = set(endpoint_nodes(grid))
+    records = []
+    for node, data in grid.nodes(data=True):
+        pos = data.get('pos') or (0.0, 0.0)
+        records.append({'id': str(node), 'type': data.get('type'),
+                        'x': float(pos[0] * 1000), 'y': float(pos[1] * 1000),
+                        'special': node in specials})
+    edges = [[position[u], position[v], float(sign)]
+             for u, v, sign in grid.edges(data='sign', default=1)]
+    return {'type': 'topology', 'grid': type(grid).__name__,
+            'topology': grid.topology_signature(), 'nodes': records, 'edges': edges}
+
+
+class GraphStream:
+    """
+    Écrivain en flux : `write_frame` ajoute un vecteur (tableau sur l'axe des
+    nœuds, ou dict node -> valeur) ; le fichier est complet à `close()`.
+    """
+
+    def __init__(self, path, grid, fmt='jsonl', compress=None, dtype='float32', field='psi'):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format {fmt!r} (expected one of {FORMATS})")
+        self.path = path
+        self.fmt = fmt
+        self.compress = path.endswith('.gz') if compress is None else compress
+        self.dtype = np.dtype(dtype)
+        self.field = field
+        self.nodes = list(grid.nodes)
+        self.position = {node: k for k, node in enumerate(self.nodes)}
+        self.frames = 0
+        self._format = '{:.7g}' if self.dtype == np.float32 else '{!r}'
+        topology = topology_record(grid)
+        if fmt == 'jsonl':
+            self._file = _open(path, 'wt', self.compress)
+            self._file.write(json.dumps(topology) + '\n')
+        else:
+            base = path[:-3] if path.endswith('.gz') else path
+            base = os.path.splitext(base)[0]
+            self.sidecar = base + ('.frames.gz' if self.compress else '.frames')
+            self.record = np.dtype([('iteration', '<i4'),
+                                    ('values', self.dtype.newbyteorder('<'), (len(self.nodes),))])
+            topology['frames'] = {'file': os.path.basename(self.sidecar), 'field': field,
+                                  'dtype': self.dtype.name, 'n': len(self.nodes)}
+            with _open(path, 'wt', self.compress) as f:
+                json.dump(topology, f)
+            self._file = _open(self.sidecar, 'wb', self.compress)
+            self._row = np.zeros(1, dtype=self.record)
+
+    def _dense(self, values):
+        if isinstance(values, dict):
+            row = np.zeros(len(self.nodes))
+            for node, value in values.items():
+                k = self.position.get(node)
+                if k is not None:
+                    row[k] = value
+            return row
+        return np.asarray(values, dtype=float)
+
+    def write_frame(self, iteration, values, field=None):
+        """Vecteur de l'itération `iteration` ; en binaire, un seul champ par flux."""
+        field = field or self.field
+        values = self._dense(values)
+        if self.fmt == 'jsonl':
+            self._file.write(f'{{"type": "frame", "iteration": {int(iteration)}, '
+                             f'"field": {json.dumps(field)}, "values": [')
+            values = values.astype(self.dtype)
+            if np.isfinite(values).all():
+                text = map(self._format.format, values.tolist())
+            else:
+                # NaN et ±inf ne sont pas du JSON : null, relu comme NaN par read_stream
+                text = (self._format.format(value) if math.isfinite(value) else 'null'
+                        for value in values.tolist())
+            self._file.write(','.join(text))
+            self._file.write(']}\n')
+        else:
+            if field != self.field:
+                raise ValueError(f"Binary stream holds {self.field!r} frames only")
+            self._row['iteration'] = iteration
+            self._row['values'][0] = values
+            self._file.write(self._row.tobytes())
+        self.frames += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class ExportMixin:
+    """Export en flux des itérations de Lanczos d'une grille."""
+
+    def export_iterations(self, path, field='psi', fmt='jsonl', compress=None, every=1,
+                          dtype='float32'):
+        """
+        Exporte en flux la topologie puis, toutes les `every` itérations de
+        Lanczos, ψ partiel ('psi', Σ κ q_2k jusqu'à l'itération) ou le vecteur
+        q_i ('q') ; les snapshots ne sont pas conservés, la mémoire ne dépend
+        pas de q_N.
+
+        Args:
+            path: fichier .jsonl (JSON-lines) ou .json (topologie) + sidecar
+                  .frames pour fmt='binary' ; suffixe .gz : flux gzip
+            dtype: précision des valeurs écrites
+
+        Returns:
+            nombre de vecteurs écrits
+        """
+        from solver import lanczos
+
+        if field not in ('psi', 'q'):
+            raise ValueError(f"Unknown field {field!r} (expected 'psi' or 'q')")
+        injections = self.injection_vector()
+        index, position, H = self.compiled_hamiltonian()
+        q1 = np.zeros(len(index))
+        for node, p in injections.items():
+            q1[position[node]] = p
+
+        # axe du flux : self.nodes (H peut venir d'un cache partagé, dans un autre ordre)
+        order = np.fromiter((position[node] for node in self.nodes), dtype=np.int64,
+                            count=len(index))
+        with GraphStream(path, self, fmt=fmt, compress=compress, dtype=dtype,
+                         field=field) as stream:
+            def write(i, q, psi):
+                if field == 'q':
+                    if i % every == 0 or i == 1:
+                        stream.write_frame(i, q[order])
+                elif i % 2 == 0 and (i // 2) % every == 0:
+                    stream.write_frame(i, psi[order])
+            lanczos(H, q1, self.q_N, total_input=self._reference_input(),
+                    store_snapshots=False, callback=write)
+        return stream.frames
+
+
+def read_stream(path, mmap=True):
+    """
+    Relit un export : (topologie, itérateur de (itération, champ, valeurs)).
+    Un fichier binaire non compressé est projeté en mémoire.
+    """
+    compress = _is_gzip(path)
+    with _open(path, 'rt', compress) as f:
+        topology = json.loads(f.readline())
+    if 'frames' not in topology:
+        def frames():
+            with _open(path, 'rt', compress) as f:
+                next(f)
+                for line in f:
+                    frame = json.loads(line)
+                    yield (frame['iteration'], frame['field'],
+                           np.array(frame['values'], dtype=float))
+        return topology, frames()
+
+    info = topology['frames']
+    sidecar = os.path.join(os.path.dirname(path), info['file'])
+    record = np.dtype([('iteration', '<i4'),
+                       ('values', np.dtype(info['dtype']).newbyteorder('<'), (info['n'],))])
+
+    def frames():
+        compressed = _is_gzip(sidecar)
+        if mmap and not compressed:
+            data = np.memmap(sidecar, dtype=record, mode='r') if os.path.getsize(sidecar) else []
+            for row in data:
+                yield int(row['iteration']), info['field'], row['values']
+            return
+        with _open(sidecar, 'rb', compressed) as f:
+            while True:
+                chunk = f.read(record.itemsize)
+                if len(chunk) < record.itemsize:
+                    return
+                row = np.frombuffer(chunk, dtype=record)[0]
+                yield int(row['iteration']), info['field'], row['values']
+    return topology, frames()
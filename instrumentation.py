@@ -0,0 +1,204 @@
+"""
+Instrumentation légère des phases de calcul.
+
+Désactivée par défaut : une fonction décorée par `instrumented` ne coûte alors
+qu'un test sur une variable de thread et une variable globale. Une fois
+activée (`enable` pour tout le processus, ou le gestionnaire de contexte
+`collect` pour le thread courant), chaque phase enregistre sa durée et le
+nombre net de blocs mémoire alloués, et le noyau y ajoute le nombre
+d'itérations de Lanczos et la mémoire des snapshots.
+
+Un serveur multi-thread collecte chaque requête dans son propre `Metrics`
+(`collect` dans le thread de la requête) puis le fusionne (`merge`) dans
+l'objet du processus : les mesures de deux requêtes simultanées ne se
+mélangent pas.
+
+    with collect() as metrics:
+        grid.iterate_qs()
+        grid.calculate_psi_approx()
+    print(metrics.to_dict())
+"""
+
+import functools
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+_active = None
+_local = threading.local()  # .metrics : collecte propre au thread (voir collect)
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.phases = {}  # nom -> {'calls', 'total', 'last', 'max', 'allocated_blocks'}
+            self.counters = {}
+            self.gauges = {}
+
+    def record(self, phase, seconds, allocated_blocks=0):
+        with self._lock:
+            stats = self.phases.get(phase)
+            if stats is None:
+                stats = self.phases[phase] = {'calls': 0, 'total': 0.0, 'last': 0.0,
+                                              'max': 0.0, 'allocated_blocks': 0}
+            stats['calls'] += 1
+            stats['total'] += seconds
+            stats['last'] = seconds
+            stats['max'] = max(stats['max'], seconds)
+            stats['allocated_blocks'] = allocated_blocks
+
+    def merge(self, other):
+        """Ajoute les mesures de `other` (une requête, un processus) à celles-ci."""
+        data = other.to_dict()
+        with self._lock:
+            for phase, incoming in data['phases'].items():
+                stats = self.phases.get(phase)
+                if stats is None:
+                    self.phases[phase] = incoming
+                    continue
+                stats['calls'] += incoming['calls']
+                stats['total'] += incoming['total']
+                stats['last'] = incoming['last']
+                stats['max'] = max(stats['max'], incoming['max'])
+                stats['allocated_blocks'] = incoming['allocated_blocks']
+            for name, value in data['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            self.gauges.update(data['gauges'])
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    def lanczos_rate(self):
+        """Itérations de Lanczos par seconde, sur l'ensemble des phases instrumentées."""
+        seconds = sum(self.phases[p]['total'] for p in ('iterate_qs', 'lanczos') if p in self.phases)
+        iterations = self.counters.get('lanczos_iterations', 0)
+        return iterations / seconds if seconds else 0.0
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'phases': {name: dict(stats) for name, stats in self.phases.items()},
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+                'lanczos_iterations_per_second': self.lanczos_rate(),
+            }
+
+    def to_prometheus(self, prefix='grid'):
+        """Format texte d'exposition Prometheus (version 0.0.4)."""
+        data = self.to_dict()
+        out = []
+
+        def family(name, kind, help_text, samples):
+            out.append(f"# HELP {prefix}_{name} {help_text}")
+            out.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                out.append(f"{prefix}_{name}{labels} {value}")
+
+        phases = sorted(data['phases'].items())
+        family('phase_seconds_total', 'counter', 'Cumulative time spent per phase.',
+               [(f'{{phase="{p}"}}', s['total']) for p, s in phases])
+        family('phase_calls_total', 'counter', 'Number of calls per phase.',
+               [(f'{{phase="{p}"}}', s['calls']) for p, s in phases])
+        family('phase_last_seconds', 'gauge', 'Duration of the last call per phase.',
+               [(f'{{phase="{p}"}}', s['last']) for p, s in phases])
+        family('phase_allocated_blocks', 'gauge', 'Net memory blocks allocated by the last call.',
+               [(f'{{phase="{p}"}}', s['allocated_blocks']) for p, s in phases])
+        for name, value in sorted(data['counters'].items()):
+            family(f'{name}_total', 'counter', f'{name} counter.', [('', value)])
+        for name, value in sorted(data['gauges'].items()):
+            family(name, 'gauge', f'{name} gauge.', [('', value)])
+        family('lanczos_iterations_per_second', 'gauge', 'Lanczos iteration rate.',
+               [('', data['lanczos_iterations_per_second'])])
+        return '\n'.join(out) + '\n'
+
+
+def enable(metrics=None):
+    """Active la collecte (dans `metrics`, ou un nouvel objet) et le renvoie."""
+    global _active
+    _active = metrics if metrics is not None else Metrics()
+    return _active
+
+
+def disable():
+    global _active
+    _active = None
+
+
+def _current():
+    """Collecte du thread courant, sinon celle du processus (None si désactivée)."""
+    metrics = getattr(_local, 'metrics', None)
+    return _active if metrics is None else metrics
+
+
+def enabled():
+    return _current() is not None
+
+
+@contextmanager
+def collect(metrics=None):
+    """
+    Active la collecte le temps d'un bloc `with`, pour le thread courant
+    seulement (utilisable dans le notebook, ou par requête dans un serveur).
+    """
+    previous = getattr(_local, 'metrics', None)
+    _local.metrics = metrics if metrics is not None else Metrics()
+    try:
+        yield _local.metrics
+    finally:
+        _local.metrics = previous
+
+
+@contextmanager
+def phase(name):
+    """Chronomètre un bloc de code quelconque (ex. chargement pypsa)."""
+    metrics = _current()
+    if metrics is None:
+        yield
+        return
+    blocks = sys.getallocatedblocks()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.record(name, time.perf_counter() - start, sys.getallocatedblocks() - blocks)
+
+
+def instrumented(name):
+    """Décorateur : chronomètre la fonction quand la collecte est active."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            metrics = _current()
+            if metrics is None:
+                return fn(*args, **kwargs)
+            blocks = sys.getallocatedblocks()
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.record(name, time.perf_counter() - start,
+                               sys.getallocatedblocks() - blocks)
+        return wrapper
+    return decorator
+
+
+def count(name, value=1):
+    metrics = _current()
+    if metrics is not None:
+        metrics.count(name, value)
+
+
+def gauge(name, value):
+    metrics = _current()
+    if metrics is not None:
+        metrics.gauge(name, value)
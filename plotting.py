@@ -0,0 +1,120 @@
+"""
+Couche d'affichage et d'export des grilles (matplotlib, JSON Cytoscape).
+
+Séparée du noyau numérique (utils.py, solver.py, topology.py) : importer
+utils ne charge ni matplotlib ni l'export JSON de networkx. Les méthodes
+`draw_network` / `save_graph_json` des grilles importent ce module à la
+première utilisation.
+"""
+
+import json
+
+import matplotlib.pyplot as plt
+import numpy as np
+from networkx.readwrite import json_graph
+
+from export import endpoint_nodes
+
+
+def _layout(grid, specials, max_lines=None):
+    """
+    Tableaux de tracé : nœuds (positions, |poids|), segments des arêtes et
+    nœuds spéciaux (source/puits). Avec `max_lines`, seules les `max_lines`
+    lignes de plus fort |poids| sont gardées comme marqueurs ; les arêtes
+    sont toutes tracées.
+    """
+    nodes = list(grid.nodes)
+    position = {node: k for k, node in enumerate(nodes)}
+    xy = np.array([grid.pos[node] for node in nodes], dtype=float).reshape(-1, 2)
+    weights = np.abs(np.fromiter((data.get('weight', 0.0) or 0.0
+                                  for _, data in grid.nodes(data=True)),
+                                 dtype=float, count=len(nodes)))
+    edges = np.array([(position[u], position[v]) for u, v in grid.edges],
+                     dtype=np.int64).reshape(-1, 2)
+    segments = xy[edges]
+
+    keep = np.ones(len(nodes), dtype=bool)
+    if max_lines is not None:
+        is_line = np.fromiter((data.get('type') == 'line' for _, data in grid.nodes(data=True)),
+                              dtype=bool, count=len(nodes))
+        lines = np.flatnonzero(is_line)
+        if len(lines) > max_lines:
+            dropped = lines[np.argsort(-weights[lines], kind='stable')[max_lines:]]
+            keep[dropped] = False
+    special = np.array([position[node] for node in specials if node in position],
+                       dtype=np.int64)
+    return nodes, xy, weights, segments, keep, special
+
+
+def _draw(grid, specials, special_weight, label, with_labels, ax, node_size, figsize,
+          font_color, max_lines):
+    """
+    Tracé en une collection par type d'élément : arêtes (LineCollection),
+    nœuds (scatter) ; les étiquettes ne sont formatées que si demandées.
+    """
+    from matplotlib.collections import LineCollection
+
+    if ax is None:
+        _, ax = plt.subplots(1, 1, figsize=figsize)
+    nodes, xy, weights, segments, keep, special = _layout(grid, specials, max_lines)
+    sizes = np.full(len(nodes), float(node_size))
+    colors = weights.copy()
+    sizes[special] *= 3
+    colors[special] = special_weight(weights)
+
+    ax.add_collection(LineCollection(segments, colors='k', linewidths=1.0, zorder=1))
+    ax.scatter(xy[keep, 0], xy[keep, 1], s=sizes[keep], c=colors[keep],
+               cmap=plt.cm.viridis, zorder=2)
+    if with_labels:
+        prefixes = dict(zip(special.tolist(), ('Ins: ', 'Ext: ')))
+        for k in np.flatnonzero(keep):
+            ax.text(xy[k, 0], xy[k, 1], prefixes.get(k, '') + label(nodes[k]),
+                    fontsize=8, color=font_color, family='sans-serif', weight='bold',
+                    ha='center', va='center', zorder=3)
+    ax.autoscale_view()
+    ax.set_axis_off()
+    return ax
+
+
+def draw_hamiltonian_grid(grid, with_labels=False, ax=None, node_size=600, figsize=(18, 10),
+                          max_lines=None):
+    def label(node):
+        w = grid.nodes[node]["weight"]
+        return f"{node}\n({w:.2f})" if abs(w) > 0 else "0"   # Affiche Nom et Poids
+
+    return _draw(grid, endpoint_nodes(grid),
+                 lambda weights: weights.max(initial=0) or 1, label, with_labels, ax,
+                 node_size, figsize, "black", max_lines)
+
+
+def draw_european_grid(grid, with_labels=False, ax=None, node_size=600, figsize=(18, 10),
+                       max_lines=None):
+    def label(node):
+        w = round(grid.nodes[node]["weight"], 2)
+        return f"{w}" if abs(w) > 0 else "0"
+
+    return _draw(grid, endpoint_nodes(grid), lambda weights: 1, label,
+                 with_labels, ax, node_size, figsize, "white", max_lines)
+
+
+def save_graph_json(grid, filename="graph_data.json"):
+    """Export Cytoscape du graphe (positions en pixels, bus d'entrée/sortie marqués)."""
+    data = json_graph.cytoscape_data(grid)
+    specials = set(endpoint_nodes(grid))
+
+    for node in data['elements']['nodes']:
+        pos = node["data"]['pos']
+        node['position'] = {
+            # On multiplie souvent car Cyto utilise une échelle pixel
+            'x': float(pos[0] * 1000),
+            'y': float(pos[1] * 1000)
+        }
+
+        node['data']['special'] = False
+        if node["data"]["name"] in specials:
+            node['data']['special'] = True
+
+        del node['data']['pos']
+
+    with open(filename, "w") as f:
+        json.dump(data, f)
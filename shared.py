@@ -0,0 +1,222 @@
+"""
+Cache partagé entre processus (workers d'un serveur web, pool de calcul).
+
+Les tableaux coûteux — matrice H compilée, facteurs de report (LODF), ψ / β / κ
+de référence — sont publiés une fois dans un répertoire, puis projetés en
+mémoire en lecture seule (np.load(mmap_mode='r')) par chaque processus. Sous
+/dev/shm (défaut), les pages sont en mémoire partagée : ajouter un processus
+n'ajoute pas de copie.
+
+    <racine>/
+      <clé>/                 une entrée : un .npy par tableau
+      state.json             état commun optionnel (scénario), versionné
+
+Une entrée est écrite dans un répertoire temporaire puis renommée : elle
+apparaît complète ou pas du tout. Si deux processus la calculent en même
+temps, le premier renommage gagne et l'autre se rattache à son résultat.
+Les clés dérivent de `topology_signature()` : une entrée ne devient jamais
+fausse, seulement inutilisée. `SharedMixin.share_caches` branche une grille
+sur un cache.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+
+def default_root():
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(base, 'grid-cache')
+
+
+def cache_key(kind, *parts):
+    """Clé d'entrée : type lisible + empreinte des paramètres."""
+    digest = hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode())
+    return f"{kind}-{digest.hexdigest()[:20]}"
+
+
+class SharedCache:
+    def __init__(self, root=None):
+        self.root = root or default_root()
+        os.makedirs(self.root, exist_ok=True)
+        self._attached = {}
+
+    def get(self, key):
+        """Tableaux de l'entrée `key` (projetés en lecture seule), None si absente."""
+        if key in self._attached:
+            return self._attached[key]
+        directory = os.path.join(self.root, key)
+        if not os.path.isdir(directory):
+            return None
+        arrays = {}
+        for filename in os.listdir(directory):
+            name, ext = os.path.splitext(filename)
+            if ext == '.npy':
+                arrays[name] = np.load(os.path.join(directory, filename), mmap_mode='r',
+                                       allow_pickle=False)
+        self._attached[key] = arrays
+        return arrays
+
+    def publish(self, key, arrays):
+        """Écrit l'entrée si elle n'existe pas encore ; renvoie la version projetée."""
+        target = os.path.join(self.root, key)
+        if not os.path.isdir(target):
+            tmp = tempfile.mkdtemp(prefix='.tmp-', dir=self.root)
+            try:
+                for name, values in arrays.items():
+                    values = np.asarray(values)
+                    if values.dtype == object:
+                        values = values.astype(str)
+                    np.save(os.path.join(tmp, f"{name}.npy"), values, allow_pickle=False)
+                os.rename(tmp, target)
+            except OSError:
+                # un autre processus a publié la même entrée entre-temps
+                shutil.rmtree(tmp, ignore_errors=True)
+                if not os.path.isdir(target):
+                    raise
+        return self.get(key)
+
+    def get_or_create(self, key, build):
+        """Entrée `key`, calculée par `build()` (dict nom -> tableau) si absente."""
+        arrays = self.get(key)
+        return arrays if arrays is not None else self.publish(key, build())
+
+    def keys(self):
+        return sorted(name for name in os.listdir(self.root)
+                      if not name.startswith('.') and os.path.isdir(os.path.join(self.root, name)))
+
+    def nbytes(self):
+        """Taille totale des entrées publiées."""
+        return sum(os.path.getsize(os.path.join(self.root, key, filename))
+                   for key in self.keys() for filename in os.listdir(os.path.join(self.root, key)))
+
+    def clear(self):
+        self._attached = {}
+        for key in self.keys():
+            shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+
+    # --- État commun (petit document JSON versionné) ---
+
+    @property
+    def _state_path(self):
+        return os.path.join(self.root, 'state.json')
+
+    def read_state(self):
+        """État commun ({'version': n, ...}), None s'il n'a jamais été écrit."""
+        try:
+            with open(self._state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def update_state(self, changes):
+        """
+        Applique `changes` à l'état commun sous verrou et incrémente sa version.
+
+        Returns:
+            le nouvel état
+        """
+        with open(os.path.join(self.root, 'state.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            state = self.read_state() or {'version': 0}
+            state.update(changes)
+            state['version'] += 1
+            tmp = f"{self._state_path}.{os.getpid()}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp, self._state_path)
+        return state
+
+
+class SharedMixin:
+    """Caches d'une grille (H, facteurs de report, référence) placés dans un SharedCache."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._shared = None  # SharedCache, voir share_caches
+
+    def share_caches(self, cache):
+        """
+        Place H compilée, les facteurs de report et les ψ de référence dans un
+        `SharedCache` (projeté en mémoire par tous les processus qui
+        l'utilisent) au lieu de la mémoire du processus ; None pour revenir
+        aux caches locaux. Les entrées sont indexées par `topology_signature()`.
+        """
+        self._shared = cache
+        # les caches locaux sont repris du cache partagé (ou y sont publiés)
+        self._compiled = None
+        self._outage_factors = None
+        return self
+
+    def _build_hamiltonian(self):
+        """(index, H) depuis le cache partagé ; H pointe sur les tableaux projetés, sans copie."""
+        import scipy.sparse as sp
+
+        if self._shared is None:
+            return super()._build_hamiltonian()
+
+        def build():
+            index, H = super(SharedMixin, self)._build_hamiltonian()
+            return {'index': np.array(index, dtype=str), 'data': H.data, 'indices': H.indices,
+                    'indptr': H.indptr, 'shape': np.array(H.shape)}
+        arrays = self._shared.get_or_create(cache_key('hamiltonian', self.topology_signature()),
+                                            build)
+        H = sp.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']),
+                          shape=tuple(arrays['shape']), copy=False)
+        # forme canonique (issue de compile_hamiltonian) : aucun tri en place sur la projection
+        H.has_sorted_indices = True
+        H.has_canonical_format = True
+        return arrays['index'].tolist(), H
+
+    def shared_baseline(self):
+        """
+        ψ, β et κ de référence (solver.lanczos) pour la topologie, les
+        injections et q_N courants ; avec `share_caches`, calculés une fois
+        pour tous les processus.
+
+        Returns:
+            dict avec 'psi' (dict node_id -> ψ), 'betas', 'kappas'
+        """
+        from solver import lanczos
+
+        def build():
+            index, position, H = self.compiled_hamiltonian()
+            q1 = np.zeros(len(index))
+            for node, p in self.injection_vector().items():
+                q1[position[node]] = p
+            result = lanczos(H, q1, self.q_N, total_input=self._reference_input(),
+                             store_snapshots=False)
+            return {'index': np.array(index, dtype=str), 'psi': result['psi'],
+                    'betas': result['betas'], 'kappas': result['kappas']}
+        if self._shared is None:
+            arrays = build()
+        else:
+            arrays = self._shared.get_or_create(cache_key('baseline', self._checkpoint_meta()),
+                                                build)
+        return {'psi': dict(zip(arrays['index'].tolist(), arrays['psi'].tolist())),
+                'betas': np.asarray(arrays['betas']), 'kappas': np.asarray(arrays['kappas'])}
+
+    def _attach_outage_factors(self, signature, axis, bridges, cache):
+        """Remplit `cache` depuis la matrice partagée de toutes les lignes non-ponts (calculée une fois)."""
+        if self._shared is None:
+            return super()._attach_outage_factors(signature, axis, bridges, cache)
+
+        def build():
+            lines = [line for line in self._lines if line not in bridges]
+            D = np.zeros((len(lines), len(axis)))
+            for k, line in enumerate(lines):
+                D[k] = self.line_vector(self.line_outage_delta(line, {line: 1.0}))
+            return {'lines': np.array(lines, dtype=str), 'axis': np.array(axis, dtype=str), 'D': D}
+        arrays = self._shared.get_or_create(cache_key('outage_factors', signature), build)
+        D, shared_axis = arrays['D'], arrays['axis'].tolist()
+        if shared_axis == list(axis):
+            cache.update(zip(arrays['lines'].tolist(), D))      # vues sur la projection
+        else:
+            position = {line: k for k, line in enumerate(shared_axis)}
+            order = np.array([position[line] for line in axis])
+            cache.update((line, D[k][order]) for k, line in enumerate(arrays['lines'].tolist()))
@@ -0,0 +1,886 @@
+"""
+Noyau numérique de l'algorithme de Lanczos sur des tableaux.
+
+Même récurrence que `calculate_q_i` / `calculate_kappa` / `calculate_psi_approx`
+(utils.py), mais sur une matrice Hamiltonienne creuse compilée une fois :
+
+    q_{i+1} = (H q_i - β_i q_{i-1}) / β_{i+1}
+    κ_{2i}  = (-1)^{i-1} (P / β_2) Π_{j<i} β_{2j+1} / β_{2j+2}
+    ψ       = Σ κ_{2i} q_{2i}
+
+Ces fonctions ne dépendent que de numpy/scipy : elles peuvent être envoyées
+telles quelles à des processus de calcul. Les classes mélangées de fin de
+module (`CompiledMixin`, `PrecisionMixin`...) en sont les points d'entrée côté grille.
+"""
+
+import time
+import warnings
+
+import numpy as np
+
+import instrumentation
+from instrumentation import instrumented
+
+# Stockage des vecteurs et produits matrice-vecteur ; β, κ et ψ restent en float64
+PRECISIONS = {'float64': np.float64, 'float32': np.float32}
+
+
+def compile_hamiltonian(graph, nodes=None):
+    """
+    Construit la matrice H (CSR, symétrique) à partir des signes des arêtes.
+
+    Args:
+        graph: HamiltonianGrid / EuropeanGrid (ou tout nx.Graph avec 'sign')
+        nodes: sous-ensemble ordonné des nœuds à garder (défaut : tous)
+
+    Returns:
+        (index, H) où index[k] est l'identifiant du nœud de la ligne k de H
+    """
+    import scipy.sparse as sp  # chargé à la première compilation seulement
+
+    index = list(graph.nodes if nodes is None else nodes)
+    position = {node: k for k, node in enumerate(index)}
+    rows, cols, vals = [], [], []
+    for u, v, sign in graph.edges(data='sign', default=1):
+        if u in position and v in position:
+            rows.extend((position[u], position[v]))
+            cols.extend((position[v], position[u]))
+            vals.extend((sign, sign))
+    n = len(index)
+    H = sp.csr_matrix((vals, (rows, cols)), shape=(n, n), dtype=float)
+    return index, H
+
+
+def kappas_from_betas(betas, total_input=1.0):
+    """Version vectorisée de `calculate_kappa` (un κ par paire d'itérations)."""
+    betas = np.asarray(betas, dtype=float)
+    n_pairs = len(betas) // 2
+    if n_pairs == 0:
+        return np.zeros(0)
+    # ratios[j-1] = β_{2j+1} / β_{2j+2} pour j = 1 .. n_pairs-1
+    ratios = betas[2:2 * n_pairs:2] / betas[3:2 * n_pairs:2]
+    products = np.concatenate(([1.0], np.cumprod(ratios)))
+    signs = (-1.0)**np.arange(n_pairs)
+    return signs * (total_input / betas[1]) * products
+
+
+def iterations_to_tolerance(kappas, tol):
+    """
+    Nombre d'itérations (vecteurs q) après lequel R_eff = Σκ² ne varie plus
+    que de `tol` (relatif) ; None si la tolérance n'est jamais atteinte.
+    """
+    kappa_sq = np.asarray(kappas, dtype=float)**2
+    if len(kappa_sq) == 0:
+        return None
+    increments = kappa_sq / np.cumsum(kappa_sq)
+    reached = np.flatnonzero(increments < tol)
+    return int(2 * (reached[0] + 1)) if len(reached) else None
+
+
+@instrumented('lanczos')
+def lanczos(H, q1, n_iter, total_input=1.0, beta_1=None, store_snapshots=True, tol=1e-12,
+            precision='float64', callback=None):
+    """
+    Itérations de Lanczos à partir du vecteur q1 (normalisé ici).
+
+    ψ est accumulé au fil des itérations, les κ ne dépendant que des β déjà
+    calculés. L'itération s'arrête si β_{i+1} devient négligeable (sous-espace
+    de Krylov épuisé).
+
+    Args:
+        H: matrice Hamiltonienne creuse (n × n)
+        q1: vecteur d'injection (n,)
+        n_iter: nombre maximal de vecteurs q (équivalent de q_N)
+        total_input: puissance de référence P dans κ_2 = P / β_2
+        beta_1: valeur enregistrée pour β_1 (défaut : ‖q1‖)
+        store_snapshots: garder tous les q_i (tableau n_iter × n)
+        tol: seuil relatif d'arrêt sur β
+        precision: 'float64' ou 'float32' (vecteurs q, snapshots et H @ q en
+            simple précision, β/κ/ψ accumulés en double ; le seuil d'arrêt est
+            alors au moins √ε ≈ 3·10⁻⁴, niveau du β résiduel une fois le
+            sous-espace épuisé, au-delà duquel l'itération ne ferait
+            qu'accumuler de l'arrondi dans ψ)
+        callback: appelé comme callback(i, q_i, psi) après chaque itération i
+            (psi : somme partielle courante ; tableaux réutilisés, à copier
+            pour les garder)
+
+    Returns:
+        dict avec 'betas', 'kappas', 'psi', 'snapshots' (ou None), 'iterations'
+    """
+    dtype = PRECISIONS[precision]
+    if dtype is not np.float64:
+        tol = max(tol, float(np.sqrt(np.finfo(dtype).eps)))
+    q1 = np.asarray(q1, dtype=float)
+    norm = np.linalg.norm(q1)
+    betas = np.zeros(n_iter)
+    kappas = np.zeros(n_iter // 2)
+    psi = np.zeros(H.shape[0])
+    snapshots = np.zeros((n_iter, H.shape[0]), dtype=dtype) if store_snapshots else None
+    if norm == 0 or n_iter == 0:
+        return {'betas': betas[:0], 'kappas': kappas[:0], 'psi': psi,
+                'snapshots': None if snapshots is None else snapshots[:0], 'iterations': 0}
+
+    H = H.astype(dtype, copy=False)
+    q_prev = np.zeros(H.shape[0], dtype=dtype)
+    q_curr = (q1 / norm).astype(dtype)
+    betas[0] = norm if beta_1 is None else beta_1
+    if store_snapshots:
+        snapshots[0] = q_curr
+    if callback is not None:
+        callback(1, q_curr, psi)
+
+    iterations = 1
+    for i in range(2, n_iter + 1):
+        w = H @ q_curr
+        if i > 2:
+            w -= dtype(betas[i - 2]) * q_prev
+        beta_i = np.sqrt(np.einsum('i,i->', w, w, dtype=np.float64))
+        if beta_i <= tol * norm:
+            break
+        q_prev, q_curr = q_curr, w / dtype(beta_i)
+        betas[i - 1] = beta_i
+        if store_snapshots:
+            snapshots[i - 1] = q_curr
+        if i % 2 == 0:
+            k = i // 2
+            if k == 1:
+                kappas[0] = total_input / betas[1]
+            else:
+                kappas[k - 1] = -kappas[k - 2] * betas[i - 2] / betas[i - 1]
+            psi += kappas[k - 1] * q_curr
+        iterations = i
+        if callback is not None:
+            callback(i, q_curr, psi)
+
+    if instrumentation.enabled():
+        instrumentation.count('lanczos_iterations', iterations)
+        if store_snapshots:
+            instrumentation.gauge('snapshot_bytes', snapshots[:iterations].nbytes)
+    return {
+        'betas': betas[:iterations],
+        'kappas': kappas[:iterations // 2],
+        'psi': psi,
+        'snapshots': None if snapshots is None else snapshots[:iterations],
+        'iterations': iterations,
+    }
+
+
+def _solve_component(args):
+    """Point d'entrée picklable pour ProcessPoolExecutor."""
+    H, q1, n_iter, total_input, precision = args
+    return lanczos(H, q1, n_iter, total_input=total_input, store_snapshots=False,
+                   precision=precision)
+
+
+def precision_report(H, q1, n_iter, total_input=1.0, precision='float32'):
+    """
+    Compare une exécution en `precision` à la référence float64.
+
+    Returns:
+        dict : écarts sur ψ et sur R_eff = Σκ² (psi_approx_squared), temps et
+        mémoire des snapshots pour chaque précision
+    """
+    runs = {}
+    for name in ('float64', precision):
+        start = time.perf_counter()
+        result = lanczos(H, q1, n_iter, total_input=total_input, precision=name)
+        result['time'] = time.perf_counter() - start
+        runs[name] = result
+    ref, low = runs['float64'], runs[precision]
+    r_ref = float(np.sum(ref['kappas']**2))
+    r_low = float(np.sum(low['kappas']**2))
+    n = min(len(ref['kappas']), len(low['kappas']))
+    psi_sq_ref = np.cumsum(ref['kappas'][:n]**2)
+    psi_sq_low = np.cumsum(low['kappas'][:n]**2)
+    psi_scale = np.max(np.abs(ref['psi'])) or 1.0
+    return {
+        'precision': precision,
+        'iterations': {'float64': ref['iterations'], precision: low['iterations']},
+        'psi_max_abs_error': float(np.max(np.abs(ref['psi'] - low['psi']))),
+        'psi_max_rel_error': float(np.max(np.abs(ref['psi'] - low['psi'])) / psi_scale),
+        'psi_sqs_max_rel_error': float(np.max(np.abs(psi_sq_ref - psi_sq_low) / psi_sq_ref)) if n else 0.0,
+        'R_eff': {'float64': r_ref, precision: r_low},
+        'R_eff_rel_error': abs(r_ref - r_low) / r_ref if r_ref else 0.0,
+        'time': {'float64': ref['time'], precision: low['time']},
+        'snapshot_bytes': {'float64': ref['snapshots'].nbytes, precision: low['snapshots'].nbytes},
+    }
+
+
+def sparse_lanczos(adjacency, q1, n_iter, total_input=1.0, allowed=None, drop_tol=0.0, kappa_tol=0.0,
+                   tol=1e-12):
+    """
+    Lanczos sur des vecteurs creux (dicts), comme `_lanczos_step`, mais limité
+    aux nœuds de `allowed` et avec élagage des petites composantes.
+
+    Le coût d'une itération est proportionnel au support de q_i, qui reste
+    confiné à la région : il ne dépend pas de la taille du réseau.
+
+    Args:
+        adjacency: voisins signés par entier (adjacency[k] = [(voisin, signe), ...],
+                   voir `_id_adjacency`)
+        q1: dict node -> injection
+        n_iter: nombre maximal de vecteurs q
+        total_input: P de référence (κ_2 = P / β_2)
+        allowed: ensemble des nœuds autorisés (défaut : tous)
+        drop_tol: les composantes |q_i[node]| < drop_tol sont supprimées
+        kappa_tol: arrêt dès que |κ_2i| < kappa_tol·|κ_2| (ψ a convergé)
+        tol: seuil relatif d'arrêt sur β
+
+    Returns:
+        dict avec 'betas', 'kappas', 'psi' (dict), 'iterations', 'max_support'
+    """
+    norm = sum(v**2 for v in q1.values())**0.5
+    if norm == 0:
+        return {'betas': np.zeros(0), 'kappas': np.zeros(0), 'psi': {},
+                'iterations': 0, 'max_support': 0}
+    q_prev = {}
+    q_curr = {node: v / norm for node, v in q1.items()}
+    betas = [norm]
+    kappas = []
+    psi = {}
+    max_support = len(q_curr)
+
+    for i in range(2, n_iter + 1):
+        w = {}
+        for node, value in q_curr.items():
+            for nbr, sign in adjacency[node]:
+                if allowed is None or nbr in allowed:
+                    w[nbr] = w.get(nbr, 0.0) + sign * value
+        if i > 2:
+            for node, value in q_prev.items():
+                w[node] = w.get(node, 0.0) - betas[-1] * value
+        beta_i = sum(v**2 for v in w.values())**0.5
+        if beta_i <= tol * norm:
+            break
+        q_prev = q_curr
+        q_curr = {node: v / beta_i for node, v in w.items() if abs(v) >= drop_tol * beta_i}
+        betas.append(beta_i)
+        max_support = max(max_support, len(q_curr))
+        if i % 2 == 0:
+            kappa = total_input / betas[1] if i == 2 else -kappas[-1] * betas[i - 2] / betas[i - 1]
+            kappas.append(kappa)
+            for node, value in q_curr.items():
+                psi[node] = psi.get(node, 0.0) + kappa * value
+            if abs(kappa) < kappa_tol * abs(kappas[0]):
+                break
+
+    return {
+        'betas': np.array(betas),
+        'kappas': np.array(kappas),
+        'psi': psi,
+        'iterations': len(betas),
+        'max_support': max_support,
+    }
+
+
+def sketch_size(n_pairs, epsilon, failure_exponent=1.0):
+    """
+    Nombre de projections aléatoires (Johnson–Lindenstrauss, Achlioptas) pour
+    que les `n_pairs` distances soient toutes à (1 ± epsilon) près avec une
+    probabilité d'au moins 1 - n_pairs^(-failure_exponent).
+    """
+    if not 0 < epsilon < 1:
+        raise ValueError("epsilon must be in (0, 1)")
+    denominator = epsilon**2 / 2 - epsilon**3 / 3
+    return int(np.ceil((4 + 2 * failure_exponent) * np.log(max(n_pairs, 2)) / denominator))
+
+
+def line_resistances(H, bus_rows, line_rows, n_projections=None, epsilon=0.3, seed=None,
+                     chunk=256):
+    """
+    Résistances effectives et leverage scores de toutes les lignes (Spielman–Srivastava).
+
+    Le bloc ligne × bus de H est S = √W B (une ligne ℓ : +√b au bus0, -√b au
+    bus1), et le bloc bus de H² est le laplacien L = SᵀS. Le leverage de ℓ est
+    S_ℓ L⁺ S_ℓᵀ = b_ℓ R_ℓ ; on l'estime par ‖S_ℓ L⁺ SᵀQᵀ‖² avec Q une matrice
+    k × m de ±1/√k, soit k résolutions de L au lieu de m. Avec Q = I (exact,
+    ou k ≥ m) le résultat est exact.
+
+    L est factorisé une seule fois, un bus par composante étant mis à la
+    masse ; les seconds membres sont traités par paquets de `chunk` colonnes.
+
+    Args:
+        H: matrice Hamiltonienne creuse (voir compile_hamiltonian)
+        bus_rows, line_rows: indices des bus et des lignes dans H
+        n_projections: k (défaut : sketch_size(m, epsilon)) ; 0 pour l'exact
+        epsilon: erreur relative visée sur chaque R_ℓ
+        seed: graine du générateur aléatoire
+
+    Returns:
+        dict avec 'leverage', 'R_eff' (tableaux alignés sur line_rows, NaN pour
+        une ligne pendante), 'n_projections', 'exact'
+    """
+    import scipy.sparse as sp
+    from scipy.sparse.csgraph import connected_components
+    from scipy.sparse.linalg import splu
+
+    H = sp.csr_matrix(H)
+    S = H[line_rows][:, bus_rows].tocsr()
+    m, n = S.shape
+    L = (S.T @ S).tocsc()
+    _, labels = connected_components(L, directed=False)
+    _, grounded = np.unique(labels, return_index=True)
+    keep = np.ones(n, dtype=bool)
+    keep[grounded] = False
+    factor = splu(L[keep][:, keep].tocsc()) if keep.any() else None
+
+    if n_projections is None:
+        n_projections = sketch_size(m, epsilon)
+    exact = n_projections == 0 or n_projections >= m
+    if not exact:
+        rng = np.random.default_rng(seed)
+    n_columns = m if exact else n_projections
+
+    St = S.T.tocsr()
+    leverage = np.zeros(m)
+    for start in range(0, n_columns, chunk):
+        stop = min(start + chunk, n_columns)
+        if exact:
+            Y = St[:, start:stop].toarray()
+        else:
+            Q = rng.choice((-1.0, 1.0), size=(stop - start, m)) / np.sqrt(n_projections)
+            Y = np.asarray(St @ Q.T)
+        Z = np.zeros_like(Y)
+        if factor is not None:
+            Z[keep] = factor.solve(Y[keep])
+        P = S @ Z
+        if exact:
+            # Colonne j : L⁺ S_jᵀ, d'où leverage_j = (S L⁺ S_jᵀ)_j
+            leverage[start:stop] = P[np.arange(start, stop), np.arange(stop - start)]
+        else:
+            leverage += np.einsum('ij,ij->i', P, P)
+
+    degree = np.diff(S.indptr)
+    weight = np.asarray(S.multiply(S).sum(axis=1)).ravel() / 2
+    R_eff = np.full(m, np.nan)
+    ok = (degree == 2) & (weight > 0)
+    R_eff[ok] = leverage[ok] / weight[ok]
+    leverage[~ok] = np.nan
+    return {'leverage': leverage, 'R_eff': R_eff, 'n_projections': n_columns, 'exact': exact}
+
+
+def _laplacian_solver(L):
+    """
+    Résolution de L x = y pour un laplacien L (creux, semi-défini) : un bus
+    par composante est mis à la masse et le reste factorisé une seule fois.
+    La moyenne de y sur chaque composante (sa part dans le noyau) est retirée,
+    de sorte que L x = y - moyenne, comme avec L⁺.
+    """
+    import scipy.sparse as sp
+    from scipy.sparse.csgraph import connected_components
+    from scipy.sparse.linalg import splu
+
+    L = sp.csc_matrix(L)
+    n_comp, labels = connected_components(L, directed=False)
+    _, grounded = np.unique(labels, return_index=True)
+    keep = np.ones(L.shape[0], dtype=bool)
+    keep[grounded] = False
+    factor = splu(L[keep][:, keep].tocsc()) if keep.any() else None
+    sizes = np.bincount(labels, minlength=n_comp)
+
+    def solve(y):
+        y = np.asarray(y, dtype=float)
+        flat = y.ndim == 1
+        Y = y.reshape(len(y), -1)
+        means = np.array([np.bincount(labels, weights=col, minlength=n_comp) for col in Y.T]).T / sizes[:, None]
+        Y = Y - means[labels]
+        X = np.zeros_like(Y)
+        if factor is not None:
+            X[keep] = factor.solve(Y[keep])
+        return X[:, 0] if flat else X
+
+    return solve
+
+
+@instrumented('susceptance_gradient')
+def susceptance_gradient(H, bus_rows, line_rows, q, targets, total_input=1.0):
+    """
+    ∂ψ_t/∂b_k pour les lignes cibles t et toutes les lignes k, par la méthode adjointe.
+
+    Avec S = √W B (bloc ligne × bus de H) et L = SᵀS = BᵀWB, ψ = P S θ où
+    θ = L⁺ q̂. Comme ∂L/∂b_k = B_kᵀB_k, ∂θ/∂b_k = -L⁺ B_kᵀ (Bθ)_k, et avec
+    la solution adjointe μ_t = L⁺ S_tᵀ :
+
+        ∂ψ_t/∂b_k = P [δ_tk (Sθ)_t / (2 b_t) - (Sθ)_k (Sμ_t)_k / b_k]
+
+    soit une résolution directe et une adjointe par cible (même factorisation),
+    au lieu d'une résolution par ligne candidate.
+
+    Args:
+        H: matrice Hamiltonienne creuse (voir compile_hamiltonian)
+        bus_rows, line_rows: indices des bus et des lignes dans H
+        q: injections sur les bus (alignées sur bus_rows)
+        targets: positions des lignes cibles dans line_rows
+        total_input: P, entrée de référence
+
+    Returns:
+        dict avec 'psi' (sur line_rows), 'b' (susceptance de chaque ligne) et
+        'gradient' (len(targets) × len(line_rows), NaN pour une ligne pendante
+        ou de susceptance nulle)
+    """
+    import scipy.sparse as sp
+
+    H = sp.csr_matrix(H)
+    S = H[line_rows][:, bus_rows].tocsr()
+    q = np.asarray(q, dtype=float)
+    norm = np.linalg.norm(q)
+    solve = _laplacian_solver(S.T @ S)
+
+    flow = S @ solve(q / norm if norm else q)                     # Sθ
+    targets = np.asarray(targets, dtype=int)
+    adjoint = S @ solve(S[targets].T.toarray())                    # colonnes Sμ_t
+    b = np.asarray(S.multiply(S).max(axis=1).todense()).ravel()
+    ok = (np.diff(S.indptr) == 2) & (b > 0)
+
+    gradient = np.full((len(targets), S.shape[0]), np.nan)
+    gradient[:, ok] = -(flow[ok] * adjoint[ok].T) / b[ok]
+    rows = np.flatnonzero(ok[targets])
+    gradient[rows, targets[rows]] += flow[targets[rows]] / (2 * b[targets[rows]])
+    return {'psi': total_input * flow, 'b': b, 'gradient': total_input * gradient}
+
+
+def _ritz_vectors(B, LB, n_ritz):
+    """
+    Rayleigh–Ritz dans l'espace engendré par les colonnes de B (images LB) :
+    les n_ritz vecteurs de Ritz des plus petites valeurs propres non nulles
+    et leurs images, sans produit par L. B est orthonormalisée à partir de
+    sa matrice de Gram (produits matrice-matrice seulement).
+    """
+    import scipy.linalg
+
+    s, V = scipy.linalg.eigh(B.T @ B)
+    keep = s > 1e-20 * s[-1]
+    T = V[:, keep] / np.sqrt(s[keep])
+    A = T.T @ (B.T @ LB) @ T
+    theta, Y = scipy.linalg.eigh((A + A.T) / 2)
+    # Les modes du noyau (θ ≈ 0) rendraient W'LW singulière
+    Y = T @ Y[:, theta > 1e-10 * max(theta[-1], 1e-300)][:, :n_ritz]
+    return B @ Y, LB @ Y
+
+
+def deflated_cg(L, b, W=None, LW=None, tol=1e-10, max_iter=None, n_ritz=0, window=None):
+    """
+    Gradient conjugué déflaté (Saad et al., 2000) pour L x = b, L symétrique
+    positive (le laplacien des bus, bloc bus de H²) et b orthogonal à son noyau.
+
+    Avec W = 0 c'est le gradient conjugué, équivalent à Lanczos sur H : une
+    itération ici vaut deux vecteurs q, et bᵀx_k est la somme partielle des
+    κ² (à P²/‖b‖² près). Avec W (approximation des vecteurs propres de plus
+    petites valeurs propres), ces modes sont résolus d'emblée et retirés des
+    directions de descente, ce qui réduit le nombre d'itérations.
+
+    Les vecteurs de Ritz sont extraits par redémarrages épais : les
+    directions de descente s'accumulent dans une fenêtre de `window`
+    colonnes ; quand elle est pleine, Rayleigh–Ritz dans [Ritz courants,
+    fenêtre] n'en garde que n_ritz. La mémoire reste en O(n·(n_ritz + window))
+    quel que soit le nombre d'itérations.
+
+    Args:
+        L: matrice creuse (n × n)
+        b: second membre (n,)
+        W, LW: sous-espace de déflation (n × k) et son image L·W
+        tol: seuil relatif sur le résidu
+        max_iter: nombre maximal d'itérations (défaut : n)
+        n_ritz: nombre de vecteurs de Ritz à extraire pour la résolution suivante
+        window: directions gardées entre deux redémarrages (défaut : 2·n_ritz)
+
+    Returns:
+        dict avec 'x', 'iterations', 'energies' (bᵀx_k), 'residual',
+        'timings' (secondes : 'cg', 'ritz') et, si n_ritz > 0, 'W' et 'LW'
+        (au plus n_ritz vecteurs de Ritz des plus petites valeurs propres)
+    """
+    b = np.asarray(b, dtype=float)
+    n = len(b)
+    max_iter = n if max_iter is None else max_iter
+    window = max(2 * n_ritz, 1) if window is None else window
+    if W is not None and W.shape[1] == 0:
+        W = LW = None
+    if W is not None:
+        E = W.T @ LW
+        Z = W @ np.linalg.inv((E + E.T) / 2)
+        x = Z @ (W.T @ b)
+        r = b - L @ x
+
+        def project(v):
+            return v - Z @ (LW.T @ v)
+    else:
+        x = np.zeros(n)
+        r = b.copy()
+
+        def project(v):
+            return v
+    p = project(r)
+    norm_b = np.linalg.norm(b)
+    rr = r @ r
+    energies = [b @ x]
+    ritz = (W, LW) if W is not None else (np.zeros((n, 0)), np.zeros((n, 0)))
+    directions = np.empty((n, window), order='F') if n_ritz else None
+    images = np.empty((n, window), order='F') if n_ritz else None
+    filled, ritz_time = 0, 0.0
+    iterations = 0
+    start = time.perf_counter()
+    while iterations < max_iter and norm_b > 0 and np.sqrt(rr) > tol * norm_b:
+        Lp = L @ p
+        pLp = p @ Lp
+        if pLp <= 0:
+            break
+        alpha = rr / pLp
+        x += alpha * p
+        r = r - alpha * Lp
+        if n_ritz:
+            if filled == window:
+                restart = time.perf_counter()
+                ritz = _ritz_vectors(np.hstack([ritz[0], directions]),
+                                     np.hstack([ritz[1], images]), n_ritz)
+                filled = 0
+                ritz_time += time.perf_counter() - restart
+            directions[:, filled] = p
+            images[:, filled] = Lp
+            filled += 1
+        rr_new = r @ r
+        p = project(r) + (rr_new / rr) * p
+        rr = rr_new
+        iterations += 1
+        energies.append(b @ x)
+    cg_time = time.perf_counter() - start - ritz_time
+
+    result = {'x': x, 'iterations': iterations, 'energies': np.array(energies),
+              'residual': np.sqrt(rr) / norm_b if norm_b else 0.0}
+    if n_ritz:
+        restart = time.perf_counter()
+        B = np.hstack([ritz[0], directions[:, :filled]])
+        if B.shape[1]:
+            W_new, _ = _ritz_vectors(B, np.hstack([ritz[1], images[:, :filled]]), n_ritz)
+            # L·W recalculé (k produits) : les images accumulées dérivent assez
+            # pour fausser la projection à la résolution suivante
+            result['W'] = W_new
+            result['LW'] = L @ W_new
+        ritz_time += time.perf_counter() - restart
+    result['timings'] = {'cg': cg_time, 'ritz': ritz_time}
+    return result
+
+
+# --- Points d'entrée des grilles ---
+
+
+class InternedLanczosMixin:
+    """Récurrence de Lanczos des grilles sur les entiers de leur `NodeTable`."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._id_adjacency_cache = None  # (version, voisins signés par entier)
+
+    def _id_adjacency(self):
+        """
+        Voisins signés par entier (adjacency[k] = [(voisin, signe), ...]),
+        reconstruits à chaque `topology_version` ; interne les nœuds nouveaux
+        et met à jour les bus présents de la table.
+        """
+        cache = self._id_adjacency_cache
+        if cache is None or cache[0] != self.topology_version:
+            self._intern_nodes()
+            ids = self.node_ids
+            adjacency = [()] * len(ids)
+            active = bytearray(len(ids))
+            index = ids.ids
+            for node, neighbors in self.adj.items():
+                k = index[node]
+                active[k] = 1
+                adjacency[k] = [(index[nbr], attrs.get('sign', 1))
+                                for nbr, attrs in neighbors.items()]
+            ids.active = active
+            cache = self._id_adjacency_cache = (self.topology_version, adjacency)
+        return cache[1]
+
+    def _lanczos_step(self, i):
+        """
+        q_i = (H q_{i-1} - β_{i-1} q_{i-2}) / β_i sur les vecteurs creux
+        (dicts entier -> valeur) ; seuls les poids affichés sont traduits en noms.
+        """
+        adjacency = self._id_adjacency()
+        q_prev = self.q_snapshots[i-2]
+        temp_weights = {}
+        for k, w in q_prev.items():
+            for neighbor, sign in adjacency[k]:
+                # IMPORTANT: Le signe dépend de la direction neighbor -> node
+                temp_weights[neighbor] = temp_weights.get(neighbor, 0) + w * sign
+        if i > 2:
+            beta, q_back = self.betas[i - 2], self.q_snapshots[i - 3]
+            for k in temp_weights:
+                temp_weights[k] -= beta * q_back.get(k, 0)
+
+        beta_i = sum(w * w for w in temp_weights.values() if w != 0)**0.5
+        names, nodes = self.node_ids.names, self.nodes
+        for k in q_prev:
+            # Seul le support de q_{i-1} porte des poids non nuls
+            nodes[names[k]]["weight"] = 0
+        # Normalize and store ONLY nodes with values
+        q_i = {}
+        for k, weight in temp_weights.items():
+            if weight != 0:
+                q_i[k] = norm_weight = weight / beta_i
+                # Update graph for drawing
+                nodes[names[k]]["weight"] = norm_weight
+        self.q_snapshots[i-1] = q_i
+        return beta_i
+
+    def _accumulate_psi(self):
+        """ψ = Σ κ_2k q_2k (plus la contribution d'une reprise), en dict nom -> ψ."""
+        ids = self.node_ids
+        self._id_adjacency()
+        psi = np.zeros(len(ids))
+        for k, value in self._psi_seed.items():
+            psi[k] += value
+        for i_pair in range(2, len(self.q_snapshots) + 1, 2):
+            q = self.q_snapshots[i_pair-1]
+            if q:
+                rows = np.fromiter(q.keys(), dtype=np.int64, count=len(q))
+                psi[rows] += self.kappas[i_pair // 2 - 1] * np.fromiter(q.values(), dtype=float,
+                                                                        count=len(q))
+        values, index = psi.tolist(), ids.ids
+        return {node: values[index[node]] for node in self.nodes}
+
+
+class CompiledMixin:
+    """Topologie de la grille compilée en matrice creuse, une fois par version."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._compiled = None  # (version, index, position, H)
+        self._laplacian = None  # (version, bus_nodes, L)
+
+    def compiled_hamiltonian(self):
+        """
+        Matrice H creuse de la topologie courante, recompilée seulement
+        quand `topology_version` a changé.
+
+        Returns:
+            (index, position, H) avec position[node_id] = ligne dans H
+        """
+        if self._compiled is None or self._compiled[0] != self.topology_version:
+            index, H = self._build_hamiltonian()
+            position = {node: k for k, node in enumerate(index)}
+            self._compiled = (self.topology_version, index, position, H)
+        return self._compiled[1:]
+
+    def _build_hamiltonian(self):
+        """(index, H) pour `compiled_hamiltonian` ; point d'extension (voir shared.SharedMixin)."""
+        return compile_hamiltonian(self)
+
+    def _bus_laplacian(self):
+        """(version, bus, L = bloc bus de H²), recompilé seulement quand `topology_version` a changé."""
+        if self._laplacian is None or self._laplacian[0] != self.topology_version:
+            index, position, H = self.compiled_hamiltonian()
+            buses = [node for node in index if self._is_bus(node)]
+            rows = np.array([position[bus] for bus in buses], dtype=int)
+            L = (H @ H)[rows][:, rows].tocsr()
+            self._laplacian = (self.topology_version, buses, L)
+        return self._laplacian
+
+    def _line_currents(self, buses, x):
+        """ψ = P·S x : courant de chaque ligne pour les potentiels x des bus (couplages ±√b)."""
+        P = self._reference_input()
+        x = dict(zip(buses, x))
+        psi = {node: 0.0 for node in self.nodes}
+        for line in self._lines:
+            if line in self:
+                psi[line] = P * sum(attrs.get('sign', 1) * x.get(bus, 0.0)
+                                    for bus, attrs in self.adj[line].items())
+        return psi
+
+
+class PrecisionMixin:
+    """Mode float32 du moteur de Lanczos, comparé à la référence float64."""
+
+    def precision_report(self, precision='float32'):
+        """
+        Écart entre une résolution en `precision` et en float64 sur le réseau
+        entier (ψ, psi_approx_squared / R_eff, temps, mémoire des snapshots).
+        """
+        injections = self.injection_vector()
+        index, position, H = self.compiled_hamiltonian()
+        q1 = np.zeros(len(index))
+        for node, p in injections.items():
+            q1[position[node]] = p
+        return precision_report(H, q1, self.q_N, total_input=self._reference_input(),
+                                precision=precision)
+
+
+class ResistanceMixin:
+    """Résistances effectives de toutes les lignes par projections aléatoires."""
+
+    def line_resistances(self, epsilon=0.3, n_projections=None, exact=False, seed=None):
+        """
+        Résistance effective R entre les deux bus de chaque ligne, et leverage
+        b·R, pour tout le réseau en O(log m / ε²) résolutions (voir
+        solver.line_resistances) au lieu d'une résolution par ligne.
+
+        R est la résistance usuelle (e_u - e_v)ᵀ L⁺ (e_u - e_v) : pour un dipôle
+        ±P sur (u, v), psi_approx_squared converge vers P²·R/2.
+
+        Args:
+            epsilon: erreur relative visée (avec forte probabilité) sur chaque R
+            n_projections: nombre de projections, pour fixer le coût directement
+            exact: une résolution par ligne (validation)
+            seed: graine des projections
+
+        Returns:
+            dict avec 'R_eff' et 'leverage' (line_node -> valeur, NaN pour une
+            ligne pendante), 'n_projections', 'exact', 'epsilon'
+        """
+        index, position, H = self.compiled_hamiltonian()
+        lines = [line for line in self._lines if line in position]
+        buses = [node for node in index if self._is_bus(node)]
+        result = line_resistances(H, [position[bus] for bus in buses],
+                                  [position[line] for line in lines],
+                                  n_projections=0 if exact else n_projections,
+                                  epsilon=epsilon, seed=seed)
+        return {
+            'R_eff': dict(zip(lines, result['R_eff'])),
+            'leverage': dict(zip(lines, result['leverage'])),
+            'n_projections': result['n_projections'],
+            'exact': result['exact'],
+            'epsilon': None if result['exact'] else epsilon,
+        }
+
+
+class SensitivityMixin:
+    """Sensibilité du flux des lignes cibles aux susceptances."""
+
+    def susceptance_sensitivity(self, targets, absolute=True):
+        """
+        Sensibilité de ψ sur les lignes cibles à la susceptance b de chaque
+        ligne, pour les injections courantes : une résolution directe et une
+        adjointe par cible (`susceptance_gradient`) au lieu d'une
+        résolution par ligne candidate.
+
+        Args:
+            targets: ligne ou lignes cibles
+            absolute: dérivées de |ψ_t| (sinon de ψ_t, avec son signe)
+
+        Returns:
+            dict avec 'psi' (cible -> ψ), 'gradient' (cible -> {line_node ->
+            ∂ψ_t/∂b}), 'elasticity' (cible -> {line_node -> b·∂ψ_t/∂b}, effet
+            d'un renforcement relatif de la ligne ; NaN pour une ligne pendante)
+        """
+        targets = [targets] if isinstance(targets, (str, int)) else list(targets)
+        targets = [self._line_node(target) for target in targets]
+        index, position, H = self.compiled_hamiltonian()
+        lines = [line for line in self._lines if line in position]
+        buses = [node for node in index if self._is_bus(node)]
+        injections = self.injection_vector()
+        line_index = {line: k for k, line in enumerate(lines)}
+        result = susceptance_gradient(H, [position[bus] for bus in buses],
+                                      [position[line] for line in lines],
+                                      [injections.get(bus, 0.0) for bus in buses],
+                                      [line_index[target] for target in targets],
+                                      total_input=self._reference_input())
+        psi, gradient = result['psi'], result['gradient']
+        sensitivity = {'psi': {}, 'gradient': {}, 'elasticity': {}}
+        for row, target in enumerate(targets):
+            g = gradient[row] * (np.sign(psi[line_index[target]]) if absolute else 1.0)
+            sensitivity['psi'][target] = float(psi[line_index[target]])
+            sensitivity['gradient'][target] = dict(zip(lines, g.tolist()))
+            sensitivity['elasticity'][target] = dict(zip(lines, (g * result['b']).tolist()))
+        return sensitivity
+
+    def rank_reinforcements(self, target, top_n=10, candidates=None):
+        """
+        Lignes dont un renforcement (b → b(1 + ε)) réduit le plus |ψ| sur la
+        ligne cible, d'après `susceptance_sensitivity`.
+
+        Returns:
+            liste de (line_node, élasticité b·∂|ψ_t|/∂b), la plus négative d'abord
+        """
+        target = self._line_node(target)
+        elasticity = self.susceptance_sensitivity(target)['elasticity'][target]
+        if candidates is not None:
+            elasticity = {self._line_node(line): elasticity[self._line_node(line)]
+                          for line in candidates}
+        ranked = [(line, value) for line, value in elasticity.items() if np.isfinite(value)]
+        ranked.sort(key=lambda item: item[1])
+        return ranked[:top_n]
+
+
+class RecyclingMixin:
+    """Sous-espace de déflation conservé entre changements de source / puits."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._recycled = None  # (version, W, LW)
+        self._plain_cg = None  # (version, itérations, secondes, recyclage rentable)
+
+    @instrumented('solve_recycled')
+    def solve_recycled(self, n_deflation=20, tol=1e-10, max_iter=None, recycle=True):
+        """
+        ψ pour les injections courantes, par gradient conjugué déflaté sur le
+        laplacien des bus (solver.deflated_cg) : même solution que Lanczos
+        (ψ sur les lignes = courants), mais les vecteurs de Ritz des plus
+        petites valeurs propres trouvés lors des résolutions précédentes sur la
+        même `topology_version` sont réutilisés. Changer seulement de source /
+        puits (`set_endpoints`) garde donc l'acquis ; une mutation le remet à zéro.
+
+        Les `n_deflation` vecteurs de Ritz sont extraits (fenêtre bornée dans
+        deflated_cg) lors de la première résolution de la topologie, puis
+        réutilisés tels quels. Ce premier gradient conjugué sans déflation
+        sert de référence : si une résolution recyclée n'est pas plus rapide,
+        le recyclage est abandonné pour cette topologie et les résolutions
+        suivantes sont des gradients conjugués simples.
+
+        Le bilan est dans `self.recycle_report` (itérations, une itération
+        valant deux vecteurs q de Lanczos). Si le résidu reste au-dessus de
+        `tol` après max_iter itérations, 'converged' y vaut False, un
+        RuntimeWarning est émis et la résolution ne sert pas de référence.
+
+        Args:
+            n_deflation: taille maximale du sous-espace conservé
+            tol: seuil relatif sur le résidu
+            max_iter: défaut 10 × nombre de bus
+            recycle: False pour une résolution sans déflation (référence)
+
+        Returns:
+            dict node_id -> ψ
+        """
+        version, buses, L = self._bus_laplacian()
+        if self._plain_cg is not None and self._plain_cg[0] != version:
+            self._plain_cg = None
+        if self._recycled is not None and self._recycled[0] != version:
+            self._recycled = None
+        W, LW = (None, None) if self._recycled is None else self._recycled[1:]
+        recycle = recycle and (self._plain_cg is None or self._plain_cg[3])
+        injections = self.injection_vector()
+        q = np.array([injections.get(bus, 0.0) for bus in buses])
+        norm = np.linalg.norm(q)
+        max_iter = 10 * len(buses) if max_iter is None else max_iter
+        deflated = recycle and W is not None
+        result = deflated_cg(L, q / norm if norm else q, W if deflated else None,
+                             LW if deflated else None, tol=tol, max_iter=max_iter,
+                             n_ritz=n_deflation if recycle and not deflated else 0)
+        timings = result['timings']
+        converged = bool(result['residual'] <= tol)
+        if not converged:
+            warnings.warn(f"solve_recycled : résidu {result['residual']:.2e} > tol = {tol:.0e} "
+                          f"après {result['iterations']} itérations", RuntimeWarning, stacklevel=2)
+        elif not deflated and (self._plain_cg is None or not self._plain_cg[1]):
+            self._plain_cg = (version, result['iterations'], timings['cg'], True)
+        if deflated and self._plain_cg is not None and timings['cg'] >= self._plain_cg[2]:
+            # Pas plus rapide que le CG simple de référence : on s'en passe
+            self._plain_cg = self._plain_cg[:3] + (False,)
+            self._recycled = None
+        elif recycle and 'W' in result:
+            self._recycled = (version, result['W'], result['LW'])
+
+        P = self._reference_input()
+        psi = self._line_currents(buses, result['x'])
+        self.recycle_report = {
+            'iterations': result['iterations'],
+            'deflation_size': W.shape[1] if deflated else 0,
+            'residual': result['residual'],
+            'converged': converged,
+            'R_eff': P**2 * result['energies'][-1],
+            'psi_sqs': P**2 * result['energies'][1:],
+            'topology_version': version,
+            'recycling': self._plain_cg is None or self._plain_cg[3],
+            'timings': timings,
+        }
+        return psi
@@ -0,0 +1,307 @@
+"""
+Stockage persistant des résultats d'étude (ψ, β, κ, Δψ de coupures, tableaux).
+
+Un magasin est un répertoire :
+
+    results/
+      index.json             métadonnées de toutes les études
+      <étude>/
+        nodes.npy            axe des nœuds (identifiants du graphe)
+        psi.npy, betas.npy, kappas.npy      tableaux bruts (np.load(mmap_mode='r'))
+        deltas/lines.npy     lignes coupées, une par rang de Δψ
+        deltas/00000.npz     Δψ par paquets de `chunk_rows` rangs (zlib)
+        deltas/00000.npy       ... ou brut, projetable en mémoire (compress=False)
+        tables/<nom>/<colonne>.npz|.npy     tableaux colonne par colonne
+
+L'index porte l'empreinte de la topologie (`topology_signature`), la source,
+le puits, q_N et real_data, pour retrouver une étude déjà calculée au lieu de
+relancer Lanczos. Les écritures de l'index sont atomiques et faites sous
+verrou (index.lock).
+"""
+
+import fcntl
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+
+def _json_default(value):
+    # scalaires et tableaux numpy dans les métadonnées (bilans des moteurs)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _save_array(path, array, compress):
+    """Écrit `array` en .npz (zlib) ou .npy ; renvoie le nom de fichier."""
+    array = np.asarray(array)
+    if array.dtype == object:
+        array = array.astype(str)
+    if compress:
+        np.savez_compressed(f"{path}.npz", data=array)
+        return os.path.basename(path) + '.npz'
+    np.save(f"{path}.npy", array, allow_pickle=False)
+    return os.path.basename(path) + '.npy'
+
+
+def _load_array(path, mmap=True):
+    if path.endswith('.npz'):
+        with np.load(path, allow_pickle=False) as data:
+            return data['data']
+    return np.load(path, mmap_mode='r' if mmap else None, allow_pickle=False)
+
+
+class ChunkedArray:
+    """Tableau 2D stocké par paquets de rangs, chargés à la demande."""
+
+    def __init__(self, directory, files, chunk_rows, n_rows, n_cols, mmap=True):
+        self.directory = directory
+        self.files = files
+        self.chunk_rows = chunk_rows
+        self.shape = (n_rows, n_cols)
+        self.mmap = mmap
+        self._cached = (None, None)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def chunk(self, k):
+        if self._cached[0] != k:
+            self._cached = (k, _load_array(os.path.join(self.directory, self.files[k]), self.mmap))
+        return self._cached[1]
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += self.shape[0]
+        if not 0 <= row < self.shape[0]:
+            raise IndexError(row)
+        return self.chunk(row // self.chunk_rows)[row % self.chunk_rows]
+
+    def __iter__(self):
+        for k in range(len(self.files)):
+            yield from self.chunk(k)
+
+    def to_array(self):
+        return np.concatenate([self.chunk(k) for k in range(len(self.files))]) if self.files \
+            else np.zeros(self.shape)
+
+
+class StudyWriter:
+    """
+    Écriture d'une étude : ψ/β/κ à la création, puis Δψ au fil de l'eau
+    (un paquet est écrit dès qu'il est plein) et tableaux. L'étude n'apparaît
+    dans l'index qu'à `close()` (ou en sortie de bloc `with`).
+    """
+
+    def __init__(self, store, study_id, meta, nodes, compress, chunk_rows):
+        self.store = store
+        self.study_id = study_id
+        self.meta = meta
+        self.directory = os.path.join(store.root, study_id)
+        self.nodes = list(nodes)
+        self.position = {node: k for k, node in enumerate(self.nodes)}
+        self.compress = compress
+        self.chunk_rows = chunk_rows
+        self._rows = []
+        self._lines = []
+        self._chunks = []
+        os.makedirs(os.path.join(self.directory, 'deltas'), exist_ok=True)
+        np.save(os.path.join(self.directory, 'nodes.npy'), np.array(self.nodes, dtype=str))
+        meta['arrays'] = {}
+        meta['tables'] = {}
+
+    def write_array(self, name, values):
+        """ψ, β, κ... : vecteur brut, projetable en mémoire."""
+        if isinstance(values, dict):
+            values = self._dense(values)
+        meta_arrays = self.meta['arrays']
+        meta_arrays[name] = _save_array(os.path.join(self.directory, name), values, False)
+
+    def _dense(self, values):
+        row = np.zeros(len(self.nodes))
+        for node, value in values.items():
+            k = self.position.get(node)
+            if k is not None:
+                row[k] = value
+        return row
+
+    def append_delta(self, line, delta):
+        """Δψ d'une coupure (dict node -> Δψ, creux accepté)."""
+        self._rows.append(self._dense(delta))
+        self._lines.append(str(line))
+        if len(self._rows) == self.chunk_rows:
+            self._flush()
+
+    def _flush(self):
+        if not self._rows:
+            return
+        name = f"{len(self._chunks):05d}"
+        self._chunks.append(_save_array(os.path.join(self.directory, 'deltas', name),
+                                        np.array(self._rows), self.compress))
+        self._rows = []
+
+    def write_table(self, name, table):
+        """Tableau colonne par colonne (dict colonne -> valeurs, ou DataFrame)."""
+        if hasattr(table, 'columns'):
+            table = {str(column): table[column].to_numpy() for column in table.columns}
+        directory = os.path.join(self.directory, 'tables', name)
+        os.makedirs(directory, exist_ok=True)
+        columns = {}
+        for k, (column, values) in enumerate(table.items()):
+            columns[column] = _save_array(os.path.join(directory, f"{k:03d}"), values,
+                                          self.compress)
+        self.meta['tables'][name] = columns
+
+    def close(self):
+        self._flush()
+        np.save(os.path.join(self.directory, 'deltas', 'lines.npy'),
+                np.array(self._lines, dtype=str))
+        self.meta['deltas'] = {'files': self._chunks, 'chunk_rows': self.chunk_rows,
+                               'rows': len(self._lines), 'compressed': self.compress}
+        self.store._register(self.study_id, self.meta)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+
+class Study:
+    """Étude chargée : tableaux projetés en mémoire, Δψ par paquets."""
+
+    def __init__(self, store, study_id, meta):
+        self.study_id = study_id
+        self.meta = meta
+        self.directory = os.path.join(store.root, study_id)
+        self.nodes = np.load(os.path.join(self.directory, 'nodes.npy')).tolist()
+        self._arrays = {}
+        deltas = meta.get('deltas', {'files': [], 'chunk_rows': 1, 'rows': 0})
+        self.delta_lines = np.load(os.path.join(self.directory, 'deltas', 'lines.npy')).tolist()
+        self._delta_row = {line: k for k, line in enumerate(self.delta_lines)}
+        self.deltas = ChunkedArray(os.path.join(self.directory, 'deltas'), deltas['files'],
+                                   deltas['chunk_rows'], deltas['rows'], len(self.nodes))
+
+    def array(self, name):
+        if name not in self._arrays:
+            self._arrays[name] = _load_array(os.path.join(self.directory, self.meta['arrays'][name]))
+        return self._arrays[name]
+
+    @property
+    def psi(self):
+        return self.array('psi')
+
+    @property
+    def betas(self):
+        return self.array('betas')
+
+    @property
+    def kappas(self):
+        return self.array('kappas')
+
+    def psi_dict(self):
+        return dict(zip(self.nodes, self.psi.tolist()))
+
+    def has_delta(self, line):
+        return str(line) in self._delta_row
+
+    def delta(self, line, nonzero=True):
+        """Δψ de la coupure de `line` (dict node -> Δψ)."""
+        row = self.deltas[self._delta_row[str(line)]]
+        if nonzero:
+            return {self.nodes[k]: float(row[k]) for k in np.flatnonzero(row)}
+        return dict(zip(self.nodes, row.tolist()))
+
+    def table(self, name):
+        """Colonnes du tableau `name` (dict colonne -> tableau)."""
+        directory = os.path.join(self.directory, 'tables', name)
+        return {column: _load_array(os.path.join(directory, filename))
+                for column, filename in self.meta['tables'][name].items()}
+
+
+class ResultStore:
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    @property
+    def _index_path(self):
+        return os.path.join(self.root, 'index.json')
+
+    def index(self):
+        """Métadonnées de toutes les études, par identifiant."""
+        if not os.path.exists(self._index_path):
+            return {}
+        with open(self._index_path) as f:
+            return json.load(f)
+
+    def _register(self, study_id, meta):
+        # lecture-modification-écriture sous verrou : plusieurs processus
+        # (batch, serveur) peuvent terminer une étude en même temps
+        with open(os.path.join(self.root, 'index.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            index = self.index()
+            index[study_id] = meta
+            tmp = f"{self._index_path}.{os.getpid()}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(index, f, indent=1, default=_json_default)
+            os.replace(tmp, self._index_path)
+
+    def create(self, grid, name=None, compress=True, chunk_rows=256, **extra):
+        """
+        Nouvelle étude pour l'état courant de `grid` ; β et κ sont écrits
+        s'ils ont été calculés, ψ et Δψ se donnent au `StudyWriter` renvoyé.
+        """
+        meta = {
+            'name': name,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'grid': type(grid).__name__,
+            'network_hash': grid.topology_signature(),
+            'source': None if grid.ix is None else str(grid.ix),
+            'sink': None if grid.ex is None else str(grid.ex),
+            'q_N': grid.q_N,
+            'real_data': getattr(grid, 'real_data', None),
+            'use_real_power': getattr(grid, 'use_real_power', None),
+            **extra,
+        }
+        slug = re.sub(r'[^A-Za-z0-9_.-]+', '_', name or 'study')
+        study_id = f"{slug}-{meta['network_hash'][:10]}-{int(time.time() * 1000):x}"
+        suffix = 0
+        while os.path.exists(os.path.join(self.root, study_id)):
+            suffix += 1
+            study_id = f"{study_id.rsplit('~', 1)[0]}~{suffix}"
+        writer = StudyWriter(self, study_id, meta, grid.nodes, compress, chunk_rows)
+        for attr in ('betas', 'kappas'):
+            # seulement s'ils sont à jour pour la topologie et les injections courantes
+            values = grid.fresh_result(attr)
+            if values is not None:
+                writer.write_array(attr, values)
+        return writer
+
+    def find(self, grid=None, **criteria):
+        """
+        Identifiants des études correspondant aux critères (ex. source='DE1 0'),
+        et à la topologie / aux paramètres de `grid` s'il est donné.
+        """
+        if grid is not None:
+            criteria = {'network_hash': grid.topology_signature(), 'q_N': grid.q_N,
+                        'source': None if grid.ix is None else str(grid.ix),
+                        'sink': None if grid.ex is None else str(grid.ex),
+                        'real_data': getattr(grid, 'real_data', None),
+                        'use_real_power': getattr(grid, 'use_real_power', None),
+                        **criteria}
+        return [study_id for study_id, meta in sorted(self.index().items(),
+                                                      key=lambda item: item[1]['created'])
+                if all(meta.get(key) == value for key, value in criteria.items())]
+
+    def load(self, study_id):
+        index = self.index()
+        if study_id not in index:
+            raise KeyError(f"No study {study_id!r} in {self.root}")
+        return Study(self, study_id, index[study_id])
@@ -0,0 +1,281 @@
+"""
+Réseaux synthétiques de grande taille (10k à 1M bus) au format des tables PyPSA.
+
+`SyntheticNetwork` expose les attributs lus par `EuropeanGrid` (buses, lines,
+loads, generators, links, loads_t) et se construit sans pypsa ni accès
+réseau :
+
+    bus          autour de villes (tailles en loi de Zipf) et en fond diffus,
+                 répartis entre pays européens selon leur poids ; le pays d'un
+                 bus est celui du centre le plus proche, distance rapportée à
+                 l'étendue du pays (régions contiguës)
+    lignes       arbre couvrant minimal de la triangulation de Delaunay
+                 (réseau connexe et planaire) complété par les arêtes de
+                 Delaunay les plus courtes, les interconnexions étant
+                 pénalisées ; longueur = distance géodésique × détour aléatoire
+    charges      une par bus, plus fortes en ville, total `total_load` MW
+    producteurs  sur une fraction des bus, par filière, capacité totale
+                 `reserve` × charge
+    liaisons     HVDC longues (table n.links, voir EuropeanGrid.add_cables)
+
+    net = SyntheticNetwork(100_000, seed=0)
+    grid = EuropeanGrid(net, q_N=400, ix=net.buses.index[0], ex=net.buses.index[-1])
+    grid.build_from_pypsa()
+    net.export_csv("networks/synthetic_100k")      # lisible par pypsa.Network(dossier)
+
+En ligne de commande :
+
+    python synthetic.py 100000 --output networks/synthetic_100k --seed 0
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_KM = 6371.0
+
+# Pays : centre (lon, lat), poids (part des bus et de la charge), étendue (degrés)
+COUNTRIES = {
+    'ES': (-3.7, 40.2, 8.0, 3.5), 'PT': (-8.2, 39.6, 1.5, 1.5), 'FR': (2.5, 46.6, 10.0, 3.5),
+    'BE': (4.6, 50.6, 2.0, 0.8), 'NL': (5.6, 52.2, 2.5, 0.9), 'LU': (6.1, 49.8, 0.3, 0.3),
+    'DE': (10.4, 51.1, 12.0, 2.8), 'CH': (8.2, 46.8, 1.5, 0.9), 'AT': (14.5, 47.6, 1.8, 1.4),
+    'IT': (12.5, 42.8, 7.0, 3.0), 'GB': (-1.8, 52.9, 7.0, 2.5), 'IE': (-8.0, 53.2, 0.8, 1.2),
+    'DK': (9.5, 56.0, 1.0, 1.0), 'NO': (9.0, 61.0, 2.5, 2.5), 'SE': (15.5, 61.5, 3.0, 3.0),
+    'FI': (25.7, 62.5, 2.0, 2.5), 'PL': (19.1, 52.1, 4.5, 2.2), 'CZ': (15.5, 49.8, 1.8, 1.2),
+    'SK': (19.7, 48.7, 0.8, 0.8), 'HU': (19.5, 47.2, 1.0, 1.0), 'SI': (14.9, 46.1, 0.4, 0.5),
+    'HR': (16.0, 45.4, 0.6, 0.8), 'BA': (17.8, 44.2, 0.4, 0.7), 'RS': (20.9, 44.0, 0.8, 1.0),
+    'RO': (25.0, 45.9, 1.5, 1.8), 'BG': (25.5, 42.7, 0.8, 1.2), 'GR': (22.0, 39.1, 1.2, 1.5),
+    'EE': (25.0, 58.6, 0.3, 0.6), 'LV': (24.6, 56.9, 0.3, 0.7), 'LT': (23.9, 55.2, 0.4, 0.7),
+}
+
+# Filières : part du parc installé, dispersion (log) des capacités
+CARRIERS = {'CCGT': (0.20, 0.6), 'nuclear': (0.10, 0.3), 'coal': (0.10, 0.5),
+            'onwind': (0.25, 0.8), 'solar': (0.20, 0.9), 'hydro': (0.15, 0.7)}
+
+# Ligne 380 kV : capacité (MVA) et réactance / résistance (Ω/km) d'un circuit
+LINE_S_NOM, LINE_X, LINE_R = 1698.0, 0.25, 0.03
+
+
+def haversine_km(lon0, lat0, lon1, lat1):
+    """Distance géodésique (km) entre points donnés en degrés (tableaux)."""
+    lon0, lat0, lon1, lat1 = map(np.radians, (lon0, lat0, lon1, lat1))
+    h = np.sin((lat1 - lat0) / 2)**2 + np.cos(lat0) * np.cos(lat1) * np.sin((lon1 - lon0) / 2)**2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(h))
+
+
+def _project(x, y):
+    """Projection équirectangulaire (degrés de latitude) pour les calculs de voisinage."""
+    return np.column_stack([x * np.cos(np.radians(50.0)), y])
+
+
+def _delaunay_edges(points):
+    """Arêtes (i < j) de la triangulation de Delaunay ; les points écartés par qhull sont reliés à leur sommet le plus proche."""
+    from scipy.spatial import Delaunay
+
+    tri = Delaunay(points)
+    s = tri.simplices
+    edges = np.vstack([s[:, [0, 1]], s[:, [1, 2]], s[:, [0, 2]]])
+    if len(tri.coplanar):
+        edges = np.vstack([edges, tri.coplanar[:, [0, 2]]])
+    edges.sort(axis=1)
+    return np.unique(edges, axis=0)
+
+
+class SyntheticNetwork:
+    """
+    Substitut d'un pypsa.Network (buses, lines, loads, generators, links,
+    loads_t) de `n_buses` bus, reproductible par `seed`.
+
+    Args:
+        n_buses: nombre de bus
+        line_ratio: nombre de lignes par bus (≥ 1 ; environ 1.5 dans PyPSA-Eur)
+        clustering: part des bus placés autour des villes
+        n_links: liaisons HVDC (défaut : un pour mille bus)
+        total_load: charge totale (MW)
+        reserve: capacité installée / charge totale
+        gen_fraction: part des bus portant un producteur
+        countries: sous-ensemble (codes) ou dict au format de COUNTRIES
+        seed: graine
+    """
+
+    def __init__(self, n_buses, line_ratio=1.5, clustering=0.7, n_links=None,
+                 total_load=400_000.0, reserve=1.4, gen_fraction=0.3, countries=None, seed=0):
+        if n_buses < 2:
+            raise ValueError("A synthetic network needs at least 2 buses")
+        if isinstance(countries, dict):
+            table = countries
+        else:
+            table = {code: COUNTRIES[code] for code in (countries or COUNTRIES)}
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+
+        x, y, density = self._place_buses(rng, n_buses, table, clustering)
+        country = self._label_countries(x, y, table)
+        bus_ids = np.char.add(np.char.add(country.astype(str), '1 '),
+                              np.arange(n_buses).astype(str))
+        self.buses = pd.DataFrame({'x': x, 'y': y, 'country': country, 'v_nom': 380.0,
+                                   'carrier': 'AC'}, index=pd.Index(bus_ids, name='name'))
+
+        self.lines = self._build_lines(rng, x, y, country, bus_ids, line_ratio)
+        self.loads, self.generators = self._place_injections(rng, bus_ids, density, total_load,
+                                                             reserve, gen_fraction)
+        self.links = self._build_links(rng, x, y, bus_ids,
+                                       max(1, n_buses // 1000) if n_links is None else n_links)
+        self.loads_t = {}
+
+    @staticmethod
+    def _place_buses(rng, n_buses, table, clustering):
+        """Coordonnées des bus et densité locale (poids des villes) pour la charge."""
+        codes = list(table)
+        weights = np.array([table[c][2] for c in codes])
+        per_country = rng.multinomial(n_buses, weights / weights.sum())
+        x, y, density = [], [], []
+        for code, n in zip(codes, per_country):
+            if n == 0:
+                continue
+            lon, lat, _, spread = table[code]
+            n_city = int(rng.binomial(n, clustering))
+            n_cities = max(1, int(np.sqrt(n) / 2))
+            # villes : centres autour du pays, tailles en loi de Zipf
+            cx = lon + rng.normal(0, spread * 0.6, n_cities) / np.cos(np.radians(lat))
+            cy = lat + rng.normal(0, spread * 0.6, n_cities)
+            size = 1.0 / np.arange(1, n_cities + 1)
+            city = rng.choice(n_cities, n_city, p=size / size.sum())
+            radius = 0.15 + 0.35 * np.sqrt(size[city] / size[0])
+            x.append(cx[city] + rng.normal(0, 1, n_city) * radius / np.cos(np.radians(lat)))
+            y.append(cy[city] + rng.normal(0, 1, n_city) * radius)
+            density.append(1.0 + 3.0 * size[city] / size[0])
+            # fond diffus (campagnes)
+            n_rural = n - n_city
+            x.append(lon + rng.normal(0, spread, n_rural) / np.cos(np.radians(lat)))
+            y.append(lat + rng.normal(0, spread, n_rural))
+            density.append(np.full(n_rural, 0.5))
+        x, y, density = map(np.concatenate, (x, y, density))
+        order = rng.permutation(n_buses)
+        return x[order], y[order], density[order]
+
+    @staticmethod
+    def _label_countries(x, y, table, chunk=100_000):
+        """Pays du centre le plus proche en distance rapportée à l'étendue du pays (régions contiguës)."""
+        codes = np.array(list(table))
+        centers = _project(*np.array([table[c][:2] for c in codes]).T)
+        spread = np.array([table[c][3] for c in codes])
+        points = _project(x, y)
+        nearest = np.empty(len(points), dtype=int)
+        for start in range(0, len(points), chunk):
+            block = points[start:start + chunk]
+            d = np.sqrt(((block[:, None, :] - centers[None, :, :])**2).sum(axis=2))
+            nearest[start:start + chunk] = np.argmin(d / spread, axis=1)
+        return codes[nearest]
+
+    @staticmethod
+    def _build_lines(rng, x, y, country, bus_ids, line_ratio):
+        """Arbre couvrant minimal de Delaunay + arêtes courtes jusqu'à line_ratio × n lignes."""
+        import scipy.sparse as sp
+        from scipy.sparse.csgraph import minimum_spanning_tree
+
+        n = len(x)
+        edges = _delaunay_edges(_project(x, y)) if n > 2 else np.array([[0, 1]])
+        i, j = edges[:, 0], edges[:, 1]
+        distance = haversine_km(x[i], y[i], x[j], y[j]) + 1e-3
+        tree = minimum_spanning_tree(sp.csr_matrix((distance, (i, j)), shape=(n, n))).tocoo()
+        in_tree = np.zeros(len(edges), dtype=bool)
+        code = i.astype(np.int64) * n + j
+        tree_code = np.minimum(tree.row, tree.col).astype(np.int64) * n + np.maximum(tree.row, tree.col)
+        in_tree[np.isin(code, tree_code)] = True
+
+        # arêtes supplémentaires les plus courtes, interconnexions pénalisées
+        n_extra = max(0, min(int(round(line_ratio * n)) - (n - 1), int((~in_tree).sum())))
+        cost = distance * np.where(country[i] != country[j], 3.0, 1.0) * rng.uniform(0.8, 1.25, len(edges))
+        extra = np.flatnonzero(~in_tree)
+        extra = extra[np.argsort(cost[extra], kind='stable')[:n_extra]]
+        keep = np.sort(np.concatenate([np.flatnonzero(in_tree), extra]))
+
+        i, j = i[keep], j[keep]
+        length = distance[keep] * rng.uniform(1.05, 1.35, len(keep))
+        circuits = rng.choice([1, 2, 3, 4], len(keep), p=[0.5, 0.3, 0.15, 0.05])
+        return pd.DataFrame({
+            'bus0': bus_ids[i], 'bus1': bus_ids[j], 'length': length,
+            's_nom': circuits * LINE_S_NOM, 'num_parallel': circuits.astype(float),
+            'x': LINE_X * length / circuits, 'r': LINE_R * length / circuits,
+        }, index=pd.Index(np.arange(len(keep)).astype(str), name='name'))
+
+    @staticmethod
+    def _place_injections(rng, bus_ids, density, total_load, reserve, gen_fraction):
+        """Une charge par bus (plus forte en ville) ; producteurs par filière sur une fraction des bus."""
+        load = density * rng.lognormal(0.0, 0.5, len(bus_ids))
+        loads = pd.DataFrame({'bus': bus_ids, 'p_set': total_load * load / load.sum()},
+                             index=pd.Index(bus_ids, name='name'))
+
+        n_gen = max(1, int(round(gen_fraction * len(bus_ids))))
+        buses = rng.choice(bus_ids, n_gen, replace=False)
+        names = list(CARRIERS)
+        share = np.array([CARRIERS[c][0] for c in names])
+        carrier = rng.choice(len(names), n_gen, p=share / share.sum())
+        sigma = np.array([CARRIERS[c][1] for c in names])[carrier]
+        # capacité moyenne par filière ∝ part / nombre de producteurs de la filière
+        count = np.bincount(carrier, minlength=len(names))
+        mean = np.where(count > 0, share / np.maximum(count, 1), 0.0)[carrier]
+        p_nom = mean * rng.lognormal(-sigma**2 / 2, sigma)
+        p_nom *= reserve * total_load / p_nom.sum()
+        carriers = np.array(names)[carrier]
+        generators = pd.DataFrame({'bus': buses, 'p_nom': p_nom, 'carrier': carriers},
+                                  index=pd.Index(np.char.add(np.char.add(buses.astype(str), ' '),
+                                                             carriers), name='name'))
+        return loads, generators
+
+    @staticmethod
+    def _build_links(rng, x, y, bus_ids, n_links, min_km=300.0):
+        """Liaisons HVDC entre bus éloignés d'au moins `min_km`."""
+        rows = []
+        attempts = 0
+        while len(rows) < n_links and attempts < 100 * max(n_links, 1):
+            attempts += 1
+            a, b = rng.choice(len(bus_ids), 2, replace=False)
+            length = float(haversine_km(x[a], y[a], x[b], y[b]))
+            if length >= min_km:
+                rows.append((bus_ids[a], bus_ids[b], float(rng.uniform(500, 2000)), length * 1.1))
+        links = pd.DataFrame(rows, columns=['bus0', 'bus1', 'p_nom', 'length'])
+        links['carrier'] = 'DC'
+        links.index = pd.Index([f"DC {k}" for k in range(len(links))], name='name')
+        return links
+
+    def export_csv(self, folder):
+        """Écrit le réseau au format dossier CSV de PyPSA (pypsa.Network(folder))."""
+        os.makedirs(folder, exist_ok=True)
+        for name in ('buses', 'lines', 'loads', 'generators', 'links'):
+            getattr(self, name).to_csv(os.path.join(folder, f"{name}.csv"))
+        return folder
+
+    def summary(self):
+        """Tailles et totaux (bus, lignes, pays, longueurs, charge, capacité)."""
+        return {
+            'buses': len(self.buses), 'lines': len(self.lines), 'links': len(self.links),
+            'countries': int(self.buses['country'].nunique()),
+            'length_km': {'min': float(self.lines['length'].min()),
+                          'median': float(self.lines['length'].median()),
+                          'max': float(self.lines['length'].max())},
+            'load_mw': float(self.loads['p_set'].sum()),
+            'generation_mw': float(self.generators['p_nom'].sum()),
+            'generators': len(self.generators),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('n_buses', type=int)
+    parser.add_argument('--output', required=True, help="dossier CSV PyPSA à écrire")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--line-ratio', type=float, default=1.5)
+    parser.add_argument('--links', type=int, default=None, help="liaisons HVDC")
+    args = parser.parse_args(argv)
+    network = SyntheticNetwork(args.n_buses, line_ratio=args.line_ratio, n_links=args.links,
+                               seed=args.seed)
+    network.export_csv(args.output)
+    print(network.summary())
+
+
+if __name__ == '__main__':
+    main()
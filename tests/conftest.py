@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import SyntheticNetwork  # noqa: E402
+from utils import EuropeanGrid, HamiltonianGrid  # noqa: E402
+
+
+@pytest.fixture
+def lattice():
+    """Grille carrée 6×6, dipôle entre deux coins."""
+    grid = HamiltonianGrid(N=6, q_N=72, ix=0, iy=0, iw=1, ex=5, ey=5, ew=-1)
+    return grid.create_network(6)
+
+
+@pytest.fixture(scope='session')
+def network():
+    return SyntheticNetwork(300, seed=1)
+
+
+@pytest.fixture
+def european(network):
+    buses = network.buses.index
+    grid = EuropeanGrid(network, q_N=2 * len(buses), ix=buses[0], ex=buses[-1])
+    return grid.build_from_pypsa()
@@ -0,0 +1,24 @@
+import pytest
+
+import batch
+from store import ResultStore
+
+
+def test_duplicate_pairs_are_solved_once(network, tmp_path):
+    source, sink = network.buses.index[0], network.buses.index[-1]
+    written = batch.run(network, [(source, sink), (source, sink), (sink, source)],
+                        lines=list(network.lines.index[:3]), store=str(tmp_path))
+    index = ResultStore(str(tmp_path)).index()
+    assert len(written) == len(index) == 2
+    assert all(meta['deltas']['rows'] <= 3 for meta in index.values())
+
+
+def test_non_convergence_is_recorded_in_the_index(network, tmp_path):
+    source, sink = network.buses.index[0], network.buses.index[-1]
+    with pytest.warns(RuntimeWarning):
+        batch.run(network, [(source, sink)], engine='recycled', q_N=8, store=str(tmp_path))
+    batch.run(network, [(sink, source)], engine='recycled', q_N=20 * len(network.buses),
+              store=str(tmp_path))
+    converged = {meta['source']: meta['converged']
+                 for meta in ResultStore(str(tmp_path)).index().values()}
+    assert converged == {str(source): False, str(sink): True}
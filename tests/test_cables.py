@@ -0,0 +1,31 @@
+import pytest
+
+
+def test_cables_are_signed_couplings_added_in_one_bump(european):
+    buses = [bus[2:] for bus in european._nodes]
+    cables = [
+        {'name': 'North Link', 'from_node': buses[0], 'to_node': buses[50], 'capacity_mw': 1400},
+        {'name': 'South Link', 'from_node': buses[10], 'to_node': buses[60], 'capacity_mw': 700,
+         'length_km': 250.0},
+        {'name': 'Nowhere', 'from_node': buses[0], 'to_node': 'XX9 9', 'capacity_mw': 500},
+        {'name': 'North Link', 'from_node': buses[1], 'to_node': buses[2], 'capacity_mw': 100},
+    ]
+    version = european.topology_version
+    result = european.add_cables(cables)
+    assert european.topology_version == version + 1
+    assert result['added'] == ['L_Subsea_North_Link', 'L_Subsea_South_Link']
+    assert set(result['skipped']) == {'Nowhere', 'North Link'}
+
+    reference = european._capacity_reference()
+    for line, (bus0, bus1), capacity in zip(result['added'], [(0, 50), (10, 60)], [1400, 700]):
+        sqrt_b = (capacity / reference)**0.5
+        assert european[f'N_{buses[bus0]}'][line]['sign'] == pytest.approx(sqrt_b)
+        assert european[f'N_{buses[bus1]}'][line]['sign'] == pytest.approx(-sqrt_b)
+        assert line in european._lines and line in european.node_ids.ids
+
+    version = european.topology_version
+    cable = {'name': 'West Link', 'from_node': buses[20], 'to_node': buses[70], 'length_km': 250.0}
+    assert european.add_cables([cable], coupling='length')['added'] == ['L_Subsea_West_Link']
+    assert european.topology_version == version + 1
+    assert european['N_' + buses[20]]['L_Subsea_West_Link']['sign'] == pytest.approx((1 / 250.0)**0.5)
+    assert european['N_' + buses[70]]['L_Subsea_West_Link']['sign'] == pytest.approx(-(1 / 250.0)**0.5)
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+import checkpoint
+
+
+def test_save_load_round_trip(tmp_path):
+    path = str(tmp_path / 'state.npz')
+    q_prev, q_curr, psi = {'a': 1.0}, {'b': -0.5, 'L_1': 0.25}, {'L_1': 2.0}
+    checkpoint.save(path, {'q_N': 8}, 4, np.arange(8.0), [0.5, 0.25], q_prev, q_curr, psi)
+    state = checkpoint.load(path)
+    assert state['meta'] == {'q_N': 8} and state['iteration'] == 4
+    assert state['betas'].tolist() == [0.0, 1.0, 2.0, 3.0]
+    assert state['kappas'].tolist() == [0.5, 0.25]
+    assert (state['q_prev'], state['q_curr'], state['psi']) == (q_prev, q_curr, psi)
+
+
+def test_interrupted_iterations_resume(lattice, tmp_path):
+    from utils import HamiltonianGrid
+
+    path = str(tmp_path / 'run.npz')
+    lattice.iterate_qs()
+    reference = lattice.calculate_psi_approx()
+
+    interrupted = HamiltonianGrid(N=6, q_N=72, ix=0, iy=0, iw=1, ex=5, ey=5, ew=-1).create_network(6)
+    step = interrupted.calculate_q_i
+
+    def failing(i):
+        if i == 31:
+            raise KeyboardInterrupt
+        return step(i)
+    interrupted.calculate_q_i = failing
+    with pytest.raises(KeyboardInterrupt):
+        interrupted.iterate_qs(checkpoint=path, checkpoint_every=10)
+    assert checkpoint.load(path)['iteration'] == 30
+
+    resumed = HamiltonianGrid(N=6, q_N=72, ix=0, iy=0, iw=1, ex=5, ey=5, ew=-1).create_network(6)
+    resumed.iterate_qs(checkpoint=path, checkpoint_every=10)
+    psi = resumed.calculate_psi_approx()
+    assert max(abs(psi[node] - reference[node]) for node in reference) < 1e-9
+    np.testing.assert_allclose(resumed.betas, lattice.betas)
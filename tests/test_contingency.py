@@ -0,0 +1,80 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from test_outage import direct_psi
+
+
+def test_n_minus_2_matches_brute_force(european):
+    psi = direct_psi(european)
+    bridges = european.bridge_analysis()['bridges']
+    candidates = [line for line in european._lines
+                  if line not in bridges and abs(psi[line]) > 1e-6][:6]
+    combos = list(itertools.combinations(candidates, 2))
+    result = european.screen_n_k(psi, k=2, lines=candidates, threshold=0.0,
+                                 n_worst=len(combos))
+    limit = max(abs(psi[line]) for line in european._lines)
+    screened = {frozenset(entry['lines']): entry['loading'] for entry in result['worst']}
+    islanding = {frozenset(combo) for combo in result['islanding']}
+
+    for combo in combos:
+        for line in combo:
+            european.remove_element("L", line[2:])
+        if len(european.check_islanding()) > 1:
+            assert frozenset(combo) in islanding
+        else:
+            after = direct_psi(european)
+            loading = max(abs(after[line]) for line in european._lines if line in european) / limit
+            assert screened[frozenset(combo)] == pytest.approx(loading, rel=1e-6)
+        for line in combo:
+            european.restore_line(line)
+    assert result['combinations'] == len(combos)
+
+
+def test_cascade_trips_a_second_stage(european):
+    psi = direct_psi(european)
+    bridges = european.bridge_analysis()['bridges']
+    lines = [line for line in european._lines if line not in bridges]
+
+    def after_removing(cut):
+        for line in cut:
+            european.remove_line(line)
+        after = direct_psi(european) if len(european.check_islanding()) == 1 else None
+        for line in reversed(cut):
+            european.restore_line(line)
+        return after
+
+    def gains(cut, levels):
+        # lignes qui dépassent tous leurs niveaux précédents une fois `cut` coupé
+        after = after_removing(cut)
+        if after is None:
+            return None, []
+        gain = {line: abs(after[line]) - max(abs(level[line]) for level in levels)
+                for line in lines if line not in cut}
+        return after, sorted((line for line in gain if gain[line] > 1e-6), key=gain.get, reverse=True)
+
+    def find_chain():
+        # coupure initiale, puis deux déclenchements successifs sans îlotage
+        for initial in sorted(lines, key=lambda line: -abs(psi[line]))[:10]:
+            after_first, firsts = gains([initial], [psi])
+            for first in firsts[:5]:
+                after_second, seconds = gains([initial, first], [psi, after_first])
+                for second in seconds[:5]:
+                    final = after_removing([initial, first, second])
+                    if final is not None:
+                        return initial, first, second, after_first, after_second, final
+        raise AssertionError('no two-stage cascade on the fixture')
+
+    initial, first, second, after_first, after_second, final = find_chain()
+    limits = {line: np.inf for line in european._lines}
+    limits[first] = (abs(psi[first]) + abs(after_first[first])) / 2
+    reference = max(abs(psi[second]), abs(after_first[second]))
+    limits[second] = (reference + abs(after_second[second])) / 2
+
+    result = european.cascade(psi, initial, limits)
+    assert result['stages'] == [[initial], [first], [second]]
+    assert result['status'] == 'stable' and not result['islanded']
+    for line in european._lines:
+        expected = 0.0 if line in (initial, first, second) else final[line]
+        assert result['psi'][line] == pytest.approx(expected, abs=1e-8)
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from decomposition import schur_solve
+from solver import _laplacian_solver
+from test_outage import direct_psi
+from test_recycling import bus_system
+
+
+@pytest.mark.parametrize('parallel', [False, True])
+def test_schur_solve_matches_direct_solve(european, parallel):
+    L, q = bus_system(european)
+    _, buses, _ = european._bus_laplacian()
+    partition = european.partition_buses('balanced', n_parts=4)
+    result = schur_solve(L, [partition[bus] for bus in buses], q, parallel=parallel, max_workers=2)
+    x = _laplacian_solver(L)(q)
+    # potentiels définis à une constante près
+    assert np.allclose(result['x'] - result['x'].mean(), x - x.mean(), atol=1e-9)
+    assert result['residual'] < 1e-10
+    assert 0 < result['n_interface'] < len(buses)
+    assert sorted(entry['label'] for entry in result['subdomains']) == [0, 1, 2, 3]
+    assert sum(entry['n_buses'] for entry in result['subdomains']) == len(buses)
+
+
+def test_solve_decomposed_matches_direct_psi(european):
+    psi = european.solve_decomposed(by='country', parallel=False)
+    expected = direct_psi(european)
+    assert max(abs(psi[line] - expected[line]) for line in european._lines) < 1e-8
+    report = european.decomposition_report
+    assert report['partition'] == 'country' and report['residual'] < 1e-10
@@ -0,0 +1,36 @@
+import json
+
+import numpy as np
+import pytest
+
+import export
+
+
+def test_prefixed_endpoints_are_marked_special(network):
+    from utils import EuropeanGrid
+
+    buses = network.buses.index
+    grid = EuropeanGrid(network, q_N=2 * len(buses), ix=f"N_{buses[0]}", ex=buses[-1])
+    grid.build_from_pypsa()
+    specials = [node['id'] for node in export.topology_record(grid)['nodes'] if node['special']]
+    assert sorted(specials) == sorted([f"N_{buses[0]}", f"N_{buses[-1]}"])
+
+
+def test_lattice_endpoints(lattice):
+    assert export.endpoint_nodes(lattice) == ['N_0_0', 'N_5_5']
+
+
+def test_non_finite_values_are_written_as_null(lattice, tmp_path):
+    path = str(tmp_path / 'run.jsonl')
+    values = np.zeros(len(lattice.nodes))
+    values[:3] = [np.nan, np.inf, -np.inf]
+    values[3] = 1.5
+    with export.GraphStream(path, lattice, dtype='float64') as stream:
+        stream.write_frame(2, values)
+    with open(path) as f:
+        for line in f:
+            json.loads(line, parse_constant=lambda name: pytest.fail(f"{name} in JSON"))
+    _, frames = export.read_stream(path)
+    (iteration, field, read), = list(frames)
+    assert iteration == 2 and field == 'psi'
+    assert np.isnan(read[:3]).all() and read[3] == 1.5 and not read[4:].any()
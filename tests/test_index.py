@@ -0,0 +1,57 @@
+import pytest
+
+from utils import IndexSet, NodeTable
+
+
+def test_index_set_keeps_insertion_order():
+    s = IndexSet(range(6))
+    s.remove(2)
+    s.append(2)
+    s.discard(99)
+    assert list(s) == [0, 1, 3, 4, 5, 2]
+    assert s[0] == 0 and s[-1] == 2 and s[2:4] == [3, 4]
+    assert s.index(2) == 5 and len(s) == 6 and 2 in s
+
+
+def test_index_set_missing_items():
+    s = IndexSet(['a'])
+    s.remove('a')
+    with pytest.raises(ValueError):
+        s.index('a')
+    with pytest.raises(KeyError):
+        s.remove('a')
+    assert len(s) == 0 and list(s) == []
+
+
+def test_index_set_positional_access_after_many_removals():
+    s = IndexSet(range(1000))
+    for item in range(0, 1000, 2):
+        s.remove(item)
+    assert [s[i] for i in range(len(s))] == list(range(1, 1000, 2))
+    assert s.index(999) == 499
+
+
+def test_node_table_round_trip():
+    table = NodeTable()
+    assert table.intern('N_DE1 0') == 0
+    assert table.intern('L_380', is_line=True) == 1
+    assert table.intern('N_DE1 0') == 0 and len(table) == 2
+    assert table.bus('DE1 0') == table.bus('N_DE1 0') == 0 and table.bus('380') is None
+    assert table.line('380') == table.line('L_380') == 1 and table.line('DE1 0') is None
+    vector = {'N_DE1 0': 0.5, 'L_380': -1.0}
+    assert table.interned(vector) == {0: 0.5, 1: -1.0}
+    assert table.named(table.interned(vector)) == vector
+    assert list(table.is_line) == [0, 1] and list(table.active) == [1, 1]
+
+
+def test_node_ids_survive_outages(european):
+    table = european.node_ids
+    ids = dict(table.ids)
+    assert [table.names[k] for k in ids.values()] == list(ids)
+    line, bus = next(iter(european._lines)), next(iter(european._nodes))
+    european.remove_line(line)
+    european.remove_bus(bus)
+    assert not table.active[ids[line]] and not table.active[ids[bus]]
+    european.restore_all()
+    assert table.ids == ids and table.active[ids[line]] and table.active[ids[bus]]
+    assert table.bus(bus[2:]) == ids[bus] and table.line(line[2:]) == ids[line]
@@ -0,0 +1,47 @@
+import threading
+
+import instrumentation
+
+
+def test_disabled_by_default(lattice):
+    assert not instrumentation.enabled()
+    lattice.iterate_qs()
+    with instrumentation.collect() as metrics:
+        assert instrumentation.enabled()
+    assert not instrumentation.enabled()
+    assert metrics.phases == {}
+
+
+def test_collect_times_phases_and_counts_iterations(lattice):
+    with instrumentation.collect() as metrics:
+        lattice.iterate_qs()
+        lattice.calculate_psi_approx()
+        lattice.precision_report()
+    data = metrics.to_dict()
+    assert data['phases']['iterate_qs']['calls'] == 1
+    assert data['phases']['calculate_psi_approx']['calls'] == 1
+    assert data['counters']['lanczos_iterations'] > 0
+    assert 'grid_phase_calls_total{phase="iterate_qs"} 1' in metrics.to_prometheus()
+
+
+def test_threads_collect_separately_and_merge():
+    totals = instrumentation.Metrics()
+    barrier = threading.Barrier(2)
+
+    def request(name, calls):
+        with instrumentation.collect() as metrics:
+            barrier.wait()
+            for _ in range(calls):
+                with instrumentation.phase(name):
+                    instrumentation.count('requests')
+        assert set(metrics.phases) == {name}
+        totals.merge(metrics)
+
+    threads = [threading.Thread(target=request, args=(name, calls))
+               for name, calls in (('a', 3), ('b', 5))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert totals.phases['a']['calls'] == 3 and totals.phases['b']['calls'] == 5
+    assert totals.counters['requests'] == 8
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+import kpm
+from solver import _laplacian_solver
+
+
+def test_dos_is_normalised(lattice):
+    _, _, H = lattice.compiled_hamiltonian()
+    result = kpm.dos(H, n_moments=128, n_random=8, seed=0)
+    assert result['moments'][0] == pytest.approx(1.0)
+    energies, density = result['energies'], result['dos']
+    integral = np.sum(np.diff(energies) * (density[1:] + density[:-1]) / 2)
+    assert integral == pytest.approx(1.0, abs=0.02)
+
+
+def test_resistance_extrapolation_removes_eta_bias(lattice):
+    index, position, H = lattice.compiled_hamiltonian()
+    buses = [node for node in index if lattice._is_bus(node)]
+    rows = [position[bus] for bus in buses]
+    injections = lattice.injection_vector()
+    q = np.array([injections.get(bus, 0.0) for bus in buses])
+    L = (H @ H)[rows][:, rows]
+    exact = q @ _laplacian_solver(L)(q)
+
+    result = kpm.resistance(H, q, rows, n_moments=512)
+    assert result['value_eta'] < exact
+    assert result['bias'] > 0
+    assert abs(result['value'] - exact) < abs(result['value_eta'] - exact) / 10
+    raw = kpm.resistance(H, q, rows, n_moments=512, extrapolate=False)
+    assert raw['value'] == raw['value_eta'] == result['value_eta']
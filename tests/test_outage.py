@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from solver import _laplacian_solver
+
+
+def direct_psi(grid):
+    """ψ par résolution directe du laplacien des bus (référence)."""
+    _, buses, L = grid._bus_laplacian()
+    injections = grid.injection_vector()
+    q = np.array([injections.get(bus, 0.0) for bus in buses])
+    return grid._line_currents(buses, _laplacian_solver(L)(q / np.linalg.norm(q)))
+
+
+def test_line_outage_delta_matches_direct_solve(european):
+    psi_before = direct_psi(european)
+    for _ in range(5):
+        bridges = european.bridge_analysis()['bridges']
+        line = next(line for line in european._lines
+                    if line not in bridges and abs(psi_before[line]) > 1e-6)
+        delta = european.line_outage_delta(line, psi_before)
+        assert delta[line] == pytest.approx(-psi_before[line])
+        european.remove_element("L", line[2:])
+        psi_after = direct_psi(european)
+        error = max(abs(psi_before[node] + delta.get(node, 0.0) - psi_after[node])
+                    for node in psi_after if node in european._lines)
+        assert error < 1e-8 * max(abs(value) for value in psi_after.values())
+        psi_before = psi_after
+
+
+def test_line_outage_delta_rejects_bridges(european):
+    psi = direct_psi(european)
+    bridge = next(iter(european.bridge_analysis()['bridges']), None)
+    if bridge is None:
+        pytest.skip("réseau sans pont")
+    with pytest.raises(ValueError):
+        european.line_outage_delta(bridge, psi)
+
+
+def test_local_outage_delta_converges_to_the_exact_delta(european):
+    psi = direct_psi(european)
+    bridges = european.bridge_analysis()['bridges']
+    line = next(line for line in european._lines
+                if line not in bridges and abs(psi[line]) > 1e-6)
+    exact = european.line_outage_delta(line, psi)
+    local = european.local_line_outage_delta(line, psi, hops=len(european), drop_tol=1e-12)
+    scale = max(abs(value) for value in exact.values())
+    assert max(abs(exact.get(node, 0.0) - local.get(node, 0.0))
+               for node in set(exact) | set(local)) < 1e-6 * scale
+
+
+def test_local_outage_delta_error_estimate(european):
+    psi = direct_psi(european)
+    bridges = european.bridge_analysis()['bridges']
+    line = next(line for line in european._lines
+                if line not in bridges and abs(psi[line]) > 1e-6)
+    european.local_line_outage_delta(line, psi, hops=1, check=True)
+    assert 0 <= european.local_report['error_estimate'] < 2
+    # Région = bloc entier dans les deux calculs : pas d'erreur de troncature
+    european.local_line_outage_delta(line, psi, hops=len(european), drop_tol=1e-12, check=True)
+    assert european.local_report['error_estimate'] < 1e-6
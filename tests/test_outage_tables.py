@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from test_outage import direct_psi
+
+
+def test_line_power_matches_a_loop_over_buses(european):
+    psi = direct_psi(european)
+    rng = np.random.default_rng(0)
+    bus_power = {bus[2:]: value for bus, value in
+                 zip(european._nodes, rng.uniform(-500, 500, len(european._nodes)))}
+    power, scale = european.estimate_line_power(psi, bus_power)
+    ratios = []
+    for bus in european._nodes:
+        p_bus = abs(bus_power[bus[2:]])
+        psi_sum = sum(abs(psi.get(line, 0.0)) for line in european.adj[bus] if line in european._lines)
+        if p_bus >= 1.0 and psi_sum > 1e-3:
+            ratios.append(p_bus / psi_sum)
+    assert scale == pytest.approx(np.median(ratios))
+    for line in european._lines:
+        assert power[line] == pytest.approx(abs(psi[line]) * scale)
+
+
+def test_outage_tables_match_a_loop_over_outages(european):
+    psi = direct_psi(european)
+    lines = list(european._lines)[:40]
+    outages = european.screen_line_outages(psi, lines)
+    tables = european.outage_tables(psi, outages, scale_factor=2.0, top_n=5, chunk=7)
+    assert set(tables) == {line for line in lines if not outages[line]['islanding']}
+    for cut, table in tables.items():
+        delta = outages[cut]['delta']
+        increase = {line: abs(psi[line] + delta.get(line, 0.0)) - abs(psi[line])
+                    for line in european._lines if line != cut}
+        expected = sorted(increase.values(), reverse=True)[:5]
+        assert table['Δ|ψ|'].to_numpy() == pytest.approx(expected, abs=1e-12)
+        for name, value in zip(table['Ligne'], table['Δ|ψ|']):
+            assert increase['L_' + name] == pytest.approx(value, abs=1e-12)
+        assert table['ΔP (MW)'].to_numpy() == pytest.approx(2.0 * np.array(expected), abs=1e-12)
@@ -0,0 +1,12 @@
+def test_float32_report_matches_float64(lattice):
+    report = lattice.precision_report('float32')
+    assert report['iterations']['float32'] == report['iterations']['float64']
+    assert report['R_eff_rel_error'] < 1e-5
+    assert report['psi_max_rel_error'] < 1e-5
+    assert report['snapshot_bytes']['float32'] * 2 == report['snapshot_bytes']['float64']
+
+
+def test_float32_report_on_a_large_grid(european):
+    report = european.precision_report('float32')
+    assert report['R_eff_rel_error'] < 1e-2
+    assert report['snapshot_bytes']['float32'] < report['snapshot_bytes']['float64']
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from solver import _laplacian_solver, deflated_cg
+
+
+def bus_system(grid):
+    _, buses, L = grid._bus_laplacian()
+    injections = grid.injection_vector()
+    q = np.array([injections.get(bus, 0.0) for bus in buses])
+    return L, q / np.linalg.norm(q)
+
+
+def test_deflated_cg_keeps_a_bounded_ritz_basis(european):
+    L, b = bus_system(european)
+    plain = deflated_cg(L, b, tol=1e-12, max_iter=10 * len(b), n_ritz=8, window=16)
+    assert plain['W'].shape == (len(b), 8)
+    x = _laplacian_solver(L)(b)
+    assert np.allclose(plain['x'] - plain['x'].mean(), x - x.mean(), atol=1e-8)
+
+    rng = np.random.default_rng(0)
+    c = rng.standard_normal(len(b))
+    c -= c.mean()
+    reference = deflated_cg(L, c, tol=1e-10, max_iter=10 * len(b))
+    recycled = deflated_cg(L, c, plain['W'], plain['LW'], tol=1e-10, max_iter=10 * len(b))
+    assert recycled['iterations'] < reference['iterations']
+    difference = recycled['x'] - reference['x']
+    assert np.abs(difference - difference.mean()).max() < 1e-6 * np.abs(reference['x']).max()
+
+
+def test_solve_recycled_falls_back_to_plain_cg(european):
+    european.solve_recycled(n_deflation=8)
+    assert european.recycle_report['deflation_size'] == 0
+    # Référence CG simple irréalistement rapide : le recyclage n'est pas rentable
+    european._plain_cg = european._plain_cg[:2] + (0.0, True)
+    european.solve_recycled(n_deflation=8)
+    assert european.recycle_report['deflation_size'] == 8
+    assert european.recycle_report['recycling'] is False
+    european.solve_recycled(n_deflation=8)
+    assert european.recycle_report['deflation_size'] == 0
+    assert european._recycled is None
+
+
+def test_solve_recycled_warns_when_not_converged(european):
+    with pytest.warns(RuntimeWarning, match='résidu'):
+        european.solve_recycled(max_iter=3)
+    assert european.recycle_report['converged'] is False
+    # Une résolution tronquée ne sert pas de référence au recyclage
+    assert european._plain_cg is None
+    european.solve_recycled()
+    assert european.recycle_report['converged'] is True
+    assert european.recycle_report['residual'] <= 1e-10
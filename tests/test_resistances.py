@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+
+
+def test_sketch_matches_exact_resistances(european):
+    exact = european.line_resistances(exact=True)
+    n_lines = len(exact['R_eff'])
+    sketch = european.line_resistances(n_projections=200, seed=0)
+    # le défaut (epsilon=0.3) demanderait plus de projections que de lignes : chemin exact
+    assert 200 < n_lines and not sketch['exact'] and sketch['n_projections'] == 200
+
+    lines = [line for line, value in exact['R_eff'].items() if np.isfinite(value)]
+    error = np.array([sketch['R_eff'][line] / exact['R_eff'][line] - 1 for line in lines])
+    assert np.median(np.abs(error)) < 0.1
+    assert np.max(np.abs(error)) < 0.5
+    # Foster : Σ leverage = bus - composantes, exactement et en moyenne pour l'estimateur
+    buses = sum(1 for node in european if european._is_bus(node))
+    assert np.nansum(list(exact['leverage'].values())) == pytest.approx(buses - 1)
+    assert np.nansum(list(sketch['leverage'].values())) == pytest.approx(buses - 1, rel=0.02)
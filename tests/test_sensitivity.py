@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from test_outage import direct_psi
+
+
+def susceptance(grid, line):
+    return next(iter(grid.adj[line].values()))['sign']**2
+
+
+def test_gradient_matches_central_differences(european):
+    psi = direct_psi(european)
+    bridges = european.bridge_analysis()['bridges']
+    loaded = sorted((line for line in european._lines if line not in bridges),
+                    key=lambda line: -abs(psi[line]))[:20]
+    sensitivity = european.susceptance_sensitivity(loaded)
+    # cible dans un grand bloc biconnexe : beaucoup de lignes l'influencent
+    target = max(loaded, key=lambda line: sum(abs(value) > 1e-9 for value
+                                              in sensitivity['gradient'][line].values()))
+    assert sensitivity['psi'][target] == pytest.approx(psi[target])
+    gradient = sensitivity['gradient'][target]
+
+    finite = [line for line in gradient if np.isfinite(gradient[line])]
+    coupled = sorted((line for line in finite if abs(gradient[line]) > 1e-9),
+                     key=lambda line: -abs(gradient[line]))
+    assert len(coupled) > 10
+    for line in dict.fromkeys([target] + coupled[:5] + coupled[5::len(coupled) // 5] + finite[::90]):
+        b = susceptance(european, line)
+        step = 1e-4 * b
+        european.set_susceptance(line, b + step)
+        upper = abs(direct_psi(european)[target])
+        european.set_susceptance(line, b - step)
+        lower = abs(direct_psi(european)[target])
+        european.set_susceptance(line, b)
+        assert gradient[line] == pytest.approx((upper - lower) / (2 * step), rel=1e-4, abs=1e-6)
+
+    elasticity = sensitivity['elasticity'][target]
+    assert elasticity[target] == pytest.approx(susceptance(european, target) * gradient[target])
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from shared import SharedCache, cache_key
+from utils import EuropeanGrid
+
+
+def test_publish_then_attach_read_only(tmp_path):
+    cache = SharedCache(str(tmp_path))
+    key = cache_key('test', 1, 'a')
+    arrays = cache.get_or_create(key, lambda: {'x': np.arange(5.0), 'names': np.array(['a', 'b'])})
+    assert cache.keys() == [key]
+    # un autre processus s'y rattache sans recalcul
+    other = SharedCache(str(tmp_path))
+    attached = other.get_or_create(key, lambda: pytest.fail('entry rebuilt'))
+    np.testing.assert_array_equal(attached['x'], arrays['x'])
+    assert attached['names'].tolist() == ['a', 'b']
+    assert isinstance(attached['x'], np.memmap) and not attached['x'].flags.writeable
+    assert other.update_state({'bus_in': 'DE1 0'})['version'] == 1
+    assert cache.update_state({'bus_out': 'ES1 21'}) == {'version': 2, 'bus_in': 'DE1 0',
+                                                          'bus_out': 'ES1 21'}
+
+
+def test_grids_share_hamiltonian_factors_and_baseline(network, european, tmp_path):
+    psi = european.shared_baseline()['psi']
+    _, _, H = european.compiled_hamiltonian()
+    lines, D = european.outage_factors()
+
+    european.share_caches(SharedCache(str(tmp_path)))
+    european.compiled_hamiltonian()
+    european.outage_factors()
+    european.shared_baseline()
+
+    buses = network.buses.index
+    worker = EuropeanGrid(network, q_N=2 * len(buses), ix=buses[0], ex=buses[-1])
+    worker.build_from_pypsa().share_caches(SharedCache(str(tmp_path)))
+    worker.line_outage_delta = lambda *args: pytest.fail('outage factors recomputed')
+    _, _, shared_H = worker.compiled_hamiltonian()
+    assert not shared_H.data.flags.writeable  # vue sur la projection, sans copie
+    assert abs(shared_H - H).max() == 0
+    shared_lines, shared_D = worker.outage_factors()
+    assert shared_lines == lines
+    np.testing.assert_allclose(shared_D, D, atol=1e-12)
+    baseline = worker.shared_baseline()['psi']
+    assert max(abs(baseline[node] - value) for node, value in psi.items()) < 1e-12
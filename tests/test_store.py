@@ -0,0 +1,53 @@
+import multiprocessing
+
+import numpy as np
+
+from store import ResultStore
+
+
+def test_study_round_trip(lattice, tmp_path):
+    lattice.iterate_qs()
+    psi = lattice.calculate_psi_approx()
+    store = ResultStore(str(tmp_path))
+    line = next(iter(lattice._lines))
+    delta = {line: -1.0, next(iter(lattice._nodes)): 0.5}
+    with store.create(lattice, name='lattice', chunk_rows=2) as writer:
+        writer.write_array('psi', psi)
+        for _ in range(3):
+            writer.append_delta(line, delta)
+        writer.write_table('islanding', {'line': np.array(['L_x'], dtype=str)})
+
+    assert store.find(lattice) == [writer.study_id]
+    study = store.load(writer.study_id)
+    assert study.psi_dict() == {node: psi.get(node, 0.0) for node in lattice.nodes}
+    np.testing.assert_array_equal(study.betas, lattice.betas)
+    assert study.has_delta(line) and study.delta(line) == delta
+    assert len(study.deltas) == 3 and len(study.meta['deltas']['files']) == 2
+    np.testing.assert_array_equal(study.deltas[2], study.deltas[0])
+    assert study.table('islanding')['line'].tolist() == ['L_x']
+
+
+def test_stale_results_are_not_written(lattice, tmp_path):
+    lattice.iterate_qs()
+    assert lattice.fresh_result('betas') is not None
+    lattice.remove_line(next(iter(lattice._lines)))
+    assert lattice.fresh_result('betas') is None
+    writer = ResultStore(str(tmp_path)).create(lattice)
+    writer.close()
+    assert writer.meta['arrays'] == {}
+
+
+def _register_many(root, worker):
+    store = ResultStore(root)
+    for k in range(20):
+        store._register(f"{worker}-{k}", {'created': str(k)})
+
+
+def test_concurrent_registrations_are_all_kept(tmp_path):
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_register_many, args=(str(tmp_path), w)) for w in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+    assert len(ResultStore(str(tmp_path)).index()) == 80
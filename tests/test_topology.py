@@ -0,0 +1,46 @@
+import networkx as nx
+
+from topology import ComponentTracker
+
+
+def bus_components(graph):
+    return sorted(len([node for node in component if graph._is_bus(node)])
+                  for component in nx.connected_components(graph))
+
+
+def test_tracker_follows_removals_and_restores(european):
+    lines = list(european._lines)[:40]
+    for line in lines:
+        european.remove_element("L", line[2:])
+        tracked = sorted(len([node for node in members if european._is_bus(node)])
+                         for members in european.components())
+        assert tracked == bus_components(european)
+    for line in reversed(lines):
+        european.restore_line(line)
+    assert len(european.components()) == nx.number_connected_components(european)
+    rebuilt = ComponentTracker(european)
+    assert sorted(map(len, rebuilt.components())) == sorted(map(len, european.components()))
+
+
+def test_tracker_rebuilds_after_edge_only_mutation(european):
+    european.components()
+    line = next(iter(european.bridge_analysis()['bridges']))
+    bus = next(iter(european.adj[line]))
+    # même nombre de nœuds : seule la version signale la mutation
+    european.remove_edge(line, bus)
+    european._bump_topology()
+    assert len(european.components()) == nx.number_connected_components(european)
+
+
+def test_bridges_match_brute_force(european):
+    analysis = european.bridge_analysis()
+    n_components = nx.number_connected_components(european)
+    for line in list(european._lines):
+        graph = nx.Graph(european)
+        graph.remove_node(line)
+        islands = nx.number_connected_components(graph)
+        # Une ligne pendante retirée ne laisse pas de composante en plus
+        assert (line in analysis['bridges']) == (islands > n_components
+                                                  and len(european.adj[line]) == 2)
+    for line, block in analysis['block_of'].items():
+        assert line in analysis['blocks'][block]
@@ -0,0 +1,435 @@
+"""
+Analyse de connexité du graphe bus–ligne.
+
+`ComponentTracker` maintient les étiquettes de composantes connexes de manière
+incrémentale : une suppression ne parcourt que le plus petit morceau détaché,
+une restauration fusionne les étiquettes voisines.
+
+`bridge_analysis` repère en temps linéaire les lignes critiques (ponts) et les
+blocs biconnexes, pour court-circuiter les coupures qui îlotent le réseau et
+limiter les recalculs au bloc touché.
+
+`neighborhood` et `block_region` délimitent les régions des calculs de
+coupure locaux.
+
+`ComponentMixin` expose le suivi aux grilles (composantes, bilan des îlots,
+résolution îlot par îlot).
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from instrumentation import instrumented
+
+
+class ComponentTracker:
+    def __init__(self, graph):
+        self.graph = graph
+        self.labels = {}  # node -> étiquette
+        self.members = {}  # étiquette -> set(nodes)
+        self._next_label = 0
+        self.version = None
+        self.build()
+
+    def build(self):
+        self.labels.clear()
+        self.members.clear()
+        self.version = self._graph_version()
+        for start in self.graph.nodes:
+            if start in self.labels:
+                continue
+            label = self._new_label()
+            self.members[label] = {start}
+            self.labels[start] = label
+            queue = deque([start])
+            while queue:
+                node = queue.popleft()
+                for nbr in self.graph.adj[node]:
+                    if nbr not in self.labels:
+                        self.labels[nbr] = label
+                        self.members[label].add(nbr)
+                        queue.append(nbr)
+
+    def _new_label(self):
+        label = self._next_label
+        self._next_label += 1
+        return label
+
+    def _graph_version(self):
+        # graphe sans compteur de mutations : seul le nombre de nœuds est vérifiable
+        return getattr(self.graph, 'topology_version', None), self.graph.number_of_nodes()
+
+    def in_sync(self):
+        """
+        True si aucune mutation n'a échappé au suivi depuis la dernière mise à
+        jour : `topology_version` du graphe (incrémenté par toute mutation de
+        l'API des grilles, arêtes comprises) et nombre de nœuds inchangés.
+        """
+        return self.version == self._graph_version()
+
+    def components(self):
+        """Composantes (ensembles de nœuds), de la plus grande à la plus petite."""
+        return sorted(self.members.values(), key=len, reverse=True)
+
+    def on_remove(self, node, neighbors):
+        """À appeler après le retrait de `node` du graphe (et l'incrément de sa version)."""
+        label = self.labels.pop(node)
+        self.members[label].discard(node)
+        if not self.members[label]:
+            del self.members[label]
+        else:
+            self._split(label, [nbr for nbr in neighbors if nbr in self.labels])
+        self.version = self._graph_version()
+
+    def on_restore(self, node):
+        """À appeler après le rajout de `node` (et de ses arêtes) dans le graphe."""
+        neighbor_labels = {self.labels[nbr] for nbr in self.graph.adj[node] if nbr in self.labels}
+        if not neighbor_labels:
+            label = self._new_label()
+            self.members[label] = set()
+        else:
+            label = max(neighbor_labels, key=lambda lab: len(self.members[lab]))
+            # On renomme les plus petites composantes dans la plus grande
+            for other in neighbor_labels - {label}:
+                for member in self.members.pop(other):
+                    self.labels[member] = label
+                    self.members[label].add(member)
+        self.labels[node] = label
+        self.members[label].add(node)
+        self.version = self._graph_version()
+
+    def _split(self, label, seeds):
+        """
+        Parcours en largeur simultanés depuis chaque voisin du nœud retiré.
+        Deux parcours qui se rencontrent fusionnent ; un parcours épuisé est une
+        nouvelle composante. On s'arrête dès qu'il ne reste qu'un parcours actif,
+        si bien que le coût est borné par la taille des morceaux détachés.
+        """
+        visited = {}
+        groups = {}
+        alias = {}
+        for gid, seed in enumerate(seeds):
+            if seed in visited:
+                continue
+            visited[seed] = gid
+            alias[gid] = gid
+            groups[gid] = (deque([seed]), {seed})
+
+        def find(gid):
+            while alias[gid] != gid:
+                gid = alias[gid]
+            return gid
+
+        while len(groups) > 1:
+            for gid in list(groups):
+                if gid not in groups or len(groups) == 1:
+                    continue
+                frontier, nodes = groups[gid]
+                if not frontier:
+                    del groups[gid]
+                    new_label = self._new_label()
+                    self.members[label] -= nodes
+                    self.members[new_label] = nodes
+                    for member in nodes:
+                        self.labels[member] = new_label
+                    continue
+                node = frontier.popleft()
+                for nbr in self.graph.adj[node]:
+                    owner = visited.get(nbr)
+                    if owner is None:
+                        visited[nbr] = gid
+                        nodes.add(nbr)
+                        frontier.append(nbr)
+                        continue
+                    other = find(owner)
+                    if other != gid:
+                        other_frontier, other_nodes = groups.pop(other)
+                        frontier.extend(other_frontier)
+                        nodes |= other_nodes
+                        alias[other] = gid
+
+
+def bridge_analysis(graph):
+    """
+    Ponts et blocs biconnexes du réseau bus–ligne, en un seul parcours (Tarjan).
+
+    Chaque nœud-ligne relié à deux bus est une arête du multigraphe des bus
+    (les lignes parallèles ne sont donc jamais des ponts). Couper un pont
+    îlote le réseau ; un dipôle injecté aux extrémités d'une ligne ne fait
+    circuler de courant que dans son bloc biconnexe.
+
+    Returns:
+        dict avec
+          'bridges': set des nœuds-lignes dont la coupure îlote le réseau
+          'articulation_points': set des bus d'articulation
+          'block_of': nœud-ligne -> étiquette de bloc
+          'blocks': étiquette -> liste de nœuds-lignes
+          'endpoints': nœud-ligne -> (bus0, bus1)
+    """
+    endpoints = {}
+    adjacency = {}
+    block_of = {}
+    blocks = {}
+    for node, node_type in graph.nodes(data='type'):
+        if node_type != 'line':
+            adjacency.setdefault(node, [])
+            continue
+        buses = list(graph.adj[node])
+        if len(buses) == 2:
+            u, v = buses
+            endpoints[node] = (u, v)
+            adjacency.setdefault(u, []).append((v, node))
+            adjacency.setdefault(v, []).append((u, node))
+        else:
+            # Ligne pendante : sa coupure n'isole aucun bus
+            block_of[node] = len(blocks)
+            blocks[len(blocks)] = [node]
+
+    disc, low = {}, {}
+    bridges, articulation_points = set(), set()
+    edge_stack = []
+    counter = 0
+    for root in adjacency:
+        if root in disc:
+            continue
+        disc[root] = low[root] = counter
+        counter += 1
+        root_children = 0
+        stack = [(root, None, iter(adjacency[root]))]
+        while stack:
+            node, via, neighbors = stack[-1]
+            for nbr, line in neighbors:
+                if line == via:
+                    continue
+                if nbr not in disc:
+                    disc[nbr] = low[nbr] = counter
+                    counter += 1
+                    edge_stack.append(line)
+                    stack.append((nbr, line, iter(adjacency[nbr])))
+                    if node == root:
+                        root_children += 1
+                    break
+                if disc[nbr] < disc[node]:
+                    low[node] = min(low[node], disc[nbr])
+                    edge_stack.append(line)
+            else:
+                stack.pop()
+                if not stack:
+                    continue
+                parent = stack[-1][0]
+                low[parent] = min(low[parent], low[node])
+                if low[node] >= disc[parent]:
+                    if parent != root:
+                        articulation_points.add(parent)
+                    if low[node] > disc[parent]:
+                        bridges.add(via)
+                    label = len(blocks)
+                    blocks[label] = []
+                    while True:
+                        line = edge_stack.pop()
+                        blocks[label].append(line)
+                        block_of[line] = label
+                        if line == via:
+                            break
+        if root_children > 1:
+            articulation_points.add(root)
+
+    return {
+        'bridges': bridges,
+        'articulation_points': articulation_points,
+        'block_of': block_of,
+        'blocks': blocks,
+        'endpoints': endpoints,
+    }
+
+
+def neighborhood(graph, center, hops):
+    """
+    Bus à au plus `hops` lignes de `center` (un bus, ou une ligne : ses
+    extrémités comptent pour 0), plus les lignes dont les deux extrémités sont
+    dans la région.
+    """
+    seeds = list(graph.adj[center]) if graph.nodes[center].get('type') == 'line' else [center]
+    buses = set(seeds)
+    frontier = seeds
+    for _ in range(hops):
+        next_frontier = []
+        for bus in frontier:
+            for line in graph.adj[bus]:
+                for nbr in graph.adj[line]:
+                    if nbr not in buses:
+                        buses.add(nbr)
+                        next_frontier.append(nbr)
+        frontier = next_frontier
+    return buses | enclosed_lines(graph, buses)
+
+
+def enclosed_lines(graph, buses):
+    """Lignes dont toutes les extrémités sont dans `buses`."""
+    return {line for bus in buses for line in graph.adj[bus]
+            if all(end in buses for end in graph.adj[line])}
+
+
+def block_region(graph, analysis, line_node, region):
+    """
+    Partie de `region` dans le bloc biconnexe de `line_node`, sans la ligne
+    elle-même (filtrage en O(région) sur `analysis`, sortie de
+    `bridge_analysis`).
+
+    Returns:
+        (région filtrée, True si les extrémités de la ligne y restent reliées)
+    """
+    block_of, block = analysis['block_of'], analysis['block_of'][line_node]
+    region = {node for node in region
+              if node != line_node
+              and (block_of.get(node) == block if graph.nodes[node].get('type') == 'line'
+                   else any(block_of.get(line) == block for line in graph.adj[node]))}
+    start, *others = analysis['endpoints'][line_node]
+    reached, frontier = {start}, [start]
+    while frontier:
+        node = frontier.pop()
+        for nbr in graph.adj[node]:
+            if nbr in region and nbr not in reached:
+                reached.add(nbr)
+                frontier.append(nbr)
+    return region, all(bus in reached for bus in others)
+
+
+class ComponentMixin:
+    """
+    Composantes connexes des grilles mutables : le suivi incrémental est tenu
+    à jour par les retraits / restaurations et reconstruit s'il a décroché.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._component_tracker = None
+
+    def _stash_node(self, node_id, index):
+        tracker = self._live_tracker()
+        neighbors = list(self.adj[node_id]) if node_id in self else []
+        super()._stash_node(node_id, index)
+        if tracker is not None:
+            tracker.on_remove(node_id, neighbors)
+
+    def _unstash_node(self, node_id, index):
+        tracker = self._live_tracker()
+        super()._unstash_node(node_id, index)
+        if tracker is not None:
+            tracker.on_restore(node_id)
+
+    def _live_tracker(self):
+        """Le suivi incrémental, s'il existe et correspond encore au graphe."""
+        tracker = self._component_tracker
+        if tracker is not None and not tracker.in_sync():
+            self._component_tracker = tracker = None
+        return tracker
+
+    def _tracker(self):
+        if self._live_tracker() is None:
+            self._component_tracker = ComponentTracker(self)
+        return self._component_tracker
+
+    def components(self):
+        """Composantes connexes (ensembles de nœuds), la plus grande d'abord."""
+        return self._tracker().components()
+
+    def component_of(self, node_id):
+        return self._tracker().labels[node_id]
+
+    def check_islanding(self, tol=1e-9):
+        """
+        Bilan des injections par îlot (composante contenant au moins un bus).
+
+        Un îlot est équilibré si la somme de ses injections est nulle : c'est la
+        condition pour que H|ψ⟩ = P y ait une solution.
+
+        Returns:
+            liste de dicts (un par îlot, le plus grand d'abord)
+        """
+        injections = self.injection_vector()
+        scale = sum(abs(p) for p in injections.values()) or 1.0
+        report = []
+        for label, members in self._tracker().members.items():
+            buses = [node for node in members if self._is_bus(node)]
+            if not buses:
+                continue
+            total = float(sum(injections.get(bus, 0.0) for bus in buses))
+            report.append({
+                'component': label,
+                'n_buses': len(buses),
+                'n_lines': len(members) - len(buses),
+                'injection': total,
+                'has_injection': any(injections.get(bus, 0.0) != 0 for bus in buses),
+                'balanced': bool(abs(total) <= tol * scale),
+            })
+        report.sort(key=lambda entry: entry['n_buses'], reverse=True)
+        return report
+
+    @instrumented('solve_components')
+    def solve_components(self, rebalance=False, parallel=False, max_workers=None, tol=1e-9,
+                         precision='float64'):
+        """
+        Résout H|ψ⟩ = P indépendamment sur chaque îlot alimenté.
+
+        Les îlots dont l'injection ne s'équilibre pas sont signalés dans
+        `self.island_report` et laissés à ψ = 0, sauf si `rebalance=True` :
+        l'écart est alors réparti uniformément sur les bus de l'îlot.
+
+        Args:
+            rebalance: équilibrer les îlots déséquilibrés au lieu de les ignorer
+            parallel: un processus par îlot (ProcessPoolExecutor)
+            max_workers: nombre de processus si parallel=True
+            tol: tolérance relative sur le bilan d'un îlot
+            precision: 'float64' ou 'float32' (voir solver.lanczos)
+
+        Returns:
+            dict node_id -> ψ (même convention que calculate_psi_approx)
+        """
+        from solver import _solve_component
+
+        injections = self.injection_vector()
+        norm = sum(p**2 for p in injections.values())**0.5
+        total_input = self._reference_input()
+        index, position, H = self.compiled_hamiltonian()
+        members_of = self._tracker().members
+        report = self.check_islanding(tol)
+
+        tasks, plans = [], []
+        for entry in report:
+            if not entry['has_injection']:
+                entry['status'] = 'idle'
+                continue
+            nodes = list(members_of[entry['component']])
+            rows = np.fromiter((position[node] for node in nodes), dtype=int, count=len(nodes))
+            q1 = np.array([injections.get(node, 0.0) for node in nodes])
+            if entry['balanced']:
+                entry['status'] = 'solved'
+            elif rebalance and entry['n_buses'] > 1:
+                is_bus = np.array([self._is_bus(node) for node in nodes])
+                q1[is_bus] -= entry['injection'] / entry['n_buses']
+                entry['status'] = 'rebalanced'
+            else:
+                entry['status'] = 'unbalanced'
+                continue
+            n_iter = min(self.q_N, 2 * entry['n_buses'])
+            tasks.append((H[rows][:, rows], q1, n_iter, 1.0, precision))
+            # Hψ = P_îlot / ‖P‖ × P_ref, comme pour le réseau entier
+            plans.append((entry, nodes, total_input * np.linalg.norm(q1) / norm))
+
+        if parallel and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                results = list(pool.map(_solve_component, tasks))
+        else:
+            results = [_solve_component(task) for task in tasks]
+
+        psi = {node: 0.0 for node in self.nodes}
+        for (entry, nodes, scale), result in zip(plans, results):
+            entry['iterations'] = result['iterations']
+            for node, value in zip(nodes, result['psi'] * scale):
+                psi[node] = value
+
+        self.island_report = report
+        return psi
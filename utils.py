@@ -1,24 +1,404 @@
 import numpy as np
 import networkx as nx
-import matplotlib.pyplot as plt
-import random
-from pyvis.network import Network
-from networkx.readwrite import json_graph
+import functools
+import hashlib
 import json
-
-
-class HamiltonianGrid(nx.Graph):
+import sys
+
+import instrumentation
+from checkpoint import CheckpointMixin
+from contingency import CascadeMixin, LinePowerMixin, LocalOutageMixin, OutageMixin, ScreeningMixin
+from decomposition import DecompositionMixin
+from export import ExportMixin
+from instrumentation import instrumented
+from kpm import KPMMixin
+from shared import SharedMixin
+from solver import (CompiledMixin, InternedLanczosMixin, PrecisionMixin, RecyclingMixin,
+                    ResistanceMixin, SensitivityMixin)
+from topology import ComponentMixin
+
+
+# Case libérée dans IndexSet._slots (None peut être un élément)
+_HOLE = object()
+
+
+class IndexSet:
+    """
+    Ensemble ordonné (par ordre d'insertion) avec l'interface de liste utilisée
+    pour `_nodes` / `_lines` : append, remove et `in` en O(1) ; accès par
+    position et `index` en O(1) hors compactage.
+
+    Les éléments sont rangés dans `_slots` avec leur position dans `_pos` ; un
+    retrait laisse une case vide, et les cases vides sont tassées (O(n), une
+    fois) au premier accès par position qui suit, ou dès qu'elles sont plus
+    nombreuses que les éléments.
+    """
+
+    def __init__(self, items=()):
+        self._slots = []
+        self._pos = {}
+        self._holes = 0
+        for item in items:
+            self.append(item)
+
+    def _compact(self):
+        self._slots = [item for item in self._slots if item is not _HOLE]
+        self._pos = {item: k for k, item in enumerate(self._slots)}
+        self._holes = 0
+
+    def append(self, item):
+        if item not in self._pos:
+            self._pos[item] = len(self._slots)
+            self._slots.append(item)
+
+    def remove(self, item):
+        self._slots[self._pos.pop(item)] = _HOLE
+        self._holes += 1
+        if self._holes > len(self._pos):
+            self._compact()
+
+    def discard(self, item):
+        if item in self._pos:
+            self.remove(item)
+
+    def index(self, item):
+        if self._holes:
+            self._compact()
+        try:
+            return self._pos[item]
+        except KeyError:
+            raise ValueError(f"{item!r} is not in IndexSet") from None
+
+    def __contains__(self, item):
+        return item in self._pos
+
+    def __iter__(self):
+        return (item for item in self._slots if item is not _HOLE)
+
+    def __len__(self):
+        return len(self._pos)
+
+    def __getitem__(self, i):
+        if self._holes:
+            self._compact()
+        return self._slots[i]
+
+    def __repr__(self):
+        return f"IndexSet({list(self)!r})"
+
+
+class NodeTable:
+    """
+    Table d'internement des nœuds : nom ('N_DE1 0', 'L_380') <-> entier dense,
+    attribué à la construction et conservé à travers les pannes (un nœud
+    restauré retrouve son entier). Le moteur itératif travaille sur ces
+    entiers ; les noms ne sont traduits qu'aux frontières de l'API.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.ids = {}
+        self.is_line = bytearray()
+        self.active = bytearray()
+        self._bus_alias = {}   # 'DE1 0' et 'N_DE1 0' -> entier
+        self._line_alias = {}  # '380' et 'L_380' -> entier
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, name, is_line=False):
+        k = self.ids.get(name)
+        if k is None:
+            k = self.ids[name] = len(self.names)
+            self.names.append(name)
+            self.is_line.append(bool(is_line))
+            self.active.append(1)
+            alias = self._line_alias if is_line else self._bus_alias
+            alias[name] = k
+            text = str(name)
+            if text.startswith('L_' if is_line else 'N_'):
+                alias.setdefault(text[2:], k)
+        return k
+
+    def bus(self, bus_id):
+        """Entier du bus `bus_id` (avec ou sans préfixe 'N_'), None s'il est inconnu."""
+        return self._bus_alias.get(bus_id if isinstance(bus_id, str) else str(bus_id))
+
+    def line(self, line_id):
+        return self._line_alias.get(line_id if isinstance(line_id, str) else str(line_id))
+
+    def named(self, vector):
+        """dict entier -> valeur en dict nom -> valeur."""
+        names = self.names
+        return {names[k]: value for k, value in vector.items()}
+
+    def interned(self, vector):
+        ids = self.ids
+        return {ids[name]: value for name, value in vector.items()}
+
+
+class _DerivedResult:
+    """
+    Résultat dérivé de la topologie (betas, kappas, psis, R_eff...).
+    Si la topologie a changé depuis son calcul, il est recalculé à l'accès.
+    """
+
+    def __init__(self, refresh):
+        self.refresh = refresh
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        version = obj._result_versions.get(self.name)
+        if version is not None and version != obj.topology_version and not obj._refreshing:
+            getattr(obj, self.refresh)()
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = value
+
+
+def _snapshot_bytes(snapshots):
+    """Mémoire approximative des snapshots creux (dicts node -> float)."""
+    values = snapshots.values() if isinstance(snapshots, dict) else snapshots
+    return sum(sys.getsizeof(q) + 24 * len(q) for q in values if q is not None)
+
+
+def _produces(*names, requires=()):
+    """
+    Décore une étape de calcul : rafraîchit d'abord ses dépendances périmées,
+    puis marque `names` comme calculés pour la version courante de la topologie.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            for dependency in requires:
+                getattr(self, dependency)
+            self._refreshing += 1
+            try:
+                result = method(self, *args, **kwargs)
+            finally:
+                self._refreshing -= 1
+            for name in names:
+                self._result_versions[name] = self.topology_version
+            return result
+        return wrapper
+    return decorator
+
+
+class MutableGridMixin:
+    """
+    Couche de mutation de topologie partagée par les deux grilles.
+
+    Les éléments retirés sont conservés (attributs et arêtes) pour pouvoir être
+    restaurés sans reconstruire le réseau. Chaque mutation incrémente
+    `topology_version`, ce qui rend périmés les résultats dérivés : ils sont
+    recalculés paresseusement au prochain accès.
+    """
+
+    betas = _DerivedResult('iterate_qs')
+    kappas = _DerivedResult('calculate_kappa')
+    psis = _DerivedResult('calculate_psi_approx')
+    psi_sqs = _DerivedResult('psi_approx_squared')
+    kappas_sum = _DerivedResult('psi_approx_squared')
+    R_eff = _DerivedResult('calculate_effective_resistances')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.topology_version = 0
+        self._result_versions = {}
+        self._refreshing = 0
+        self._removed = {}  # node_id -> (attributs, [(voisin, attributs d'arête)])
+        self._signature = None
+        self.node_ids = NodeTable()
+
+    @property
+    def is_dirty(self):
+        """True si au moins un résultat calculé précède la dernière mutation."""
+        return any(v != self.topology_version for v in self._result_versions.values())
+
+    def fresh_result(self, name):
+        """
+        Valeur du résultat dérivé `name` ('betas', 'kappas'...) s'il a été
+        calculé pour la topologie courante, None sinon (sans recalcul).
+        """
+        if self._result_versions.get(name) != self.topology_version:
+            return None
+        return self.__dict__.get(name)
+
+    def _bump_topology(self):
+        self.topology_version += 1
+
+    def _intern_nodes(self):
+        """Interne les nœuds du graphe (fin de construction, ajout d'éléments)."""
+        for node, kind in self.nodes(data='type'):
+            self.node_ids.intern(node, kind == 'line')
+
+    def _line_node(self, line_id):
+        k = self.node_ids.line(line_id)
+        if k is not None:
+            return self.node_ids.names[k]
+        line_id = str(line_id)
+        return line_id if line_id.startswith("L_") else f"L_{line_id}"
+
+    def _bus_node(self, bus_id):
+        k = self.node_ids.bus(bus_id)
+        if k is not None:
+            return self.node_ids.names[k]
+        bus_id = str(bus_id)
+        return bus_id if bus_id.startswith("N_") else f"N_{bus_id}"
+
+    def _stash_node(self, node_id, index):
+        if node_id not in self:
+            raise nx.NetworkXError(f"The node {node_id} is not in the graph.")
+        edges = [(nbr, dict(attrs)) for nbr, attrs in self.adj[node_id].items()]
+        self._removed[node_id] = (dict(self.nodes[node_id]), edges)
+        self.remove_node(node_id)
+        index.discard(node_id)
+        k = self.node_ids.ids.get(node_id)
+        if k is not None:
+            self.node_ids.active[k] = 0
+        self._bump_topology()
+
+    def _unstash_node(self, node_id, index):
+        if node_id not in self._removed:
+            raise nx.NetworkXError(f"The node {node_id} was not removed.")
+        attrs, edges = self._removed.pop(node_id)
+        self.add_node(node_id, **attrs)
+        for nbr, edge_attrs in edges:
+            if nbr in self:
+                self.add_edge(node_id, nbr, **edge_attrs)
+            elif nbr in self._removed:
+                # Le voisin a été retiré après nous : il retrouvera l'arête à sa restauration
+                self._removed[nbr][1].append((node_id, edge_attrs))
+        index.append(node_id)
+        self.pos[node_id] = attrs.get('pos')
+        k = self.node_ids.ids.get(node_id)
+        if k is not None:
+            self.node_ids.active[k] = 1
+        self._bump_topology()
+
+    def remove_line(self, line_id):
+        """Retire une ligne (réversible avec `restore_line`)."""
+        self._stash_node(self._line_node(line_id), self._lines)
+
+    def restore_line(self, line_id):
+        self._unstash_node(self._line_node(line_id), self._lines)
+
+    def remove_bus(self, bus_id):
+        """Retire un bus ; ses lignes restent mais ne sont plus connectées de ce côté."""
+        self._stash_node(self._bus_node(bus_id), self._nodes)
+
+    def restore_bus(self, bus_id):
+        self._unstash_node(self._bus_node(bus_id), self._nodes)
+
+    def restore_all(self):
+        """Annule toutes les pannes simulées (bus d'abord, puis lignes)."""
+        removed = list(self._removed)
+        for node_id in removed:
+            if self._removed[node_id][0].get('type') != 'line':
+                self.restore_bus(node_id)
+        for node_id in removed:
+            if node_id in self._removed:
+                self.restore_line(node_id)
+
+    def removed_elements(self):
+        return list(self._removed)
+
+    def set_susceptance(self, line_id, b):
+        """
+        Change la susceptance d'une ligne : les couplages deviennent ±√b,
+        en conservant l'orientation bus0 (+) / bus1 (-).
+        """
+        line_node = self._line_node(line_id)
+        sqrt_b = b**0.5
+        if line_node in self._removed:
+            edges = self._removed[line_node][1]
+        else:
+            edges = [(nbr, self[line_node][nbr]) for nbr in self.adj[line_node]]
+        for _, attrs in edges:
+            attrs['sign'] = sqrt_b if attrs.get('sign', 1) >= 0 else -sqrt_b
+        for node_id, (_, node_edges) in self._removed.items():
+            for nbr, attrs in node_edges:
+                if nbr == line_node:
+                    attrs['sign'] = sqrt_b if attrs.get('sign', 1) >= 0 else -sqrt_b
+        self._bump_topology()
+
+    def set_endpoints(self, ix=None, ex=None, iy=None, ey=None):
+        """
+        Change les bus d'injection et d'extraction. La topologie ne change pas :
+        la matrice compilée et le sous-espace de `solve_recycled` sont gardés,
+        seuls les résultats dérivés sont marqués périmés.
+        """
+        if ix is not None:
+            self.ix = ix
+        if ex is not None:
+            self.ex = ex
+        if iy is not None:
+            self.iy = iy
+        if ey is not None:
+            self.ey = ey
+        self._result_versions = {name: None if version is None else -1
+                                 for name, version in self._result_versions.items()}
+
+    def topology_signature(self):
+        """
+        Empreinte (sha1) de la topologie courante : nœuds et couplages signés.
+        Contrairement à `topology_version`, elle est stable d'une session à l'autre.
+        """
+        if self._signature is None or self._signature[0] != self.topology_version:
+            digest = hashlib.sha1()
+            for node in sorted(map(str, self.nodes)):
+                digest.update(node.encode())
+            for u, v, sign in sorted((str(u), str(v), round(float(sign), 12))
+                                     for u, v, sign in self.edges(data='sign', default=1)):
+                digest.update(f"{u}|{v}|{sign!r}".encode())
+            self._signature = (self.topology_version, digest.hexdigest())
+        return self._signature[1]
+
+    def refresh_results(self):
+        """Relance toute la chaîne de calcul sur la topologie courante."""
+        self.iterate_qs()
+        self.calculate_psi_approx()
+        self.psi_approx_squared()
+        self.calculate_effective_resistances()
+
+    def _is_bus(self, node_id):
+        k = self.node_ids.ids.get(node_id)
+        if k is not None:
+            return not self.node_ids.is_line[k]
+        return self.nodes[node_id].get('type') != 'line'
+
+
+class _Grid(SharedMixin, ExportMixin, DecompositionMixin, RecyclingMixin, SensitivityMixin,
+            KPMMixin, ResistanceMixin, PrecisionMixin, CascadeMixin, ScreeningMixin,
+            LinePowerMixin, LocalOutageMixin, OutageMixin, ComponentMixin, CompiledMixin,
+            InternedLanczosMixin, CheckpointMixin, MutableGridMixin, nx.Graph):
+    """
+    Base des deux grilles : la couche de mutation et, devant elle, une classe
+    mélangée par fonctionnalité, définie dans le module de la fonctionnalité.
+    """
+
+
+class HamiltonianGrid(_Grid):
     def __init__(self, N, q_N, ix, iy, iw, ex, ey, ew):
         super().__init__()
         self.N = N
         self.q_N = q_N
         self.q_snapshots = np.empty(q_N, dtype=object)
-        self._nodes = []
-        self._lines = []
+        self._nodes = IndexSet()
+        self._lines = IndexSet()
         self.betas = np.zeros(q_N)
 
         self.ix, self.iy, self.iw, self.ex, self.ey, self.ew = ix, iy, iw, ex, ey, ew
 
+    @instrumented('create_network')
     def create_network(self, grid_size):
 
         # 1. Ajout des Bus (Nœuds)
@@ -58,125 +438,74 @@ class HamiltonianGrid(nx.Graph):
 
                     self._lines.append(line_id)
         self.pos = nx.get_node_attributes(self, 'pos')
+        self._intern_nodes()
 
         return self
 
-    def draw_network(self, with_labels=False, ax=None, node_size=600, figsize=(18, 10)):
-        fig, ax = plt.subplots(1, 1, figsize=figsize)
-        weights = nx.get_node_attributes(self, 'weight').values()
-        weights = list(map(lambda x: abs(x), weights))
-        node_size = [node_size for node in self.nodes()]
-
-        labels = {}
-        for node in self.nodes():
-            w = self.nodes[node]["weight"]
-            if abs(w) > 0:
-
-                labels[node] = f"{node}\n({w:.2f})"  # Affiche Nom et Poids
-            else:
-                labels[node] = "0"
-
-            if node == f"N_{self.ix}_{self.iy}":
-                labels[node] = f"Ins: {labels[node]}"
-                index = list(self.nodes()).index(node)
-                node_size[index] *= 3
-                weights[index] = max(weights) or 1
-            elif node == f"N_{self.ex}_{self.ey}":
-                labels[node] = f"Ext: {labels[node]}"
-                index = list(self.nodes()).index(node)
-                node_size[index] *= 3
-                weights[index] = max(weights) or 1
-
-        nx.draw(self, pos=self.pos, ax=ax, node_color=weights, with_labels=False,
-                cmap=plt.cm.viridis, node_size=node_size, font_size=9, font_weight="bold")
-        if with_labels:
-            nx.draw_networkx_labels(self, self.pos, labels=labels,
-                                    font_size=8,
-                                    font_family='sans-serif',
-                                    font_color="black",
-                                    font_weight="bold")
+    def draw_network(self, with_labels=False, ax=None, node_size=600, figsize=(18, 10),
+                     max_lines=None):
+        import plotting
+        return plotting.draw_hamiltonian_grid(self, with_labels=with_labels, ax=ax,
+                                              node_size=node_size, figsize=figsize, max_lines=max_lines)
 
     def get_edge_sign(self, u, v):
 
         return self[u][v].get('sign', 1)
 
+    def injection_vector(self):
+        return {f"N_{self.ix}_{self.iy}": self.iw, f"N_{self.ex}_{self.ey}": self.ew}
+
+    def _reference_input(self):
+        return self.iw
+
     def remove_element(self, type: str, x: int, y: int, o=""):
         type = type.upper()
         if type == "N":
-            self.remove_node(f"{type}_{x}_{y}")
+            self.remove_bus(f"{type}_{x}_{y}")
         elif type == "L":
-            self.remove_node(f"{type}_{o}_{x}_{y}")
+            self.remove_line(f"{type}_{o}_{x}_{y}")
 
     def calculate_q_i(self, i):  # i is q_i
-        temp_weights = {}
-        next_beta_sq = 0
-
-        if i == 1:
-            for node in self.nodes:
-                self.nodes[node]["weight"] = 0
-            beta_1 = (self.iw**2+self.ew**2)**(1/2)
-
-            insert_id = f"N_{self.ix}_{self.iy}"
-
-            self.nodes[insert_id]["weight"] = self.iw/beta_1
+        if i > 1:
+            return self._lanczos_step(i)
 
-            extract_id = f"N_{self.ex}_{self.ey}"
-            self.nodes[extract_id]["weight"] = self.ew/beta_1
-            self.q_snapshots[0] = {insert_id: self.iw /
-                                   beta_1, extract_id: self.ew/beta_1}
-            self.betas[0] = beta_1
-            return beta_1
-
-        nodes_to_check = set()
-        for node_id in self.q_snapshots[i-2]:
-            nodes_to_check.update(self.adj[node_id])
-
-        for node_id in nodes_to_check:
-            # H * q1: Sum weights of neighbors from the q1 snapshot
-            h_qi = 0
-            for neighbor in self.adj[node_id]:
-                if neighbor in self.q_snapshots[i-2]:
-                    # IMPORTANT: Le signe dépend de la direction neighbor -> node
-                    sign = self.get_edge_sign(node_id, neighbor)
-                    w = self.q_snapshots[i-2][neighbor]
-                    h_qi += w * sign
-
-            if i == 2:
-                w_prime = h_qi
-            else:
-
-                w_prime = h_qi - self.betas[i - 1 - 1] * \
-                    self.q_snapshots[i-2 - 1].get(node_id, 0)
-
-            if w_prime != 0:
-                temp_weights[node_id] = w_prime
-                next_beta_sq += w_prime**2
-
-        # Calculate normalization factor
-        beta_i = next_beta_sq**(0.5)
+        ids = self.node_ids
+        self._id_adjacency()
         for node in self.nodes:
-            # Ensure origin and all others are zero
             self.nodes[node]["weight"] = 0
-        # Normalize and store ONLY nodes with values
-        self.q_snapshots[i-1] = {}
-        for node_id, weight in temp_weights.items():
-            norm_weight = weight / beta_i
-            self.q_snapshots[i-1][node_id] = norm_weight
-            # Update graph for drawing
-            self.nodes[node_id]["weight"] = norm_weight
+        beta_1 = (self.iw**2+self.ew**2)**(1/2)
+
+        insert_id = f"N_{self.ix}_{self.iy}"
 
-        return beta_i
+        self.nodes[insert_id]["weight"] = self.iw/beta_1
+
+        extract_id = f"N_{self.ex}_{self.ey}"
+        self.nodes[extract_id]["weight"] = self.ew/beta_1
+        self.q_snapshots[0] = {ids.ids[insert_id]: self.iw / beta_1,
+                               ids.ids[extract_id]: self.ew/beta_1}
+        self.betas[0] = beta_1
+        return beta_1
 
     def apply_q_i(self, i):
-        q_i = self.q_snapshots[i-1]
+        q_i = self.node_ids.named(self.q_snapshots[i-1])
         for node in self.nodes:
             self.nodes[node]["weight"] = q_i.get(node, 0)
 
-    def iterate_qs(self):
-        for i in range(1, self.q_N + 1):
-            beta_i = self.calculate_q_i(i)
-            self.betas[i-1] = beta_i
+    @instrumented('iterate_qs')
+    @_produces('betas')
+    def iterate_qs(self, checkpoint=None, checkpoint_every=50, resume=True):
+        """
+        Calcule q_1 .. q_N et les β. Avec `checkpoint` (chemin d'un fichier),
+        l'état minimal est sauvegardé toutes les `checkpoint_every` itérations
+        et, si `resume`, un calcul interrompu reprend là où il s'était arrêté.
+        """
+        start = self._iterate(checkpoint, checkpoint_every, resume)
+        if instrumentation.enabled():
+            instrumentation.count('lanczos_iterations', self.q_N - start + 1)
+            instrumentation.gauge('snapshot_bytes', _snapshot_bytes(self.q_snapshots))
 
+    @instrumented('calculate_kappa')
+    @_produces('kappas', requires=('betas',))
     def calculate_kappa(self):
         self.kappas = np.zeros((len(self.q_snapshots) // 2,))
         for i_pair in range(2, len(self.q_snapshots) + 1, 2):
@@ -193,17 +522,12 @@ class HamiltonianGrid(nx.Graph):
                 kappa_2i = self.iw / self.betas[1]  # k2*b2 = P
             self.kappas[i-1] = kappa_2i
 
+    @instrumented('calculate_psi_approx')
+    @_produces('psis', 'kappas', requires=('betas',))
     def calculate_psi_approx(self):
-        self.psis = [{} for _ in range(len(self.q_snapshots) // 2)]
-        psi_app = {node: 0 for node in self.nodes}
-
         self.calculate_kappa()
-        for i_pair in range(2, len(self.q_snapshots) + 1, 2):
-            i = i_pair // 2
-            kappa_2i = self.kappas[i-1]
-            for node, val in self.q_snapshots[i_pair-1].items():
-                psi_app[node] += kappa_2i * val
-            self.psis[i-1] = psi_app
+        psi_app = self._accumulate_psi()
+        self.psis = [psi_app] * (len(self.q_snapshots) // 2)
         return psi_app
 
     def apply_psi_to_graph(self, i):
@@ -211,11 +535,13 @@ class HamiltonianGrid(nx.Graph):
         for node in self.nodes:
             self.nodes[node]["weight"] = psi_approx.get(node, 0)
 
+    @_produces('psi_sqs', 'kappas_sum', requires=('kappas',))
     def psi_approx_squared(self):
         self.kappas_sum = np.cumsum((self.kappas)**2)
         self.psi_sqs = self.kappas_sum
         return self.psi_sqs
 
+    @_produces('R_eff', requires=('psi_sqs',))
     def calculate_effective_resistances(self):
         self.R_eff = []
         for psi in self.psi_sqs:
@@ -224,23 +550,8 @@ class HamiltonianGrid(nx.Graph):
         return self.R_eff
 
     def save_graph_json(self, filename="graph_data.json"):
-        data = json_graph.cytoscape_data(self)
-
-        for node in data['elements']['nodes']:
-            pos = node["data"]['pos']
-            node['position'] = {
-                # On multiplie souvent car Cyto utilise une échelle pixel
-                'x': float(pos[0] * 1000),
-                'y': float(pos[1] * 1000)
-            }
-
-            node['data']['special'] = False
-            if node["data"]["name"] == f"N_{self.ix}" or node["data"]["name"] == f"N_{self.ex}":
-                node['data']['special'] = True
-
-            del node['data']['pos']
-
-        json.dump(data, open(filename, "w"))
+        import plotting
+        plotting.save_graph_json(self, filename)
 
     def test_line_capacity(self, tix=None, tiy=None):
 
@@ -277,15 +588,15 @@ class HamiltonianGrid(nx.Graph):
         self.draw_network(figsize=(20, 10), node_size=1200, with_labels=True)
 
 
-class EuropeanGrid(nx.Graph):
+class EuropeanGrid(_Grid):
     def __init__(self, pypsa_network, q_N, ix=None, iy=None, iw=1, ex=None, ey=None, ew=-1, real_data=True, use_real_power=False):
         super().__init__()
         self.n = pypsa_network  # Store the PyPSA object
         self.q_N = q_N
         self.q_snapshots = {}
         self.betas = np.zeros(q_N)
-        self._nodes = []
-        self._lines = []
+        self._nodes = IndexSet()
+        self._lines = IndexSet()
 
         # In real data, ix/iy/ex/ey will be Bus IDs (strings), not grid coordinates
         self.ix, self.iy = ix, iy
@@ -345,10 +656,15 @@ class EuropeanGrid(nx.Graph):
 
         return self.bus_power
 
-    def build_from_pypsa(self):
+    @instrumented('build_from_pypsa')
+    def build_from_pypsa(self, cables=None, coupling='capacity'):
         """
         Converts PyPSA topology into the specific node-line-node 
         structure required by your algorithm.
+
+        Args:
+            cables: câbles / liaisons HVDC ajoutés en dernière étape (voir `add_cables`)
+            coupling: 'capacity' ou 'length', couplage des câbles
         """
         # 1. Add Buses as Nodes
         for bus_id, row in self.n.buses.iterrows():
@@ -381,13 +697,124 @@ class EuropeanGrid(nx.Graph):
             self.add_edge(f"N_{v}", line_id, sign=-sqrt_b)
 
         self.pos = nx.get_node_attributes(self, 'pos')
+        self._intern_nodes()
 
         # 3. Calculate bus power data if using real power
         if self.use_real_power:
             self._calculate_bus_power()
 
+        # 4. Submarine cables / HVDC links as extra lines
+        if cables is not None:
+            self.add_cables(cables, coupling=coupling)
+
         return self
 
+    def _cable_records(self, cables):
+        """(line_node, bus0, bus1, capacity, length, name, type) depuis un JSON, des dicts ou un DataFrame."""
+        if isinstance(cables, str):
+            with open(cables) as f:
+                cables = json.load(f)
+        if isinstance(cables, dict):
+            cables = cables.get('submarine_cables', [])
+        if hasattr(cables, 'iterrows'):
+            # Table PyPSA (n.links) : bus0, bus1, p_nom, length
+            return [(f"L_Link_{link_id}", self._bus_node(row['bus0']), self._bus_node(row['bus1']),
+                     float(row.get('p_nom', 0.0) or 0.0), float(row.get('length', 0.0) or 0.0),
+                     str(link_id), str(row.get('carrier', 'DC')))
+                    for link_id, row in cables.iterrows()]
+        return [(f"L_Subsea_{cable['name'].replace(' ', '_')}", self._bus_node(cable['from_node']),
+                 self._bus_node(cable['to_node']), float(cable.get('capacity_mw', 0.0) or 0.0),
+                 float(cable.get('length_km', 0.0) or 0.0), cable['name'],
+                 cable.get('type', 'HVDC'))
+                for cable in cables]
+
+    def _capacity_reference(self):
+        """MW par unité de susceptance des lignes AC : médiane de s_nom × longueur (b = 1/longueur)."""
+        lines = self.n.lines
+        if 's_nom' not in lines or 'length' not in lines:
+            return None
+        ratio = (lines['s_nom'] * lines['length']).to_numpy(dtype=float)
+        ratio = ratio[np.isfinite(ratio) & (ratio > 0)]
+        return float(np.median(ratio)) if len(ratio) else None
+
+    @instrumented('add_cables')
+    def add_cables(self, cables, coupling='capacity'):
+        """
+        Ajoute des câbles sous-marins / liaisons HVDC comme lignes du graphe
+        biparti, avec des couplages signés +√b (bus0) / -√b (bus1) comme les
+        lignes AC. Les nœuds et arêtes sont insérés en bloc et la topologie
+        n'est invalidée qu'une fois.
+
+        Args:
+            cables: chemin d'un JSON ({'submarine_cables': [...]} avec name,
+                    from_node, to_node, capacity_mw, length_km optionnel), liste
+                    de ces dicts, ou table PyPSA des liaisons (n.links)
+            coupling: 'capacity' : b = capacité / médiane(s_nom × longueur) des
+                      lignes AC, soit la susceptance d'une ligne AC typique de
+                      même capacité ; 'length' : b = 1/longueur (longueur
+                      donnée, sinon distance orthodromique entre les bus).
+                      Sans real_data, les couplages sont unitaires comme ceux
+                      des lignes.
+
+        Returns:
+            dict avec 'added' (nœuds ligne ajoutés) et 'skipped' ({nom: raison})
+        """
+        if coupling not in ('capacity', 'length'):
+            raise ValueError(f"Unknown coupling {coupling!r} (expected 'capacity' or 'length')")
+        reference = self._capacity_reference() if coupling == 'capacity' else None
+        nodes, edges, added, skipped = [], [], [], {}
+        for line_id, u, v, capacity, length, name, kind in self._cable_records(cables):
+            if u not in self or v not in self:
+                skipped[name] = f"unknown bus {u if u not in self else v}"
+                continue
+            if line_id in self or line_id in added:
+                skipped[name] = f"duplicate line {line_id}"
+                continue
+            pos_u, pos_v = self.nodes[u]['pos'], self.nodes[v]['pos']
+            if length <= 0:
+                length = float(self._distance(pos_u, pos_v)) or 1.0
+            sqrt_b = 1
+            if self.real_data:
+                if coupling == 'capacity' and reference and capacity > 0:
+                    sqrt_b = (capacity / reference)**0.5
+                else:
+                    sqrt_b = (1 / length)**0.5
+            mid_pos = ((pos_u[0] + pos_v[0])/2, (pos_u[1] + pos_v[1])/2)
+            nodes.append((line_id, {'type': 'line', 'weight': 0.0, 'pos': mid_pos,
+                                    'is_submarine': True, 'capacity_mw': capacity,
+                                    'length': length, 'cable_type': kind, 'name': name}))
+            edges.append((u, line_id, {'sign': +sqrt_b}))
+            edges.append((v, line_id, {'sign': -sqrt_b}))
+            added.append(line_id)
+
+        if added:
+            self.add_nodes_from(nodes)
+            self.add_edges_from(edges)
+            for line_id in added:
+                self._lines.append(line_id)
+                self.pos[line_id] = self.nodes[line_id]['pos']
+                self.node_ids.intern(line_id, is_line=True)
+            self._bump_topology()
+        return {'added': added, 'skipped': skipped}
+
+    def line_capacities(self, scale_factor, rating=1.0, column='s_nom'):
+        """
+        Limites des lignes en unités de ψ : capacité PyPSA (`s_nom`, MVA) ×
+        `rating` / `scale_factor` (MW par unité de ψ, voir estimate_line_power).
+        Les câbles (`add_cables`) prennent leur `capacity_mw`. Les lignes sans
+        capacité renseignée sont illimitées.
+
+        Returns:
+            dict line_node -> limite
+        """
+        capacity = self.n.lines[column] if column in self.n.lines else {}
+        limits = {}
+        for line in self._lines:
+            value = float(capacity.get(str(line)[2:], 0.0) or 0.0) or \
+                self.nodes[line].get('capacity_mw', 0.0)
+            limits[line] = value * rating / scale_factor if value > 0 else np.inf
+        return limits
+
     def normalize_weights(self):
         max_weight = max([data.get('weight', 0)
                          for node, data in self.nodes(data=True)])
@@ -404,177 +831,123 @@ class EuropeanGrid(nx.Graph):
 
     # --- Keep your existing calculate_q_i, iterate_qs, etc. here ---
     # Just ensure you reference self.ix instead of f"N_{self.ix}_{self.iy}"
-    def draw_network(self, with_labels=False, ax=None, node_size=600, figsize=(18, 10)):
-        fig, ax = plt.subplots(1, 1, figsize=figsize)
-        weights = nx.get_node_attributes(self, 'weight').values()
-        weights = list(map(lambda x: abs(x), weights))
-        node_size = [node_size for node in self.nodes()]
-        labels = {}
-        for node in self.nodes():
-            w = round(self.nodes[node]["weight"], 2)
-
-            if abs(w) > 0:
-
-                # f"{node}\n({w:.2f})"  # Affiche Nom et Poids
-                labels[node] = f"{w}"
-            else:
-                labels[node] = "0"
-
-            if node == f"N_{self.ix}":
-                labels[node] = f"Ins: {labels[node]}"
-                index = list(self.nodes()).index(node)
-                node_size[index] *= 3
-                weights[index] = 1
-            elif node == f"N_{self.ex}":
-                labels[node] = f"Ext: {labels[node]}"
-                index = list(self.nodes()).index(node)
-                node_size[index] *= 3
-                weights[index] = 1
-        nx.draw(self, pos=self.pos, ax=ax, node_color=weights, with_labels=False,
-                cmap=plt.cm.viridis, node_size=node_size, font_size=9, font_weight="bold")
-        if with_labels:
-            nx.draw_networkx_labels(self, self.pos, labels=labels,
-                                    font_size=8,
-                                    font_color="white",
-                                    font_family='sans-serif',
-                                    font_weight="bold")
+    def draw_network(self, with_labels=False, ax=None, node_size=600, figsize=(18, 10),
+                     max_lines=None):
+        import plotting
+        return plotting.draw_european_grid(self, with_labels=with_labels, ax=ax,
+                                           node_size=node_size, figsize=figsize, max_lines=max_lines)
 
     def get_edge_sign(self, u, v):
 
         return self[u][v].get('sign', 1)
 
+    def injection_vector(self):
+        """
+        Injections par nœud bus : puissance nette réelle des bus présents,
+        ou dipôle (iw en ix, ew en ex).
+        """
+        if self.use_real_power and self.bus_power:
+            return {f"N_{bus_id}": p for bus_id, p in self.bus_power.items()
+                    if p != 0 and f"N_{bus_id}" in self}
+        return {self._bus_node(self.ix): self.iw, self._bus_node(self.ex): self.ew}
+
+    def _distance(self, pos_a, pos_b):
+        """Distance orthodromique en km entre deux positions (lon, lat)."""
+        lon_a, lat_a, lon_b, lat_b = map(np.radians, (*pos_a, *pos_b))
+        h = np.sin((lat_b - lat_a) / 2)**2 + \
+            np.cos(lat_a) * np.cos(lat_b) * np.sin((lon_b - lon_a) / 2)**2
+        return 2 * 6371.0 * np.arcsin(np.sqrt(h))
+
+    def _reference_input(self):
+        # Même référence que calculate_kappa
+        return 1.0 if self.use_real_power and self.bus_power else self.iw
+
     def remove_element(self, type: str, index: str | int, country_code: str = ""):
         type = type.upper()
         if type == "N":
-            self.remove_node(f"N_{country_code} {index}")
-            self._nodes.remove(f"N_{country_code} {index}")
+            self.remove_bus(f"{country_code} {index}" if country_code else index)
         elif type == "L":
-            self.remove_node(f"L_{index}")
-            self._lines.remove(f"L_{index}")
+            self.remove_line(index)
 
     def calculate_q_i(self, i):  # i is q_i
-        temp_weights = {}
-        next_beta_sq = 0
+        if i > 1:
+            return self._lanczos_step(i)
 
-        if i == 1:
-            for node in self.nodes:
-                self.nodes[node]["weight"] = 0
-
-            # NEW: Use real power data if enabled
-            if self.use_real_power and self.bus_power:
-                # Initialize q_1 with all generators (positive) and loads (negative)
-                # First normalize the power vector to unit norm (like the 2-node case)
-                power_sq_sum = sum(
-                    p**2 for p in self.bus_power.values() if p != 0)
-                power_norm = power_sq_sum**(0.5)
-
-                # Store total power for later use in kappa calculation
-                self._total_power_input = sum(
-                    p for p in self.bus_power.values() if p > 0)
-
-                # beta_1 = 1 (unit normalized vector), just like sqrt(1^2 + 1^2)/sqrt(2) = 1
-                beta_1 = 1.0
-
-                self.q_snapshots[0] = {}
-                for bus_id, power in self.bus_power.items():
-                    if power != 0:
-                        node_id = f"N_{bus_id}"
-                        # Normalize to unit vector
-                        norm_weight = power / power_norm
-                        self.nodes[node_id]["weight"] = norm_weight
-                        self.q_snapshots[0][node_id] = norm_weight
-
-                self.betas[0] = beta_1
-                return beta_1
-            else:
-                # Original: single source and sink
-                beta_1 = (self.iw**2+self.ew**2)**(1/2)
-
-                insert_id = f"{self.ix}"
-                if not self.ix.startswith("N_"):
-                    insert_id = f"N_{self.ix}"
-
-                extract_id = f"{self.ex}"
-                if not self.ex.startswith("N_"):
-                    extract_id = f"N_{self.ex}"
-
-                self.nodes[insert_id]["weight"] = self.iw/beta_1
-
-                self.nodes[extract_id]["weight"] = self.ew/beta_1
-                self.q_snapshots[0] = {insert_id: self.iw /
-                                       beta_1, extract_id: self.ew/beta_1}
-                self.betas[0] = beta_1
-                return beta_1
-
-        nodes_to_check = set()
-        for node_id in self.q_snapshots[i-2]:
-            nodes_to_check.update(self.adj[node_id])
-
-        for node_id in nodes_to_check:
-            # H * q1: Sum weights of neighbors from the q1 snapshot
-            h_qi = 0
-            for neighbor in self.adj[node_id]:
-                if neighbor in self.q_snapshots[i-2]:
-                    # IMPORTANT: Le signe dépend de la direction neighbor -> node
-                    sign = self.get_edge_sign(node_id, neighbor)
-                    w = self.q_snapshots[i-2][neighbor]
-                    h_qi += w * sign
-
-            if i == 2:
-                w_prime = h_qi
-            else:
-
-                w_prime = h_qi - self.betas[i - 1 - 1] * \
-                    self.q_snapshots[i-2 - 1].get(node_id, 0)
-
-            if w_prime != 0:
-                temp_weights[node_id] = w_prime
-                next_beta_sq += w_prime**2
-
-        # Calculate normalization factor
-        beta_i = next_beta_sq**(0.5)
+        ids = self.node_ids
+        self._id_adjacency()  # table d'entiers à jour (bus présents)
         for node in self.nodes:
-            # Ensure origin and all others are zero
             self.nodes[node]["weight"] = 0
-        # Normalize and store ONLY nodes with values
-        self.q_snapshots[i-1] = {}
-        for node_id, weight in temp_weights.items():
-            norm_weight = weight / beta_i
-            self.q_snapshots[i-1][node_id] = norm_weight
-            # Update graph for drawing
-            self.nodes[node_id]["weight"] = norm_weight
 
-        return beta_i
+        # NEW: Use real power data if enabled
+        if self.use_real_power and self.bus_power:
+            # Initialize q_1 with all generators (positive) and loads (negative)
+            # First normalize the power vector to unit norm (like the 2-node case)
+            # Les bus retirés (pannes) ne participent pas à l'injection
+            active_power = {}
+            for bus_id, p in self.bus_power.items():
+                k = ids.bus(bus_id)
+                if k is not None and ids.active[k]:
+                    active_power[k] = p
+            power_sq_sum = sum(
+                p**2 for p in active_power.values() if p != 0)
+            power_norm = power_sq_sum**(0.5)
+
+            # Store total power for later use in kappa calculation
+            self._total_power_input = sum(
+                p for p in active_power.values() if p > 0)
+
+            # beta_1 = 1 (unit normalized vector), just like sqrt(1^2 + 1^2)/sqrt(2) = 1
+            beta_1 = 1.0
+
+            self.q_snapshots[0] = {}
+            for k, power in active_power.items():
+                if power != 0:
+                    # Normalize to unit vector
+                    norm_weight = power / power_norm
+                    self.nodes[ids.names[k]]["weight"] = norm_weight
+                    self.q_snapshots[0][k] = norm_weight
 
-    def apply_q_i(self, i):
-        q_i = self.q_snapshots[i-1]
-        for node in self.nodes:
-            self.nodes[node]["weight"] = q_i.get(node, 0)
+            self.betas[0] = beta_1
+            return beta_1
+        else:
+            # Original: single source and sink
+            beta_1 = (self.iw**2+self.ew**2)**(1/2)
 
-    def iterate_qs(self):
-        for i in range(1, self.q_N + 1):
-            beta_i = self.calculate_q_i(i)
-            self.betas[i-1] = beta_i
+            insert_id = self._bus_node(self.ix)
+            extract_id = self._bus_node(self.ex)
 
-    def save_graph_json(self, filename="graph_data.json"):
-        data = json_graph.cytoscape_data(self)
+            self.nodes[insert_id]["weight"] = self.iw/beta_1
 
-        for node in data['elements']['nodes']:
-            pos = node["data"]['pos']
-            node['position'] = {
-                # On multiplie souvent car Cyto utilise une échelle pixel
-                'x': float(pos[0] * 1000),
-                'y': float(pos[1] * 1000)
-            }
+            self.nodes[extract_id]["weight"] = self.ew/beta_1
+            self.q_snapshots[0] = {ids.ids[insert_id]: self.iw / beta_1,
+                                   ids.ids[extract_id]: self.ew/beta_1}
+            self.betas[0] = beta_1
+            return beta_1
 
-            node['data']['special'] = False
-            if node["data"]["name"] == f"N_{self.ix}" or node["data"]["name"] == f"N_{self.ex}":
-                node['data']['special'] = True
+    def apply_q_i(self, i):
+        q_i = self.node_ids.named(self.q_snapshots[i-1])
+        for node in self.nodes:
+            self.nodes[node]["weight"] = q_i.get(node, 0)
 
-            del node['data']['pos']
+    @instrumented('iterate_qs')
+    @_produces('betas')
+    def iterate_qs(self, checkpoint=None, checkpoint_every=50, resume=True):
+        """
+        Calcule q_1 .. q_N et les β. Avec `checkpoint` (chemin d'un fichier),
+        l'état minimal est sauvegardé toutes les `checkpoint_every` itérations
+        et, si `resume`, un calcul interrompu reprend là où il s'était arrêté.
+        """
+        start = self._iterate(checkpoint, checkpoint_every, resume)
+        if instrumentation.enabled():
+            instrumentation.count('lanczos_iterations', self.q_N - start + 1)
+            instrumentation.gauge('snapshot_bytes', _snapshot_bytes(self.q_snapshots))
 
-        json.dump(data, open(filename, "w"))
+    def save_graph_json(self, filename="graph_data.json"):
+        import plotting
+        plotting.save_graph_json(self, filename)
 
+    @instrumented('calculate_kappa')
+    @_produces('kappas', requires=('betas',))
     def calculate_kappa(self):
         self.kappas = np.zeros((len(self.q_snapshots) // 2,))
 
@@ -600,17 +973,12 @@ class EuropeanGrid(nx.Graph):
                 kappa_2i = total_input / self.betas[1]  # k2*b2 = P
             self.kappas[i-1] = kappa_2i
 
+    @instrumented('calculate_psi_approx')
+    @_produces('psis', 'kappas', requires=('betas',))
     def calculate_psi_approx(self):
-        self.psis = [{} for _ in range(len(self.q_snapshots) // 2)]
-        psi_app = {node: 0 for node in self.nodes}
-
         self.calculate_kappa()
-        for i_pair in range(2, len(self.q_snapshots) + 1, 2):
-            i = i_pair // 2
-            kappa_2i = self.kappas[i-1]
-            for node, val in self.q_snapshots[i_pair-1].items():
-                psi_app[node] += kappa_2i * val
-            self.psis[i-1] = psi_app
+        psi_app = self._accumulate_psi()
+        self.psis = [psi_app] * (len(self.q_snapshots) // 2)
         return psi_app
 
     def apply_psi_to_graph(self, i):
@@ -618,11 +986,13 @@ class EuropeanGrid(nx.Graph):
         for node in self.nodes:
             self.nodes[node]["weight"] = psi_approx.get(node, 0)
 
+    @_produces('psi_sqs', 'kappas_sum', requires=('kappas',))
     def psi_approx_squared(self):
         self.kappas_sum = np.cumsum((self.kappas)**2)
         self.psi_sqs = self.kappas_sum
         return self.psi_sqs
 
+    @_produces('R_eff', requires=('psi_sqs',))
     def calculate_effective_resistances(self):
         self.R_eff = []
         for psi in self.psi_sqs:
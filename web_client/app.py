@@ -3,20 +3,50 @@ Flask backend for the European Grid Web Client
 Provides REST API for grid simulation, node manipulation, and visualization
 """
 
-from utils import EuropeanGrid
-from flask import Flask, jsonify, request, send_from_directory
-from flask_cors import CORS
-import numpy as np
-import pypsa
 import sys
 import os
+from contextlib import nullcontext
 
-# Add parent directory to path to import utils
-# sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Add parent directory to path to import utils (the library at the repo root)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import EuropeanGrid
+from store import ResultStore
+from shared import SharedCache
+import instrumentation
+from instrumentation import instrumented
+from flask import Flask, Response, g, jsonify, request, send_from_directory
+from flask_cors import CORS
+import numpy as np
 
 app = Flask(__name__, static_folder='./static', static_url_path='')
 CORS(app)
 
+# Per-phase timings for /api/simulation_stats and /metrics, off unless GRID_METRICS=1.
+# Each request collects into its own Metrics (the server is threaded), merged
+# into this process-wide object when the request ends
+metrics = instrumentation.Metrics() if os.environ.get('GRID_METRICS') == '1' else None
+
+
+def recording():
+    """Records the phases run by the current thread straight into `metrics` (startup code)"""
+    return instrumentation.collect(metrics) if metrics is not None else nullcontext()
+
+
+@app.before_request
+def start_request_metrics():
+    if metrics is not None:
+        g.metrics_collection = instrumentation.collect()
+        g.request_metrics = g.metrics_collection.__enter__()
+
+
+@app.teardown_request
+def merge_request_metrics(exc):
+    collection = g.pop('metrics_collection', None)
+    if collection is not None:
+        collection.__exit__(None, None, None)
+        metrics.merge(g.pop('request_metrics'))
+
 # Global grid state
 grid_state = {
     'grid': None,
@@ -24,17 +54,53 @@ grid_state = {
     'bus_in': 'DE1 0',
     'bus_out': 'ES1 21',
     'removed_lines': [],
-    'removed_nodes': []
+    'removed_nodes': [],
+    'study': None,
+    'simulation': None,
+    'network_path': '../networks/elec_s_512.nc',
+    'version': 0
 }
 
+# Precomputed studies (see store.py); GRID_STORE points at the store directory,
+# by default results/ next to the library whatever the working directory.
+# The store is only opened (and its directory created) by the first request needing it
+DEFAULT_STORE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'results')
+_result_store = None
+
+
+def result_store():
+    """The result store, created on first use"""
+    global _result_store
+    if _result_store is None:
+        _result_store = ResultStore(os.environ.get('GRID_STORE', DEFAULT_STORE))
+    return _result_store
+
+# Multi-worker serving (see wsgi.py): GRID_SHARED names the directory ('auto':
+# /dev/shm/grid-cache) holding the compiled topology, outage factors and
+# baselines that every worker maps read-only, and the scenario they all serve
+_shared_root = os.environ.get('GRID_SHARED')
+shared_cache = SharedCache(None if _shared_root in ('1', 'auto') else _shared_root) \
+    if _shared_root else None
+
+# Scenario fields replayed by the other workers when one of them changes it
+SCENARIO_KEYS = ('network_path', 'bus_in', 'bus_out', 'removed_lines', 'removed_nodes')
+
+
+def load_network(network_path='../networks/elec_s_512.nc'):
+    """Load a PyPSA network; pypsa is imported on first use to keep startup fast"""
+    with instrumentation.phase('pypsa_load'):
+        import pypsa
+        return pypsa.Network(network_path)
+
 
 def initialize_grid(network_path='../networks/elec_s_512.nc'):
     """Initialize or reinitialize the grid"""
     global grid_state
 
     # Load PyPSA Network
-    n = pypsa.Network(network_path)
+    n = load_network(network_path)
     grid_state['network'] = n
+    grid_state['network_path'] = network_path
 
     # Initialize EuropeanGrid
     grid = EuropeanGrid(
@@ -49,8 +115,16 @@ def initialize_grid(network_path='../networks/elec_s_512.nc'):
         real_data=False
     )
     grid.build_from_pypsa()
+    if shared_cache is not None:
+        grid.share_caches(shared_cache)
 
-    # Re-apply removed elements
+    apply_removals(grid)
+    grid_state['grid'] = grid
+    return grid
+
+
+def apply_removals(grid):
+    """Re-apply the removed elements listed in grid_state"""
     for line_id in grid_state['removed_lines']:
         try:
             grid.remove_element("L", line_id)
@@ -63,28 +137,118 @@ def initialize_grid(network_path='../networks/elec_s_512.nc'):
         except:
             pass
 
-    grid_state['grid'] = grid
-    return grid
+
+def publish_scenario():
+    """Multi-worker mode: make this worker's scenario the one every worker serves"""
+    if shared_cache is not None:
+        state = shared_cache.update_state({key: grid_state[key] for key in SCENARIO_KEYS})
+        grid_state['version'] = state['version']
+
+
+@app.before_request
+def sync_scenario():
+    """Multi-worker mode: replay a scenario changed by another worker since our last request"""
+    if shared_cache is None or not request.path.startswith('/api/'):
+        return
+    state = shared_cache.read_state()
+    if state is None or state['version'] == grid_state['version']:
+        return
+    network_changed = state['network_path'] != grid_state['network_path']
+    for key in SCENARIO_KEYS:
+        grid_state[key] = list(state[key]) if isinstance(state[key], list) else state[key]
+    grid = grid_state['grid']
+    if grid is None or network_changed:
+        initialize_grid(grid_state['network_path'])
+    else:
+        grid.restore_all()
+        grid.set_endpoints(ix=grid_state['bus_in'], ex=grid_state['bus_out'])
+        apply_removals(grid)
+    grid_state['study'] = None
+    run_simulation()
+    grid_state['version'] = state['version']
+
+
+@instrumented('run_simulation')
+def run_simulation(solver='lanczos'):
+    """Solve the current grid and keep the result for /api/simulation_stats"""
+    grid_state['simulation'] = solve_grid(solver)
+    return grid_state['simulation']
 
 
-def run_simulation():
-    """Run the Lanczos simulation on the current grid"""
+def simulation_payload(psi, islands, **extra):
+    """Response shape of run_simulation for a psi obtained without a global
+    Lanczos run (outage delta, island solves): no kappa/beta series, and the
+    converged psi² = Σκ² = ‖ψ‖² as the psi_squared / R_eff value"""
+    psi_squared = [float(sum(value * value for value in psi.values()))]
+    return {'kappas': [], 'betas': [], 'psi_squared': psi_squared,
+            'effective_resistances': psi_squared, 'islands': islands, **extra}
+
+
+def solve_grid(solver='lanczos'):
+    """Run the Lanczos simulation on the current grid
+
+    solver='recycled' solves with deflated CG, reusing the Ritz vectors kept
+    from earlier solves on the same topology (see EuropeanGrid.solve_recycled).
+    CG has no Lanczos tridiagonal, so its kappas/betas come back empty next
+    to the psi_squared convergence curve (same keys as the Lanczos path).
+    """
     grid = grid_state['grid']
     if grid is None:
         return None
 
+    if solver == 'recycled' and len(grid.check_islanding()) == 1:
+        psi = grid.solve_recycled()
+        for node, value in psi.items():
+            grid.nodes[node]['weight'] = value
+        report = grid.recycle_report
+        psi_squared = report['psi_sqs'].tolist()
+        return {
+            'kappas': [],
+            'betas': [],
+            'psi_squared': psi_squared,
+            'effective_resistances': psi_squared,
+            'recycling': {key: report[key] for key in
+                          ('iterations', 'deflation_size', 'residual', 'R_eff', 'topology_version')},
+            'islands': grid.check_islanding()
+        }
+
+    if shared_cache is not None and len(grid.check_islanding()) == 1:
+        # Baseline solved once per topology/endpoints and mapped by every worker
+        baseline = grid.shared_baseline()
+        for node, value in baseline['psi'].items():
+            grid.nodes[node]['weight'] = value
+        psi_squared = np.cumsum(baseline['kappas']**2).tolist()
+        return {
+            'kappas': baseline['kappas'].tolist(),
+            'betas': baseline['betas'].tolist(),
+            'psi_squared': psi_squared,
+            'effective_resistances': psi_squared,
+            'islands': grid.check_islanding()
+        }
+
     grid.iterate_qs()
     psi_approx = grid.calculate_psi_approx()
     grid.apply_psi_to_graph(0)
 
+    # A removal may have islanded part of the grid: the global Lanczos run is
+    # then meaningless, so solve each island on its own and report imbalances
+    islands = grid.check_islanding()
+    if len(islands) > 1:
+        psi_approx = grid.solve_components()
+        for node, value in psi_approx.items():
+            grid.nodes[node]['weight'] = value
+        islands = grid.island_report
+
     return {
         'kappas': grid.kappas.tolist() if hasattr(grid, 'kappas') else [],
         'betas': grid.betas.tolist() if hasattr(grid, 'betas') else [],
         'psi_squared': grid.psi_approx_squared().tolist() if hasattr(grid, 'psi_approx_squared') else [],
-        'effective_resistances': grid.calculate_effective_resistances() if hasattr(grid, 'calculate_effective_resistances') else []
+        'effective_resistances': grid.calculate_effective_resistances() if hasattr(grid, 'calculate_effective_resistances') else [],
+        'islands': islands
     }
 
 
+@instrumented('get_graph_data')
 def get_graph_data():
     """Convert grid to JSON format for frontend visualization"""
     grid = grid_state['grid']
@@ -99,6 +263,10 @@ def get_graph_data():
                for node, data in grid.nodes(data=True)]
     max_weight = max(weights) if weights and max(weights) > 0 else 1
 
+    # Input/output node names, resolved once through the grid's id table
+    input_id = grid._bus_node(grid_state['bus_in'])
+    output_id = grid._bus_node(grid_state['bus_out'])
+
     for node_id, data in grid.nodes(data=True):
         pos = data.get('pos', (0, 0))
         weight = data.get('weight', 0)
@@ -106,8 +274,8 @@ def get_graph_data():
         country = data.get('country', 'N/A')
 
         # Determine if this is input/output node
-        is_input = node_id == f"N_{grid_state['bus_in']}"
-        is_output = node_id == f"N_{grid_state['bus_out']}"
+        is_input = node_id == input_id
+        is_output = node_id == output_id
 
         nodes.append({
             'id': node_id,
@@ -156,6 +324,7 @@ def api_init():
 
     try:
         initialize_grid(network_path)
+        publish_scenario()
         simulation_results = run_simulation()
         graph_data = get_graph_data()
 
@@ -200,9 +369,14 @@ def api_set_endpoints():
         grid_state['bus_out'] = data['bus_out']
 
     try:
-        # Reinitialize with new endpoints
-        initialize_grid()
-        simulation_results = run_simulation()
+        # The topology is unchanged: move the endpoints on the existing grid so
+        # the compiled Hamiltonian and the deflation subspace are kept
+        if grid_state['grid'] is None:
+            initialize_grid()
+        else:
+            grid_state['grid'].set_endpoints(ix=grid_state['bus_in'], ex=grid_state['bus_out'])
+        publish_scenario()
+        simulation_results = run_simulation(solver=data.get('solver', 'lanczos'))
         graph_data = get_graph_data()
 
         return jsonify({
@@ -235,10 +409,57 @@ def api_remove_line():
         if line_id.startswith('L_'):
             line_id = line_id[2:]
 
-        grid.remove_element("L", line_id)
+        study = grid_state['study']
+        if (study is not None and study.has_delta(f"L_{line_id}")
+                and study.meta['network_hash'] == grid.topology_signature()
+                and study.meta['source'] == str(grid.ix) and study.meta['sink'] == str(grid.ex)):
+            # Precomputed outage from the loaded study: no solve needed
+            psi_before = {node: data.get('weight', 0)
+                          for node, data in grid.nodes(data=True)}
+            delta = study.delta(f"L_{line_id}")
+            grid.remove_element("L", line_id)
+            psi_after = {node: psi_before[node] + delta.get(node, 0)
+                         for node in grid.nodes}
+            simulation_results = {'islanding': False, 'block_size': len(delta),
+                                  'study': study.study_id}
+        elif grid.is_bridge(line_id):
+            # Islanding cut: skip the doomed global run, solve each island
+            grid.remove_element("L", line_id)
+            psi_after = grid.solve_components()
+            simulation_results = {'islanding': True, 'islands': grid.island_report}
+        elif shared_cache is not None:
+            # Outage factors of every line are computed once and mapped by all workers
+            line_node = grid._line_node(line_id)
+            psi_before = {node: data.get('weight', 0)
+                          for node, data in grid.nodes(data=True)}
+            _, factors = grid.outage_factors([line_node])
+            delta = {line: value for line, value in
+                     zip(grid.line_incidence()['lines'], psi_before[line_node] * factors[0])
+                     if value}
+            grid.remove_element("L", line_id)
+            psi_after = {node: psi_before[node] + delta.get(node, 0)
+                         for node in grid.nodes}
+            simulation_results = {'islanding': False,
+                                  'block_size': len(delta)}
+        else:
+            # Only the line's biconnected block carries the redistributed flow
+            psi_before = {node: data.get('weight', 0)
+                          for node, data in grid.nodes(data=True)}
+            delta = grid.line_outage_delta(line_id, psi_before)
+            grid.remove_element("L", line_id)
+            psi_after = {node: psi_before[node] + delta.get(node, 0)
+                         for node in grid.nodes}
+            simulation_results = {'islanding': False,
+                                  'block_size': len(delta)}
+        for node, value in psi_after.items():
+            grid.nodes[node]['weight'] = value
+        # Same fields as run_simulation, from the delta / island solve (no global run)
+        islands = simulation_results.pop('islands', None) or grid.check_islanding()
+        simulation_results = simulation_payload(psi_after, islands, **simulation_results)
+        grid_state['simulation'] = simulation_results
         grid_state['removed_lines'].append(line_id)
+        publish_scenario()
 
-        simulation_results = run_simulation()
         graph_data = get_graph_data()
 
         return jsonify({
@@ -251,6 +472,72 @@ def api_remove_line():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/studies', methods=['GET'])
+def api_studies():
+    """List the precomputed studies of the result store"""
+    studies = []
+    for study_id, meta in result_store().index().items():
+        studies.append({
+            'id': study_id,
+            'name': meta.get('name'),
+            'created': meta.get('created'),
+            'source': meta.get('source'),
+            'sink': meta.get('sink'),
+            'q_N': meta.get('q_N'),
+            'real_data': meta.get('real_data'),
+            'outages': meta.get('deltas', {}).get('rows', 0),
+            'tables': list(meta.get('tables', {}))
+        })
+    return jsonify({'success': True, 'studies': studies})
+
+
+@app.route('/api/load_study', methods=['POST'])
+def api_load_study():
+    """Load a precomputed study and display it without solving"""
+    data = request.get_json()
+    study_id = data.get('study_id')
+
+    if not study_id:
+        return jsonify({'success': False, 'error': 'study_id required'}), 400
+
+    try:
+        with instrumentation.phase('load_study'):
+            study = result_store().load(study_id)
+        grid = grid_state['grid']
+        if grid is None:
+            grid = initialize_grid()
+        if study.meta['network_hash'] != grid.topology_signature():
+            return jsonify({'success': False,
+                            'error': 'study was computed on a different network'}), 409
+
+        grid_state['bus_in'], grid_state['bus_out'] = study.meta['source'], study.meta['sink']
+        grid.set_endpoints(ix=grid_state['bus_in'], ex=grid_state['bus_out'])
+        for node, value in study.psi_dict().items():
+            if node in grid.nodes:
+                grid.nodes[node]['weight'] = value
+        grid_state['study'] = study
+        publish_scenario()
+
+        psi_squared = np.cumsum(np.asarray(study.kappas)**2).tolist() if 'kappas' in study.meta['arrays'] else []
+        grid_state['simulation'] = {
+            'kappas': np.asarray(study.kappas).tolist() if 'kappas' in study.meta['arrays'] else [],
+            'betas': np.asarray(study.betas).tolist() if 'betas' in study.meta['arrays'] else [],
+            'psi_squared': psi_squared,
+            'effective_resistances': psi_squared,
+            'study': study_id
+        }
+        return jsonify({
+            'success': True,
+            'graph': get_graph_data(),
+            'simulation': grid_state['simulation'],
+            'bus_in': grid_state['bus_in'],
+            'bus_out': grid_state['bus_out'],
+            'outages': study.delta_lines
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @app.route('/api/remove_node', methods=['POST'])
 def api_remove_node():
     """Remove a node from the grid"""
@@ -280,6 +567,7 @@ def api_remove_node():
 
         grid_state['removed_nodes'].append(node_id)
 
+        publish_scenario()
         simulation_results = run_simulation()
         graph_data = get_graph_data()
 
@@ -300,7 +588,12 @@ def api_reset():
     grid_state['removed_nodes'] = []
 
     try:
-        initialize_grid()
+        if grid_state['grid'] is None:
+            initialize_grid()
+        else:
+            # Undo the outages in place instead of reloading the PyPSA network
+            grid_state['grid'].restore_all()
+        publish_scenario()
         simulation_results = run_simulation()
         graph_data = get_graph_data()
 
@@ -318,7 +611,7 @@ def api_get_buses():
     """Get list of all available buses"""
     try:
         if grid_state['network'] is None:
-            n = pypsa.Network('../networks/elec_s_512.nc')
+            n = load_network()
         else:
             n = grid_state['network']
 
@@ -364,6 +657,11 @@ def api_simulation_stats():
         if grid is None:
             return jsonify({'success': False, 'error': 'Grid not initialized'})
 
+        # Last simulation served: reading grid.betas / grid.R_eff would rerun
+        # Lanczos lazily on a mutated (possibly islanded) grid
+        simulation = grid_state['simulation'] or {}
+        betas = simulation.get('betas') or []
+        resistances = simulation.get('effective_resistances') or []
         return jsonify({
             'success': True,
             'stats': {
@@ -373,14 +671,22 @@ def api_simulation_stats():
                 'bus_out': grid_state['bus_out'],
                 'removed_lines': grid_state['removed_lines'],
                 'removed_nodes': grid_state['removed_nodes'],
-                'avg_beta': float(np.mean(grid.betas)) if hasattr(grid, 'betas') else 0,
-                'avg_resistance': float(np.mean(grid.R_eff)) if hasattr(grid, 'R_eff') and grid.R_eff else 0
-            }
+                'avg_beta': float(np.mean(betas)) if betas else 0,
+                'avg_resistance': float(np.mean(resistances)) if resistances else 0
+            },
+            'metrics': metrics.to_dict() if metrics is not None else None
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus text exposition of the per-phase metrics"""
+    body = metrics.to_prometheus() if metrics is not None else ''
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+
 if __name__ == '__main__':
     print("Initializing European Grid Web Client...")
     print("Loading network data...")
@@ -388,8 +694,9 @@ if __name__ == '__main__':
     # Change to parent directory to access networks folder
     # os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-    initialize_grid('../networks/elec_s_512.nc')
-    run_simulation()
+    with recording():
+        initialize_grid('../networks/elec_s_512.nc')
+        run_simulation()
 
     print("Grid initialized successfully!")
     print("Starting web server on http://localhost:5000")
@@ -583,8 +583,9 @@ function updateCharts() {
     const { kappas, betas, psi_squared, effective_resistances } =
         state.simulationData;
 
+    // An empty series (outage delta, island solve) clears the stale chart
     // Update Kappa Chart
-    if (kappas && kappas.length > 0) {
+    if (kappas) {
         const kappaSq = kappas.map((k) => k * k);
         const kappaSum = kappaSq.reduce((acc, val, i) => {
             acc.push((acc[i - 1] || 0) + val);
@@ -598,14 +599,14 @@ function updateCharts() {
     }
 
     // Update Beta Chart
-    if (betas && betas.length > 0) {
+    if (betas) {
         state.charts.beta.data.labels = betas.map((_, i) => i + 1);
         state.charts.beta.data.datasets[0].data = betas;
         state.charts.beta.update();
     }
 
     // Update Resistance Chart
-    if (effective_resistances && effective_resistances.length > 0) {
+    if (effective_resistances) {
         state.charts.resistance.data.labels = effective_resistances.map(
             (_, i) => i + 1,
         );
@@ -614,7 +615,7 @@ function updateCharts() {
     }
 
     // Update Psi Chart
-    if (psi_squared && psi_squared.length > 0) {
+    if (psi_squared) {
         state.charts.psi.data.labels = psi_squared.map((_, i) => i + 1);
         state.charts.psi.data.datasets[0].data = psi_squared;
         state.charts.psi.update();
@@ -0,0 +1,33 @@
+"""
+Production entry point: several workers serving one grid through a shared cache
+
+    gunicorn --preload -w 4 -b 0.0.0.0:5000 wsgi:app
+
+The grid is loaded and the expensive arrays (compiled Hamiltonian, outage
+factors of every line, baseline for the default endpoints) are published once
+to GRID_SHARED (default /dev/shm/grid-cache). Workers map them read-only, so
+adding a worker does not add another copy. With --preload the grid itself is
+built once in the master and inherited by the forked workers.
+"""
+
+import os
+
+os.environ.setdefault('GRID_SHARED', 'auto')
+
+from app import (app, grid_state, initialize_grid, publish_scenario, recording, run_simulation,
+                 shared_cache)
+
+with recording():
+    state = shared_cache.read_state()
+    if state is not None:
+        # A previous server (or a restarted worker) left a scenario: serve it
+        grid_state.update({key: state[key] for key in ('bus_in', 'bus_out', 'removed_lines', 'removed_nodes')})
+        initialize_grid(state['network_path'])
+        grid_state['version'] = state['version']
+    else:
+        initialize_grid(os.environ.get('GRID_NETWORK', grid_state['network_path']))
+        publish_scenario()
+
+    if len(grid_state['grid'].check_islanding()) == 1:
+        grid_state['grid'].outage_factors()
+    run_simulation()